@@ -14,6 +14,7 @@ import bcrypt as _bcrypt
 
 from admin_db import admin_db
 from config.sources import MovieSources
+from tmdb_service import tmdb_service
 
 logger = logging.getLogger(__name__)
 
@@ -30,8 +31,6 @@ def _verify_password(password: str, hashed: str) -> bool:
 # In-memory session store (sufficient for single-instance deploy on Render)
 _sessions: dict = {}
 
-TMDB_API_KEY = MovieSources.TMDB_API_KEY
-
 
 # ─── Pydantic Models ────────────────────────────────────────────────────
 
@@ -537,15 +536,11 @@ async def search_tmdb(query: str, authorization: str = Header(None)):
     """Search TMDB for movies."""
     _verify_token((authorization or "").replace("Bearer ", ""))
 
-    import httpx
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(
-            "https://api.themoviedb.org/3/search/movie",
-            params={"api_key": TMDB_API_KEY, "query": query, "include_adult": "false"},
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return {"success": True, "results": data.get("results", [])}
+    try:
+        results = await tmdb_service.search_movies(query)
+        return {"success": True, "results": results}
+    except Exception as e:
+        logger.warning(f"Admin TMDB search failed: {e}")
         return {"success": False, "error": "TMDB API error"}
 
 
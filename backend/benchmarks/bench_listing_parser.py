@@ -0,0 +1,143 @@
+"""
+Benchmark: streaming regex autoindex parser vs. the old BeautifulSoup parser.
+
+Builds a synthetic Apache ``<pre>`` listing with 50k entries (FancyIndexing
+style, icons + truncated display names) and times:
+
+- ``bs4``      — the previous ``FTPMovieHandler._parse_apache_listing``
+- ``regex``    — ``ftp_listing_parser.parse_listing`` on the whole page
+- ``stream``   — ``ApacheListingParser.feed`` in 64 KiB chunks
+
+and checks all three return the same entries (the bs4 output is converted
+with ``parse_mtime`` / ``parse_size``, which the new parser applies inline).
+
+Usage (from backend/):
+    python -m benchmarks.bench_listing_parser [--entries 50000] [--repeat 3]
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+from urllib.parse import quote, unquote
+
+from bs4 import BeautifulSoup
+
+from ftp_listing_parser import (
+    ApacheListingParser, ListingEntry, parse_listing, parse_mtime, parse_size,
+)
+
+CHUNK_SIZE = 64 * 1024
+WORDS = (
+    "the knight of seven kingdoms inception baby john dark night rises "
+    "avengers end game spider man no way home dune part two oppenheimer"
+).split()
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def synthetic_listing(entries: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    lines = [
+        "<html><head><title>Index of /English</title></head><body>",
+        "<h1>Index of /English</h1><pre>"
+        '<img src="/icons/blank.gif" alt="Icon "> '
+        '<a href="?C=N;O=D">Name</a>                    '
+        '<a href="?C=M;O=A">Last modified</a>      '
+        '<a href="?C=S;O=A">Size</a><hr>'
+        '<img src="/icons/back.gif" alt="[PARENTDIR]"> '
+        '<a href="/">Parent Directory</a>                             -',
+    ]
+    for i in range(entries):
+        title = ".".join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 5)))
+        name = f"{title}.{rng.randint(1960, 2025)}.{rng.choice(['720p', '1080p', '2160p'])}.WEB-DL.{i}"
+        is_dir = rng.random() < 0.9
+        href = quote(name) + ("/" if is_dir else ".mkv")
+        shown = name if len(name) <= 50 else name[:47] + "..&gt;"
+        date = f"{rng.randint(1, 28):02d}-{rng.choice(MONTHS)}-{rng.randint(2015, 2025)} " \
+               f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+        size = "-" if is_dir else f"{rng.randint(1, 40) / 10:.1f}G"
+        icon = "folder.gif" if is_dir else "movie.gif"
+        lines.append(
+            f'<img src="/icons/{icon}" alt="[   ]"> '
+            f'<a href="{href}">{shown}</a>{" " * max(1, 52 - len(shown))}{date}  {size:>5}  '
+        )
+    lines.append("<hr></pre></body></html>")
+    return "\n".join(lines)
+
+
+def legacy_parse(html: str) -> List[Tuple[str, str, str]]:
+    """The previous BeautifulSoup implementation (``<pre>`` strategy)."""
+    items: List[Tuple[str, str, str]] = []
+    soup = BeautifulSoup(html, "html.parser")
+    pre = soup.find("pre")
+    for a_tag in pre.find_all("a"):
+        href = a_tag.get("href", "")
+        if not href or href.startswith("?") or href.startswith("#"):
+            continue
+        name = unquote(href.split("?")[0])
+        name = name.rstrip("/").rsplit("/", 1)[-1]
+        if not name:
+            continue
+        if href.endswith("/"):
+            name += "/"
+        if name in ("../", "..", ".", "/"):
+            continue
+        next_text = a_tag.next_sibling
+        date_str = ""
+        size_str = ""
+        if next_text and isinstance(next_text, str):
+            parts = next_text.strip().split()
+            if len(parts) >= 2:
+                date_str = f"{parts[0]} {parts[1]}"
+            if len(parts) >= 3:
+                size_str = parts[2]
+        items.append((name, date_str, size_str))
+    return items
+
+
+def stream_parse(html: str) -> List[ListingEntry]:
+    parser = ApacheListingParser()
+    items: List[ListingEntry] = []
+    for start in range(0, len(html), CHUNK_SIZE):
+        items.extend(parser.feed(html[start:start + CHUNK_SIZE]))
+    items.extend(parser.close())
+    return items
+
+
+def best_of(fn, html: str, repeat: int) -> Tuple[float, list]:
+    best, result = float("inf"), []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(html)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--entries", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    html = synthetic_listing(args.entries)
+    print(f"listing: {args.entries} entries, {len(html) / 1024 / 1024:.1f} MiB")
+
+    timings = {}
+    results = {}
+    for label, fn in (("bs4", legacy_parse), ("regex", parse_listing), ("stream", stream_parse)):
+        timings[label], results[label] = best_of(fn, html, args.repeat)
+
+    for label, seconds in timings.items():
+        speedup = timings["bs4"] / seconds if seconds else float("inf")
+        print(f"  {label:<7} {seconds * 1000:9.1f} ms   {speedup:5.1f}x   "
+              f"{len(results[label])} entries")
+
+    expected = [ListingEntry(n, parse_mtime(d), parse_size(s)) for n, d, s in results["bs4"]]
+    assert results["regex"] == expected, "regex parser disagrees with bs4"
+    assert results["stream"] == expected, "stream parser disagrees with bs4"
+    print("  outputs identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,28 @@ class MovieSources:
     FTP_HOST = os.getenv('FTP_HOST', 'ftp.ctgfun.com')
     FTP_ENABLED = os.getenv('FTP_ENABLED', 'true').lower() == 'true'
     FTP_TIMEOUT = int(os.getenv('FTP_TIMEOUT', '10'))
+    # Seconds between background rebuilds of the in-memory FTP catalog
+    FTP_CATALOG_REFRESH = int(os.getenv('FTP_CATALOG_REFRESH', '1800'))
+    # Where parsed listings + ETag/Last-Modified validators are persisted
+    FTP_LISTING_CACHE_DIR = os.getenv('FTP_LISTING_CACHE_DIR', '/tmp/ftp_listings')
+    # Max concurrent sub-folder listings when opening a series folder
+    FTP_MAX_FANOUT = int(os.getenv('FTP_MAX_FANOUT', '6'))
+    # Upper bound (seconds) on reusing a folder's cached playable links
+    FTP_LINKS_CACHE_TTL = int(os.getenv('FTP_LINKS_CACHE_TTL', '21600'))
+    # Binary catalog snapshot, mmap'd on startup and shared by workers
+    FTP_CATALOG_SNAPSHOT = os.getenv('FTP_CATALOG_SNAPSHOT', '/tmp/ftp_catalog.bin')
+    # Extra hosts serving the same tree as FTP_HOST (comma-separated)
+    FTP_MIRRORS = [h.strip() for h in os.getenv('FTP_MIRRORS', '').split(',') if h.strip()]
+    # Seconds between background RTT/health probes of the mirrors
+    FTP_MIRROR_PROBE_INTERVAL = int(os.getenv('FTP_MIRROR_PROBE_INTERVAL', '60'))
 
     # ===== HDHub4u Configuration =====
     HDHUB4U_BASE_URL = os.getenv('HDHUB4U_URL', 'https://new3.hdhub4u.fo')
     HDHUB4U_ENABLED = os.getenv('HDHUB4U_ENABLED', 'true').lower() == 'true'
+    # Homepage sync: parallel TMDB lookups, and the deadline (s) after which
+    # movies still being matched are left out of the response (0 = none)
+    HDHUB4U_TMDB_CONCURRENCY = int(os.getenv('HDHUB4U_TMDB_CONCURRENCY', '8'))
+    HDHUB4U_TMDB_DEADLINE = float(os.getenv('HDHUB4U_TMDB_DEADLINE', '8'))
 
     # ===== SkyMoviesHD Configuration =====
     SKYMOVIESHD_BASE_URL = os.getenv('SKYMOVIESHD_URL', 'https://skymovieshd.mba')
@@ -32,11 +50,40 @@ class MovieSources:
     # ===== Search Configuration =====
     MAX_RESULTS_PER_SOURCE = int(os.getenv('MAX_RESULTS_PER_SOURCE', '20'))
     SEARCH_TIMEOUT = int(os.getenv('SEARCH_TIMEOUT', '30'))
+    # How long a complete /links result (all sources) is served from cache
+    LINKS_CACHE_TTL = int(os.getenv('LINKS_CACHE_TTL', str(7 * 86400)))
 
     # ===== TMDB Configuration =====
     TMDB_API_KEY = os.getenv("TMDB_API_KEY", "7efd8424c17ff5b3e8dc9cebf4a33f73")
     TMDB_BASE_URL = "https://api.themoviedb.org/3"
     TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
+    # Image proxy: disk cache for /image/{size}/{file}, and the base URL API
+    # responses use for art (e.g. https://api.example.com/image; empty =
+    # link straight to image.tmdb.org)
+    IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', '/tmp/tmdb_images')
+    IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+    IMAGE_PROXY_BASE = os.getenv('IMAGE_PROXY_BASE', '')
+    # Search cache (in-process LRU + SQLite); misses expire sooner than hits
+    TMDB_CACHE_DB = os.getenv('TMDB_CACHE_DB', 'tmdb_cache.db')
+    TMDB_CACHE_TTL = int(os.getenv('TMDB_CACHE_TTL', str(7 * 86400)))
+    TMDB_NEGATIVE_CACHE_TTL = int(os.getenv('TMDB_NEGATIVE_CACHE_TTL', str(6 * 3600)))
+    # Local copy of TMDB's daily movie id export (movie_ids_*.json.gz) used
+    # to resolve titles without a search request; empty = disabled
+    TMDB_EXPORT_PATH = os.getenv('TMDB_EXPORT_PATH', '')
+    # Client-side ceiling for all TMDB requests (per process)
+    TMDB_RATE_LIMIT = float(os.getenv('TMDB_RATE_LIMIT', '40'))
+    TMDB_RATE_BURST = int(os.getenv('TMDB_RATE_BURST', '20'))
+    # Enrichment: parallel lookups across all requests, and the latency budget (s)
+    # after which unfinished movies are returned FTP-only (0 = no budget)
+    TMDB_ENRICH_CONCURRENCY = int(os.getenv('TMDB_ENRICH_CONCURRENCY', '8'))
+    TMDB_ENRICH_BUDGET = float(os.getenv('TMDB_ENRICH_BUDGET', '2.5'))
+    # Lookups that outlived their budget run on their own, smaller pool
+    TMDB_BACKGROUND_CONCURRENCY = int(os.getenv('TMDB_BACKGROUND_CONCURRENCY', '2'))
+    # /movie/{id} details cache: served fresh for TTL, then served stale
+    # (and refreshed in the background) until STALE_TTL
+    TMDB_DETAILS_CACHE_SIZE = int(os.getenv('TMDB_DETAILS_CACHE_SIZE', '2048'))
+    TMDB_DETAILS_TTL = int(os.getenv('TMDB_DETAILS_TTL', str(6 * 3600)))
+    TMDB_DETAILS_STALE_TTL = int(os.getenv('TMDB_DETAILS_STALE_TTL', str(7 * 86400)))
 
     @classmethod
     def get_enabled_sources(cls) -> list:
@@ -87,6 +134,9 @@ class MovieSources:
 
         if cls.FTP_ENABLED:
             logger.info(f"  FTP:          {cls.FTP_HOST} (timeout {cls.FTP_TIMEOUT}s)")
+            logger.info(f"  FTP catalog:  refresh every {cls.FTP_CATALOG_REFRESH}s")
+            if cls.FTP_MIRRORS:
+                logger.info(f"  FTP mirrors:  {', '.join(cls.FTP_MIRRORS)}")
         else:
             logger.info("  FTP:          DISABLED")
 
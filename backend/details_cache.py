@@ -0,0 +1,127 @@
+"""
+Details Cache — stale-while-revalidate cache for ``/movie/{tmdb_id}``.
+
+The details screen is opened far more often than details change, so the
+formatted details are kept in a bounded in-process LRU:
+
+- fresh (younger than ``ttl``): returned directly
+- stale (younger than ``stale_ttl``): returned directly, and one background
+  refresh per id is started; a failed refresh keeps the stale entry
+- missing or expired: fetched inline
+
+:meth:`DetailsCache.prefetch` warms ids that are about to be opened (those
+shown by ``/trending`` and ``/latest``) in the background at
+``PRIORITY_BACKGROUND``, so they never delay user-facing TMDB traffic.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+# fetch(tmdb_id, priority) -> details, or None if not found / failed
+Fetcher = Callable[[int, int], Awaitable[Optional[Dict]]]
+
+
+class DetailsCache:
+    """Bounded SWR cache in front of a details *fetch* function."""
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        max_entries: int = 2048,
+        ttl: float = 6 * 3600,
+        stale_ttl: float = 7 * 86400,
+        prefetch_concurrency: int = 4,
+    ):
+        self._fetch = fetch
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        # tmdb_id -> (fetched_at, details)
+        self._entries: "OrderedDict[int, Tuple[float, Dict]]" = OrderedDict()
+        self._refreshing: Dict[int, asyncio.Task] = {}
+        self._prefetch_slots = asyncio.Semaphore(prefetch_concurrency)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get(self, tmdb_id: int) -> Optional[Dict]:
+        """Details for *tmdb_id* (see the module docstring for freshness)."""
+        entry = self._entries.get(tmdb_id)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < self.stale_ttl:
+                self._entries.move_to_end(tmdb_id)
+                if age < self.ttl:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    self._refresh(tmdb_id, PRIORITY_INTERACTIVE)
+                return entry[1]
+            del self._entries[tmdb_id]
+
+        self.misses += 1
+        task = self._refreshing.get(tmdb_id)
+        if task is not None:  # already being fetched (prefetch or refresh)
+            return await asyncio.shield(task)
+        return await self._load(tmdb_id, PRIORITY_INTERACTIVE)
+
+    def prefetch(self, tmdb_ids: Iterable[int]) -> int:
+        """Warm missing / stale *tmdb_ids* in the background. Returns how many."""
+        now = time.time()
+        started = 0
+        for tmdb_id in tmdb_ids:
+            if not tmdb_id or tmdb_id <= 0:  # FTP-only fallback ids are negative
+                continue
+            entry = self._entries.get(tmdb_id)
+            if entry is not None and now - entry[0] < self.ttl:
+                continue
+            if self._refresh(tmdb_id, PRIORITY_BACKGROUND):
+                started += 1
+        return started
+
+    def _refresh(self, tmdb_id: int, priority: int) -> bool:
+        """Start one background load of *tmdb_id* unless one is running."""
+        if tmdb_id in self._refreshing:
+            return False
+        task = asyncio.ensure_future(self._background_load(tmdb_id, priority))
+        self._refreshing[tmdb_id] = task
+        task.add_done_callback(lambda t, tmdb_id=tmdb_id: self._refreshing.pop(tmdb_id, None))
+        return True
+
+    async def _background_load(self, tmdb_id: int, priority: int) -> Optional[Dict]:
+        if priority == PRIORITY_BACKGROUND:
+            async with self._prefetch_slots:
+                return await self._load(tmdb_id, priority)
+        return await self._load(tmdb_id, priority)
+
+    async def _load(self, tmdb_id: int, priority: int) -> Optional[Dict]:
+        try:
+            details = await self._fetch(tmdb_id, priority)
+        except Exception as e:
+            logger.warning(f"[Details] Fetch failed for {tmdb_id}: {e}")
+            details = None
+        if details is not None:
+            self._entries[tmdb_id] = (time.time(), details)
+            self._entries.move_to_end(tmdb_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        elif tmdb_id in self._entries:
+            # Keep serving the stale copy rather than nothing
+            return self._entries[tmdb_id][1]
+        return details
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "refreshing": len(self._refreshing),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
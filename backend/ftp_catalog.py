@@ -0,0 +1,457 @@
+"""
+FTP Catalog — long-lived in-memory index of the FTP folder listings.
+
+The Apache index pages for the search directories are multi-megabyte and
+change only a few times a day, so instead of re-downloading them on every
+search we keep one parsed copy in memory and rebuild it in the background
+(see ``FTPMovieHandler.run_catalog_refresh``).
+
+Each build also creates two search indexes so a query only touches the
+folders that can actually match:
+
+- an inverted index: normalized folder token → folder ids
+- a character-trigram index over the token vocabulary, used to find every
+  token that *contains* a query word (``"knight"`` → ``"knights"``)
+
+Matches are ranked (word coverage, exact title, year agreement, quality)
+and only the best *limit* are kept in a bounded heap; candidates are scored
+in order of coverage so the scan stops once no remaining folder can beat
+the current k-th score.
+
+Rows are compact ``__slots__`` records (:class:`CatalogRow`) with the
+repeated directory / language / quality strings interned and postings
+stored as ``array('I')``; the API dicts are only built for the rows a
+request actually returns.
+
+Each directory also gets a secondary index of its folders ordered newest
+first (mtime desc, then id), so ``browse_latest`` is a slice plus a
+binary search for the paging cursor instead of a sort per request.
+
+The build also prepares a weighted sampling pool (cumulative weights by
+quality and recency) so ``/trending`` and ``/featured`` can draw random
+titles in O(limit) without touching the network.
+
+A catalog is immutable once built: a refresh builds a brand-new instance and
+swaps the handler's reference, so readers never see a half-built index.
+The handler persists each build with ``ftp_catalog_snapshot`` and serves
+searches from the memory-mapped copy.
+"""
+
+import bisect
+import heapq
+import itertools
+import logging
+import random
+import re
+import sys
+import time
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ftp_listing_parser import ListingEntry
+
+logger = logging.getLogger(__name__)
+
+# Query / folder-name normalization: separators to spaces, year stripped
+_SEPARATORS_RE = re.compile(r"[._\-\[\]\(\)]")
+_YEAR_RE = re.compile(r"\b(20\d{2}|19\d{2})\b")
+_SPACES_RE = re.compile(r"\s+")
+
+# Share of query words that must hit a folder word (the 70 % rule)
+MATCH_THRESHOLD = 0.7
+
+# Ranking weights (see FTPCatalog._score)
+SCORE_COVERAGE = 4.0        # times the share of query words hit
+SCORE_EXACT_TITLE = 3.0
+SCORE_TITLE_PREFIX = 1.0
+SCORE_YEAR_MATCH = 2.0
+SCORE_YEAR_MISMATCH = -2.0
+QUALITY_SCORES = {"4K": 0.3, "1080p": 0.25, "720p": 0.15, "480p": 0.05}
+# Most a folder can add on top of its coverage score
+_SCORE_BONUS_MAX = SCORE_EXACT_TITLE + SCORE_YEAR_MATCH + max(QUALITY_SCORES.values())
+
+# Sampling weights: newer and higher-quality folders come up more often
+QUALITY_WEIGHTS = {"4K": 1.5, "1080p": 1.2, "720p": 1.0, "480p": 0.5, "HD": 0.8}
+RECENCY_HALF_LIFE = 90 * 86400
+# Weight share every folder keeps regardless of age (so old titles still show)
+RECENCY_FLOOR = 0.05
+
+
+def _trigrams(word: str) -> Set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class CatalogRow:
+    """One parsed FTP folder, as kept in memory by the catalog."""
+
+    __slots__ = (
+        "id", "name", "directory", "title", "year",
+        "quality", "language", "content_type", "mtime", "size",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        directory: str,
+        title: str,
+        year: str,
+        quality: str,
+        language: str,
+        content_type: str,
+        mtime: int = 0,
+        size: int = 0,
+    ):
+        self.id = id
+        self.name = name
+        # Low-cardinality fields are interned: one string object per value
+        self.directory = sys.intern(directory)
+        self.title = title
+        self.year = sys.intern(year)
+        self.quality = sys.intern(quality)
+        self.language = sys.intern(language)
+        self.content_type = sys.intern(content_type)
+        self.mtime = mtime
+        self.size = size
+
+    def to_dict(self) -> Dict:
+        """API shape of a folder, as returned by search and browse."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "year": self.year,
+            "quality": self.quality,
+            "language": self.language,
+            "type": self.content_type,
+            # Internal data — used by get_playable_links(), never shown in app UI
+            "_internal_folder": self.name,
+            "_internal_directory": self.directory,
+            "_source": "ftp",
+        }
+
+    def to_entry(self) -> ListingEntry:
+        return ListingEntry(self.name + "/", self.mtime, self.size)
+
+
+class FTPCatalog:
+    """Snapshot of every parsed folder in the FTP search directories."""
+
+    def __init__(self, directories: Optional[List[str]] = None):
+        # Directory order matters — searched first to last
+        self.directories: List[str] = list(directories or [])
+        # Folder id -> row. Ids follow directory order, so sorted ids ==
+        # search order.
+        self._rows: List[CatalogRow] = []
+        # CatalogRow.id -> folder id
+        self._ids: Dict[str, int] = {}
+        # token -> ascending folder ids
+        self._postings: Dict[str, array] = {}
+        # trigram -> tokens containing it (tokens of 3+ chars only)
+        self._trigrams: Dict[str, Set[str]] = {}
+        # directory -> folder ids, newest first (mtime desc, CatalogRow.id asc)
+        self._latest: Dict[str, array] = {}
+        # Running sum of sampling weights, parallel to _rows
+        self._cum_weights: array = array("d")
+        self.built_at: float = 0.0
+
+    @classmethod
+    def build(
+        cls,
+        listings: Dict[str, List[ListingEntry]],
+        parse_row: Callable[[str, str, int, int], Optional[CatalogRow]],
+    ) -> "FTPCatalog":
+        """
+        Build a catalog from raw directory listings.
+
+        *parse_row* is ``FTPMovieHandler._parse_row``; entries it rejects
+        are skipped.
+        """
+        catalog = cls(list(listings))
+        postings: Dict[str, List[int]] = {}
+        for directory, items in listings.items():
+            for entry in items:
+                clean = entry.name.rstrip("/")
+                if not clean or clean in ("..", "."):
+                    continue
+                row = parse_row(clean, directory, entry.mtime, entry.size)
+                if row:
+                    catalog._add(row, postings)
+
+        catalog._postings = {
+            sys.intern(token): array("I", ids) for token, ids in postings.items()
+        }
+
+        for token in catalog._postings:
+            if len(token) > 2:
+                for gram in _trigrams(token):
+                    catalog._trigrams.setdefault(gram, set()).add(token)
+
+        rows = catalog._rows
+        by_directory: Dict[str, List[int]] = {d: [] for d in catalog.directories}
+        for folder_id, row in enumerate(rows):
+            by_directory[row.directory].append(folder_id)
+        catalog._latest = {
+            directory: array("I", sorted(ids, key=lambda i: (-rows[i].mtime, rows[i].id)))
+            for directory, ids in by_directory.items()
+        }
+
+        catalog.built_at = time.time()
+        catalog._cum_weights = array("d", itertools.accumulate(
+            catalog._weight(row, catalog.built_at) for row in catalog._rows
+        ))
+        return catalog
+
+    def _add(self, row: CatalogRow, postings: Dict[str, List[int]]) -> None:
+        folder_id = len(self._rows)
+        self._rows.append(row)
+        self._ids[row.id] = folder_id
+
+        clean = _SEPARATORS_RE.sub(" ", row.name.lower())
+        for token in set(clean.split()):
+            if len(token) > 1:
+                postings.setdefault(token, []).append(folder_id)
+
+    @staticmethod
+    def _weight(row: CatalogRow, now: float) -> float:
+        quality = QUALITY_WEIGHTS.get(row.quality, 1.0)
+        if not row.mtime:
+            return quality * 0.25
+        age = max(0.0, now - row.mtime)
+        recency = 0.5 ** (age / RECENCY_HALF_LIFE)
+        return quality * (RECENCY_FLOOR + (1 - RECENCY_FLOOR) * recency)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def loaded(self) -> bool:
+        return self.built_at > 0
+
+    @property
+    def age(self) -> float:
+        """Seconds since this catalog was built."""
+        return time.time() - self.built_at if self.loaded else float("inf")
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, row_id: str) -> Optional[CatalogRow]:
+        """Row by its stable ``CatalogRow.id`` (md5 of directory + name)."""
+        folder_id = self._ids.get(row_id)
+        return self._rows[folder_id] if folder_id is not None else None
+
+    def latest(
+        self,
+        directory: str,
+        limit: int,
+        after: Optional[Tuple[int, str]] = None,
+    ) -> Optional[List[CatalogRow]]:
+        """
+        Up to *limit* rows of *directory*, newest first, starting after the
+        ``(mtime, id)`` cursor *after*. None if the directory isn't indexed.
+        """
+        order = self._latest.get(directory)
+        if order is None:
+            return None
+        start = 0
+        if after:
+            key = (-after[0], after[1])
+            lo, hi = 0, len(order)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                row = self._rows[order[mid]]
+                if (-row.mtime, row.id) <= key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            start = lo
+        return [self._rows[i] for i in order[start:start + limit]]
+
+    @staticmethod
+    def latest_from_listing(
+        items: List[ListingEntry],
+        directory: str,
+        parse_row: Callable[[str, str, int, int], Optional[CatalogRow]],
+        limit: int,
+        after: Optional[Tuple[int, str]] = None,
+    ) -> List[CatalogRow]:
+        """
+        :meth:`latest` over a raw listing of a directory that isn't
+        indexed: same order and cursor rule, via a bounded heap instead of
+        building a catalog.
+        """
+        rows = []
+        for entry in items:
+            clean = entry.name.rstrip("/")
+            if not clean or clean in ("..", "."):
+                continue
+            row = parse_row(clean, directory, entry.mtime, entry.size)
+            if row and (not after or (-row.mtime, row.id) > (-after[0], after[1])):
+                rows.append(row)
+        return heapq.nsmallest(limit, rows, key=lambda r: (-r.mtime, r.id))
+
+    def entries(self, directory: str) -> List[ListingEntry]:
+        """Listing entries for *directory* as of this catalog's build."""
+        return [row.to_entry() for row in self._rows if row.directory == directory]
+
+    def search(self, query: str, limit: int) -> List[Dict]:
+        """
+        Return the *limit* best-scoring folders matching *query*, best first
+        (ties in directory order). A folder matches when at least 70 % of
+        the query words (3+ chars, year removed) hit one of its words; a
+        query with no such word falls back to a substring match.
+        """
+        if limit <= 0:
+            return []
+        query_lower = query.lower().strip()
+        query_clean = _SEPARATORS_RE.sub(" ", query_lower)
+        year_match = _YEAR_RE.search(query_clean)
+        query_no_year = _SPACES_RE.sub(" ", _YEAR_RE.sub("", query_clean).strip())
+        query_words = [w for w in query_no_year.split() if len(w) > 2]
+
+        groups: List[Tuple[float, List[int]]] = []
+        if query_words:
+            by_hits: Dict[int, List[int]] = {}
+            for folder_id, n in self._word_hits(query_words).items():
+                by_hits.setdefault(n, []).append(folder_id)
+            for n in sorted(by_hits, reverse=True):
+                groups.append((n / len(query_words), sorted(by_hits[n])))
+        else:
+            # Nothing indexable (e.g. "up", "2024") — plain substring scan
+            folder_ids = []
+            for i, name in enumerate(self._names()):
+                lower = name.lower()
+                if query_lower in lower or (
+                    query_no_year and query_no_year in _SEPARATORS_RE.sub(" ", lower)
+                ):
+                    folder_ids.append(i)
+            groups.append((1.0, folder_ids))
+
+        year = year_match.group(1) if year_match else ""
+        return [
+            self._rows[i].to_dict()
+            for i in self._top_k(groups, limit, query_no_year, year)
+        ]
+
+    def _top_k(
+        self,
+        groups: List[Tuple[float, List[int]]],
+        limit: int,
+        query_title: str,
+        year: str,
+    ) -> List[int]:
+        """
+        Folder ids of the *limit* best scores. *groups* are (coverage, ids)
+        in descending coverage, so scanning stops at the first group whose
+        best possible score can't beat the current k-th.
+        """
+        heap: List[Tuple[float, int]] = []  # (score, -folder_id), worst on top
+        for coverage, folder_ids in groups:
+            if len(heap) >= limit and SCORE_COVERAGE * coverage + _SCORE_BONUS_MAX < heap[0][0]:
+                break
+            for folder_id in folder_ids:
+                item = (self._score(self._rows[folder_id], coverage, query_title, year), -folder_id)
+                if len(heap) < limit:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        return [-neg_id for _, neg_id in sorted(heap, reverse=True)]
+
+    @staticmethod
+    def _score(row: CatalogRow, coverage: float, query_title: str, year: str) -> float:
+        score = SCORE_COVERAGE * coverage
+        if query_title:
+            title = _SPACES_RE.sub(" ", _SEPARATORS_RE.sub(" ", row.title.lower())).strip()
+            if title == query_title:
+                score += SCORE_EXACT_TITLE
+            elif title.startswith(query_title):
+                score += SCORE_TITLE_PREFIX
+        if year and row.year:
+            score += SCORE_YEAR_MATCH if row.year == year else SCORE_YEAR_MISMATCH
+        return score + QUALITY_SCORES.get(row.quality, 0.0)
+
+    def _names(self) -> Iterable[str]:
+        """Folder names in id order."""
+        return (row.name for row in self._rows)
+
+    def _word_hits(self, query_words: List[str]) -> Dict[int, int]:
+        """Folder id -> hit count, for folders where at least 70 % of *query_words* hit a folder token."""
+        hits: Dict[int, int] = {}
+        for word in query_words:
+            matched: Set[int] = set()
+            for token in self._tokens_for(word):
+                matched.update(self._postings[token])
+            for folder_id in matched:
+                hits[folder_id] = hits.get(folder_id, 0) + 1
+
+        needed = MATCH_THRESHOLD * len(query_words)
+        return {i: n for i, n in hits.items() if n >= needed}
+
+    def _tokens_for(self, word: str) -> Iterable[str]:
+        """
+        Indexed tokens that hit a query word: equal to it, containing it,
+        or (3+ chars) contained in it.
+        """
+        tokens: Set[str] = set()
+
+        # Tokens containing the word: intersect trigram postings, then verify
+        candidates: Optional[Set[str]] = None
+        for gram in _trigrams(word):
+            bucket = self._trigrams.get(gram)
+            if not bucket:
+                candidates = None
+                break
+            candidates = set(bucket) if candidates is None else candidates & bucket
+            if not candidates:
+                break
+        if candidates:
+            tokens.update(t for t in candidates if word in t)
+
+        # Tokens (3+ chars) inside the word: look up each substring directly
+        for size in range(3, len(word) + 1):
+            for start in range(len(word) - size + 1):
+                piece = word[start:start + size]
+                if piece in self._postings:
+                    tokens.add(piece)
+
+        return tokens
+
+    def sample(self, limit: int, rng: Optional[random.Random] = None) -> List[CatalogRow]:
+        """
+        Up to *limit* distinct rows, drawn at random weighted by quality and
+        recency. O(limit log n): bisects the cumulative weights, retrying on
+        duplicates and topping up uniformly if the weights are too skewed.
+        """
+        rng = rng or random
+        n = len(self._rows)
+        limit = min(limit, n)
+        if limit <= 0:
+            return []
+
+        picked: Dict[int, None] = {}
+        total = self._cum_weights[-1]
+        for _ in range(limit * 8):
+            if len(picked) >= limit:
+                break
+            i = bisect.bisect_right(self._cum_weights, rng.random() * total)
+            picked.setdefault(min(i, n - 1))
+        if len(picked) < limit:
+            for i in rng.sample(range(n), min(n, limit * 2)):
+                picked.setdefault(i)
+                if len(picked) >= limit:
+                    break
+
+        return [self._rows[i] for i in picked]
+
+    def stats(self) -> Dict:
+        per_dir: Dict[str, int] = {d: 0 for d in self.directories}
+        for row in self._rows:
+            per_dir[row.directory] += 1
+        return {
+            "loaded": self.loaded,
+            "built_at": self.built_at,
+            "total": len(self),
+            "tokens": len(self._postings),
+            "directories": per_dir,
+        }
@@ -0,0 +1,373 @@
+"""
+FTP Catalog Snapshot — compact binary on-disk form of an :class:`FTPCatalog`.
+
+Written after every catalog refresh and memory-mapped read-only on startup,
+so a restarted process can answer FTP searches before its first listing
+fetch, and several uvicorn workers mapping the same file share one copy of
+the pages through the OS page cache instead of each building their own.
+
+Layout (native byte order, every section 8-byte aligned)::
+
+    header      magic, version, built_at, section table (offset, length)
+    str_index   uint32[n + 1]   offsets into str_data
+    str_data    utf-8 bytes     every distinct string, stored once
+    dirs        uint32[]        directory string ids, in search order
+    rows        struct[]        fixed-width CatalogRow records (see _ROW)
+    ids         (str, row)[]    CatalogRow.id -> row, sorted by id bytes
+    tokens      (str, off, n)[] index token -> slice of postings, sorted
+    postings    uint32[]        ascending row ids per token
+    grams       (str, off, n)[] trigram -> slice of gram_tokens, sorted
+    gram_tokens uint32[]        token entry numbers per trigram
+    weights     float64[]       cumulative sampling weights
+    latest_index uint32[dirs+1] offsets into latest, per directory
+    latest      uint32[]        row ids per directory, newest first
+
+A loaded snapshot is a :class:`MappedCatalog`: an ``FTPCatalog`` whose row
+list and index dicts are replaced by read-only views that decode records
+on access.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+from ftp_catalog import CatalogRow, FTPCatalog
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FTPCAT\x00\x01"
+VERSION = 2
+
+_SECTIONS = (
+    "str_index", "str_data", "dirs", "rows", "ids",
+    "tokens", "postings", "grams", "gram_tokens", "weights",
+    "latest_index", "latest",
+)
+# magic, version, byte order (0 little / 1 big), built_at, then (offset, length) per section
+_HEADER = struct.Struct("<8sIId" + "QQ" * len(_SECTIONS))
+# id, name, directory, title, year, quality, language, content_type (string ids), mtime, size
+_ROW = struct.Struct("=8Iqq")
+_ROW_FIELDS = 8
+_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+
+# ----------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------
+
+class _StringTable:
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.index = array("I", [0])
+        self.data = bytearray()
+
+    def add(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self._ids)
+            self.data += value.encode()
+            self.index.append(len(self.data))
+        return string_id
+
+
+def write_snapshot(catalog: FTPCatalog, path: str) -> None:
+    """
+    Serialize an in-memory *catalog* to *path*.
+
+    The file is written next to the target and renamed into place, so
+    processes that still have the previous snapshot mapped keep a valid
+    (unlinked) copy until they reload.
+    """
+    strings = _StringTable()
+
+    dirs = array("I", (strings.add(d) for d in catalog.directories))
+
+    rows = bytearray()
+    ids = []
+    for row_number, row in enumerate(catalog._rows):
+        rows += _ROW.pack(
+            strings.add(row.id), strings.add(row.name), strings.add(row.directory),
+            strings.add(row.title), strings.add(row.year), strings.add(row.quality),
+            strings.add(row.language), strings.add(row.content_type),
+            row.mtime, row.size,
+        )
+        ids.append((row.id.encode(), strings.add(row.id), row_number))
+    ids.sort()
+    id_table = array("I")
+    for _, string_id, row_number in ids:
+        id_table.extend((string_id, row_number))
+
+    token_list = sorted(catalog._postings, key=str.encode)
+    token_entry = {token: i for i, token in enumerate(token_list)}
+    tokens = array("I")
+    postings = array("I")
+    for token in token_list:
+        ids_for_token = catalog._postings[token]
+        tokens.extend((strings.add(token), len(postings), len(ids_for_token)))
+        postings.extend(ids_for_token)
+
+    grams = array("I")
+    gram_tokens = array("I")
+    for gram in sorted(catalog._trigrams, key=str.encode):
+        members = sorted(token_entry[t] for t in catalog._trigrams[gram])
+        grams.extend((strings.add(gram), len(gram_tokens), len(members)))
+        gram_tokens.extend(members)
+
+    weights = array("d", catalog._cum_weights)
+
+    latest_index = array("I", [0])
+    latest = array("I")
+    for directory in catalog.directories:
+        latest.extend(catalog._latest.get(directory, ()))
+        latest_index.append(len(latest))
+
+    payloads = {
+        "str_index": strings.index.tobytes(),
+        "str_data": bytes(strings.data),
+        "dirs": dirs.tobytes(),
+        "rows": bytes(rows),
+        "ids": id_table.tobytes(),
+        "tokens": tokens.tobytes(),
+        "postings": postings.tobytes(),
+        "grams": grams.tobytes(),
+        "gram_tokens": gram_tokens.tobytes(),
+        "weights": weights.tobytes(),
+        "latest_index": latest_index.tobytes(),
+        "latest": latest.tobytes(),
+    }
+
+    table = []
+    offset = _HEADER.size
+    for name in _SECTIONS:
+        offset = _align(offset)
+        table.extend((offset, len(payloads[name])))
+        offset += len(payloads[name])
+
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _BYTE_ORDER, catalog.built_at, *table))
+        for name, (start, _) in zip(_SECTIONS, zip(table[::2], table[1::2])):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(payloads[name])
+    os.replace(tmp, path)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+# ----------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------
+
+class _Strings:
+    def __init__(self, mm: mmap.mmap, index: memoryview, data_offset: int):
+        self._mm = mm
+        self._index = index
+        self._data = data_offset
+
+    def raw(self, string_id: int) -> bytes:
+        start = self._data + self._index[string_id]
+        return self._mm[start:self._data + self._index[string_id + 1]]
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.raw(string_id).decode()
+
+
+def _bisect_table(strings: _Strings, table: memoryview, width: int, key: bytes) -> int:
+    """Entry number of *key* in a table sorted by the string in column 0, or -1."""
+    lo, hi = 0, len(table) // width
+    while lo < hi:
+        mid = (lo + hi) // 2
+        probe = strings.raw(table[mid * width])
+        if probe < key:
+            lo = mid + 1
+        elif probe > key:
+            hi = mid
+        else:
+            return mid
+    return -1
+
+
+class _RowsView:
+    """Read-only ``List[CatalogRow]`` over the fixed-width record array."""
+
+    def __init__(self, strings: _Strings, mm: mmap.mmap, offset: int, length: int):
+        self._strings = strings
+        self._mm = mm
+        self._offset = offset
+        self._count = length // _ROW.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, row_number: int) -> CatalogRow:
+        if row_number < 0:
+            row_number += self._count
+        if not 0 <= row_number < self._count:
+            raise IndexError(row_number)
+        fields = _ROW.unpack_from(self._mm, self._offset + row_number * _ROW.size)
+        text = [self._strings[i] for i in fields[:_ROW_FIELDS]]
+        return CatalogRow(*text, mtime=fields[_ROW_FIELDS], size=fields[_ROW_FIELDS + 1])
+
+    def __iter__(self) -> Iterator[CatalogRow]:
+        for row_number in range(self._count):
+            yield self[row_number]
+
+    def names(self) -> Iterator[str]:
+        """Folder names only, without building CatalogRow objects."""
+        for offset in range(self._offset, self._offset + self._count * _ROW.size, _ROW.size):
+            yield self._strings[_ROW.unpack_from(self._mm, offset)[1]]
+
+
+class _IdsView:
+    """Read-only ``Dict[str, int]``: CatalogRow.id -> row number."""
+
+    def __init__(self, strings: _Strings, table: memoryview):
+        self._strings = strings
+        self._table = table
+
+    def get(self, row_id: str, default=None) -> Optional[int]:
+        entry = _bisect_table(self._strings, self._table, 2, row_id.encode())
+        return self._table[entry * 2 + 1] if entry >= 0 else default
+
+    def __len__(self) -> int:
+        return len(self._table) // 2
+
+
+class _PostingsView:
+    """Read-only ``Dict[str, array('I')]``: token -> ascending row numbers."""
+
+    def __init__(self, strings: _Strings, table: memoryview, postings: memoryview):
+        self._strings = strings
+        self._table = table
+        self._postings = postings
+
+    def entry(self, token: str) -> int:
+        return _bisect_table(self._strings, self._table, 3, token.encode())
+
+    def token(self, entry: int) -> str:
+        return self._strings[self._table[entry * 3]]
+
+    def __contains__(self, token: str) -> bool:
+        return self.entry(token) >= 0
+
+    def __getitem__(self, token: str) -> memoryview:
+        entry = self.entry(token)
+        if entry < 0:
+            raise KeyError(token)
+        start = self._table[entry * 3 + 1]
+        return self._postings[start:start + self._table[entry * 3 + 2]]
+
+    def __len__(self) -> int:
+        return len(self._table) // 3
+
+    def __iter__(self) -> Iterator[str]:
+        for entry in range(len(self)):
+            yield self.token(entry)
+
+    def items(self):
+        for token in self:
+            yield token, self[token]
+
+
+class _TrigramsView:
+    """Read-only ``Dict[str, Set[str]]``: trigram -> tokens containing it."""
+
+    def __init__(self, strings: _Strings, table: memoryview, members: memoryview,
+                 postings: _PostingsView):
+        self._strings = strings
+        self._table = table
+        self._members = members
+        self._postings = postings
+
+    def get(self, gram: str, default=None) -> Optional[Set[str]]:
+        entry = _bisect_table(self._strings, self._table, 3, gram.encode())
+        if entry < 0:
+            return default
+        start = self._table[entry * 3 + 1]
+        members = self._members[start:start + self._table[entry * 3 + 2]]
+        return {self._postings.token(i) for i in members}
+
+    def __len__(self) -> int:
+        return len(self._table) // 3
+
+
+class MappedCatalog(FTPCatalog):
+    """FTPCatalog backed by a memory-mapped snapshot (see :func:`load_snapshot`)."""
+
+    def _names(self) -> Iterable[str]:
+        return self._rows.names()
+
+
+def load_snapshot(path: str) -> Optional[FTPCatalog]:
+    """
+    Memory-map the snapshot at *path* read-only and wrap it in an
+    ``FTPCatalog``. Returns None if the file is missing or unusable.
+    """
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not map catalog snapshot {path}: {e}")
+        return None
+
+    try:
+        header = _HEADER.unpack_from(mm, 0)
+    except struct.error:
+        logger.warning(f"Catalog snapshot {path} is truncated")
+        return None
+    magic, version, byte_order, built_at = header[:4]
+    if magic != MAGIC or version != VERSION or byte_order != _BYTE_ORDER:
+        logger.info(f"Ignoring catalog snapshot {path} (format {version})")
+        return None
+
+    view = memoryview(mm)
+    sections = {}
+    for i, name in enumerate(_SECTIONS):
+        offset, length = header[4 + i * 2], header[5 + i * 2]
+        if offset + length > len(mm):
+            logger.warning(f"Catalog snapshot {path} is truncated")
+            return None
+        sections[name] = (offset, length)
+
+    def cast(name: str, fmt: str) -> memoryview:
+        offset, length = sections[name]
+        return view[offset:offset + length].cast(fmt)
+
+    strings = _Strings(mm, cast("str_index", "I"), sections["str_data"][0])
+    postings = _PostingsView(strings, cast("tokens", "I"), cast("postings", "I"))
+
+    catalog = MappedCatalog([strings[i] for i in cast("dirs", "I")])
+    latest_index, latest = cast("latest_index", "I"), cast("latest", "I")
+    catalog._latest = {
+        directory: latest[latest_index[i]:latest_index[i + 1]]
+        for i, directory in enumerate(catalog.directories)
+    }
+    catalog._rows = _RowsView(strings, mm, *sections["rows"])
+    catalog._ids = _IdsView(strings, cast("ids", "I"))
+    catalog._postings = postings
+    catalog._trigrams = _TrigramsView(
+        strings, cast("grams", "I"), cast("gram_tokens", "I"), postings,
+    )
+    catalog._cum_weights = cast("weights", "d")
+    catalog.built_at = built_at
+    return catalog
+
+
+def snapshot_built_at(path: str) -> float:
+    """``built_at`` recorded in the snapshot header (0.0 if unreadable)."""
+    try:
+        with open(path, "rb") as f:
+            header = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return 0.0
+    if header[0] != MAGIC or header[1] != VERSION:
+        return 0.0
+    return header[3]
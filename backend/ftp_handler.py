@@ -4,32 +4,41 @@ FTP Handler — Lightweight HTTP-based integration for ftp.ctgfun.com.
 Browses and searches movie folders via HTTP directory listings (Apache index
 pages), then generates direct HTTP links for streaming/downloading.
 
-Uses httpx + BeautifulSoup instead of ftplib — works even when FTP port 21
-is blocked (e.g. on Render free-tier hosting).
+Uses httpx + a streaming autoindex parser instead of ftplib — works even when FTP port 21
+is blocked (e.g. on Render free-tier hosting). All network I/O goes through
+a pooled ``httpx.AsyncClient`` so FTP calls never block the event loop.
 """
 
+import asyncio
 import hashlib
 import logging
 import re
+import time
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple
-from urllib.parse import quote, unquote, urljoin
+from urllib.parse import quote, unquote
 
 import httpx
-from bs4 import BeautifulSoup
+from ftp_catalog import CatalogRow, FTPCatalog
+from ftp_catalog_snapshot import load_snapshot, snapshot_built_at, write_snapshot
+from ftp_listing_cache import DEFAULT_CACHE_DIR, ListingCache
+from ftp_listing_parser import ApacheListingParser, ListingEntry
+from ftp_mirrors import MirrorPool
 
 logger = logging.getLogger(__name__)
 
 # Shared HTTP client (connection pooling, timeouts)
-_http_client: Optional[httpx.Client] = None
+_http_client: Optional[httpx.AsyncClient] = None
 
 
-def _get_client(timeout: int = 10) -> httpx.Client:
-    """Lazy-init a shared httpx client."""
+def _get_client(timeout: int = 10) -> httpx.AsyncClient:
+    """Lazy-init a shared async httpx client."""
     global _http_client
     if _http_client is None or _http_client.is_closed:
-        _http_client = httpx.Client(
+        _http_client = httpx.AsyncClient(
             timeout=timeout,
             follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
             headers={
                 "User-Agent": (
                     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -41,6 +50,16 @@ def _get_client(timeout: int = 10) -> httpx.Client:
     return _http_client
 
 
+# Max folders kept in the playable-links cache
+_LINKS_CACHE_SIZE = 512
+
+
+async def close_client() -> None:
+    """Close the shared client (called from the app lifespan)."""
+    if _http_client and not _http_client.is_closed:
+        await _http_client.aclose()
+
+
 class FTPMovieHandler:
     """Search and browse movies on an FTP server via HTTP directory listings."""
 
@@ -50,10 +69,20 @@ class FTPMovieHandler:
         user: str = "anonymous",
         password: str = "",
         timeout: int = 10,
+        listing_cache_dir: Optional[str] = None,
+        max_fanout: int = 6,
+        links_cache_ttl: int = 6 * 3600,
+        catalog_snapshot: Optional[str] = None,
+        mirrors: Optional[List[str]] = None,
     ):
         self.host = host
         self.timeout = timeout
+        # Max sub-folder listings fetched at once (season folders etc.)
+        self.max_fanout = max(1, max_fanout)
         self.base_url = f"http://{host}"
+        # Hosts serving the same tree; *host* is the primary. Listings go to
+        # the fastest healthy one and returned links are rewritten to it.
+        self.mirrors = MirrorPool([host] + list(mirrors or []))
 
         # Directories to search (order matters — searched first to last)
         self.search_dirs = [
@@ -63,47 +92,58 @@ class FTPMovieHandler:
         ]
 
         # Cache parsed directory listings for the duration of a search
-        self._dir_cache: Dict[str, List[Tuple[str, str, str]]] = {}
+        self._dir_cache: Dict[str, List[ListingEntry]] = {}
+
+        # Long-lived index of the search directories (rebuilt in background).
+        # Starts from the on-disk snapshot, if any, so search works at once.
+        self.catalog_snapshot = catalog_snapshot
+        self.catalog = self._load_snapshot() or FTPCatalog(self.search_dirs)
+
+        # Persistent listings + ETag/Last-Modified for conditional GETs
+        self.listing_cache = ListingCache(listing_cache_dir or DEFAULT_CACHE_DIR)
+
+        # (directory, folder) -> {"mtime", "cached_at", "result"}; an entry is
+        # reused while the catalog reports the same folder mtime. The TTL
+        # bounds staleness when the catalog has no mtime (or a season
+        # sub-folder changed without touching the show folder).
+        self._links_cache: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self.links_cache_ttl = links_cache_ttl
 
     # ------------------------------------------------------------------
     # Public API  (same signatures as the old ftplib version)
     # ------------------------------------------------------------------
 
-    def search(self, query: str, limit: int = 20) -> List[Dict]:
+    async def search(self, query: str, limit: int = 20) -> List[Dict]:
         """
         Search for movies/series in the FTP server via HTTP.
 
-        Returns a list of dicts with clean metadata (no FTP paths exposed).
+        Returns a list of dicts with clean metadata (no FTP paths exposed),
+        best match first.
         """
         query = query.lower().strip()
         if not query:
             return []
 
-        results: List[Dict] = []
+        # Fast path: answer from the in-memory catalog
+        if self.catalog.loaded:
+            return self.catalog.search(query, limit)
 
+        # No catalog yet: rank over a throwaway one built from live listings
+        listings: Dict[str, List[ListingEntry]] = {}
         for directory in self.search_dirs:
             try:
-                items = self._list_directory(directory)
-
-                for name, _date, _size in items:
-                    if self._matches(query, name):
-                        movie = self._parse_folder(name, directory)
-                        if movie:
-                            results.append(movie)
-                        if len(results) >= limit:
-                            break
-
-                if len(results) >= limit:
-                    break
+                listings[directory] = await self._list_directory(directory)
             except Exception as exc:
                 logger.warning("HTTP directory search error in %s: %s", directory, exc)
                 continue
 
         # Clear per-search cache
         self._dir_cache.clear()
-        return results
+        # Indexing tens of thousands of folders takes ~0.5 s: keep it off the loop
+        live = await asyncio.to_thread(FTPCatalog.build, listings, self._parse_row)
+        return live.search(query, limit)
 
-    def get_playable_links(
+    async def get_playable_links(
         self,
         internal_folder: str,
         internal_directory: str,
@@ -113,305 +153,378 @@ class FTPMovieHandler:
 
         Returns direct HTTP links (``http://host/path/file.ext``) that can
         be streamed or downloaded without any intermediate resolution.
+
+        Results are cached per folder and reused until the catalog shows a
+        newer modification time for it.
         """
+        key = (internal_directory, internal_folder.rstrip("/"))
+        row = self._catalog_row(internal_folder, internal_directory)
+        mtime = row.mtime if row else 0
+
+        cached = self._links_cache.get(key)
+        if cached and self._links_fresh(cached, mtime):
+            self._links_cache.move_to_end(key)
+            logger.debug("[FTP] Links cache hit: %s/%s", *key)
+            return self._client_links(cached["result"])
+
         try:
             folder_path = f"{internal_directory}/{internal_folder}"
 
             # Try listing files in the folder directly
-            items = self._list_directory(folder_path)
+            items = await self._list_directory(folder_path)
 
             videos: List[Dict] = []
             subtitles: List[Dict] = []
 
             # Check if items are sub-folders (e.g. season folders)
             # If so, we need to go one level deeper
-            sub_folders = [
-                (name, date, size) for name, date, size in items
-                if name.endswith("/") and name != "../"
-            ]
-
-            if sub_folders and not any(
-                self._is_video(name) for name, _d, _s in items
-            ):
-                # Items are all sub-folders — recurse one level into each
-                for sub_name, _date, _size in sub_folders:
-                    sub_path = f"{folder_path}/{sub_name.rstrip('/')}"
-                    try:
-                        sub_items = self._list_directory(sub_path)
-                        for name, _d, size_str in sub_items:
-                            clean_name = name.rstrip("/")
-                            if self._is_video(clean_name):
-                                quality = self._extract_quality(clean_name)
-                                display = self._clean_filename(clean_name)
-                                url = f"{self.base_url}{sub_path}/{quote(clean_name)}"
-                                size = self._parse_size_str(size_str)
-                                episode = self._extract_episode_info(clean_name)
-                                link_name = f"{episode} — {quality}" if episode else f"{display} — {quality}"
-
-                                videos.append({
-                                    "name": link_name,
-                                    "url": url,
-                                    "quality": quality,
-                                    "size": size,
-                                    "size_label": _format_size(size) if size else size_str,
-                                    "source": "Premium",
-                                    "type": "direct",
-                                    "episode": episode,
-                                })
-                            elif clean_name.lower().endswith(".srt"):
-                                subtitles.append({
-                                    "filename": clean_name,
-                                    "url": f"{self.base_url}{sub_path}/{quote(clean_name)}",
-                                })
-                    except Exception as exc:
-                        logger.debug("Sub-folder listing error %s: %s", sub_path, exc)
-                        continue
+            sub_folders = [entry for entry in items if entry.is_dir]
+
+            if sub_folders and not any(self._is_video(entry.name) for entry in items):
+                # Items are all sub-folders — list them concurrently (bounded),
+                # then merge in listing order so results stay stable
+                listed = await self._list_sub_folders(folder_path, sub_folders)
+                for sub_path, sub_items in listed:
+                    self._collect_files(sub_path, sub_items, videos, subtitles)
             else:
                 # Items are files — process directly
-                for name, _date, size_str in items:
-                    clean_name = name.rstrip("/")
-                    if clean_name == ".." or clean_name == "../":
-                        continue
-
-                    if self._is_video(clean_name):
-                        quality = self._extract_quality(clean_name)
-                        display = self._clean_filename(clean_name)
-                        url = f"{self.base_url}{folder_path}/{quote(clean_name)}"
-                        size = self._parse_size_str(size_str)
-                        episode = self._extract_episode_info(clean_name)
-                        link_name = f"{episode} — {quality}" if episode else f"{display} — {quality}"
-
-                        videos.append({
-                            "name": link_name,
-                            "url": url,
-                            "quality": quality,
-                            "size": size,
-                            "size_label": _format_size(size) if size else size_str,
-                            "source": "Premium",
-                            "type": "direct",
-                            "episode": episode,
-                        })
-                    elif clean_name.lower().endswith(".srt"):
-                        subtitles.append({
-                            "filename": clean_name,
-                            "url": f"{self.base_url}{folder_path}/{quote(clean_name)}",
-                        })
+                self._collect_files(folder_path, items, videos, subtitles)
 
             self._dir_cache.clear()
 
-            return {
+            result = {
                 "success": True,
                 "links": videos,
                 "subtitles": subtitles,
             }
+            if videos:
+                self._remember_links(key, mtime, result)
+            return self._client_links(result)
 
         except Exception as exc:
             logger.error("HTTP get_playable_links error: %s", exc)
             return {"success": False, "links": [], "subtitles": []}
 
-    def browse_latest(self, directory: str = "/English", limit: int = 30) -> List[Dict]:
+    def _catalog_row(self, folder: str, directory: str) -> Optional[CatalogRow]:
+        """Catalog row for *folder* (None if the catalog doesn't know it)."""
+        clean = re.sub(r"\[DDN\]|\(DDN\)", "", folder.rstrip("/")).strip()
+        return self.catalog.get(self._generate_id(clean, directory))
+
+    def _client_links(self, result: Dict) -> Dict:
+        """Copy of a links result with every URL pointing at the best mirror."""
+        result = _copy_links(result)
+        if len(self.mirrors) > 1:
+            mirror = self.mirrors.best()
+            for link in result["links"] + result["subtitles"]:
+                link["url"] = self.mirrors.rewrite(link["url"], mirror)
+        return result
+
+    def _links_fresh(self, cached: Dict, mtime: int) -> bool:
+        if time.time() - cached["cached_at"] > self.links_cache_ttl:
+            return False
+        # Unknown mtime on either side: rely on the TTL alone
+        if not mtime or not cached["mtime"]:
+            return True
+        return mtime <= cached["mtime"]
+
+    def _remember_links(self, key: Tuple[str, str], mtime: int, result: Dict) -> None:
+        self._links_cache[key] = {
+            "mtime": mtime,
+            "cached_at": time.time(),
+            "result": result,
+        }
+        self._links_cache.move_to_end(key)
+        while len(self._links_cache) > _LINKS_CACHE_SIZE:
+            self._links_cache.popitem(last=False)
+
+    async def _list_sub_folders(
+        self, folder_path: str, sub_folders: List[ListingEntry]
+    ) -> List[Tuple[str, List[ListingEntry]]]:
+        """
+        List every sub-folder of *folder_path* with at most ``max_fanout``
+        requests in flight. Returns ``(sub_path, entries)`` in input order;
+        a sub-folder that fails to list contributes no entries.
+        """
+        semaphore = asyncio.Semaphore(self.max_fanout)
+
+        async def list_one(sub: ListingEntry) -> Tuple[str, List[ListingEntry]]:
+            sub_path = f"{folder_path}/{sub.name.rstrip('/')}"
+            async with semaphore:
+                try:
+                    return sub_path, await self._list_directory(sub_path)
+                except Exception as exc:
+                    logger.debug("Sub-folder listing error %s: %s", sub_path, exc)
+                    return sub_path, []
+
+        return await asyncio.gather(*(list_one(sub) for sub in sub_folders))
+
+    def _collect_files(
+        self,
+        path: str,
+        items: List[ListingEntry],
+        videos: List[Dict],
+        subtitles: List[Dict],
+    ) -> None:
+        """Append video + subtitle link dicts for the files listed in *path*."""
+        for entry in items:
+            clean_name = entry.name.rstrip("/")
+            if clean_name == "..":
+                continue
+
+            if self._is_video(clean_name):
+                quality = self._extract_quality(clean_name)
+                display = self._clean_filename(clean_name)
+                episode = self._extract_episode_info(clean_name)
+                link_name = f"{episode} — {quality}" if episode else f"{display} — {quality}"
+
+                videos.append({
+                    "name": link_name,
+                    "url": f"{self.base_url}{path}/{quote(clean_name)}",
+                    "quality": quality,
+                    "size": entry.size,
+                    "size_label": _format_size(entry.size) if entry.size else "-",
+                    "source": "Premium",
+                    "type": "direct",
+                    "episode": episode,
+                })
+            elif clean_name.lower().endswith(".srt"):
+                subtitles.append({
+                    "filename": clean_name,
+                    "url": f"{self.base_url}{path}/{quote(clean_name)}",
+                })
+
+    async def browse_latest(self, directory: str = "/English", limit: int = 30) -> List[Dict]:
         """
         Browse the latest entries in a given directory via HTTP.
 
         Returns a list of parsed movie dicts (most recent first, sorted by
         the modification date from the directory listing).
         """
-        results: List[Dict] = []
+        page = await self.browse_latest_page(directory, limit)
+        return page["movies"]
 
-        try:
-            items = self._list_directory(directory)
+    async def browse_latest_page(
+        self,
+        directory: str = "/English",
+        limit: int = 30,
+        cursor: Optional[str] = None,
+    ) -> Dict:
+        """
+        One page of :meth:`browse_latest`, plus ``next_cursor`` for the
+        page after it (None on the last page).
 
-            # Sort by date descending (most recent first)
-            # Date format from Apache: "DD-Mon-YYYY HH:MM"
-            items_sorted = sorted(items, key=lambda x: x[1], reverse=True)
+        Catalog directories are served from the catalog's newest-first
+        index; any other directory is listed live. Raises ValueError for a
+        malformed *cursor*.
+        """
+        after = _parse_cursor(cursor) if cursor else None
+        rows = self.catalog.latest(directory, limit + 1, after)
 
-            for name, _date, _size in items_sorted:
-                if name == "../" or name == "..":
-                    continue
-                movie = self._parse_folder(name.rstrip("/"), directory)
-                if movie:
-                    results.append(movie)
-                if len(results) >= limit:
-                    break
+        if rows is None:
+            try:
+                items = await self._list_directory(directory)
+                # Parsing + ordering a large listing stays off the event loop
+                rows = await asyncio.to_thread(
+                    FTPCatalog.latest_from_listing,
+                    items, directory, self._parse_row, limit + 1, after,
+                )
+            except Exception as exc:
+                logger.error("HTTP browse error: %s", exc)
+                rows = []
+            finally:
+                self._dir_cache.clear()
+
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit and page:
+            next_cursor = f"{page[-1].mtime}-{page[-1].id}"
+        return {
+            "movies": [row.to_dict() for row in page],
+            "next_cursor": next_cursor,
+        }
+
+    async def refresh_catalog(self, reuse_within: float = 0) -> FTPCatalog:
+        """
+        Re-fetch every search directory and swap in a freshly built catalog.
 
-            self._dir_cache.clear()
+        Directories that fail to list keep their entries from the previous
+        catalog, so a transient error never empties search results.
 
-        except Exception as exc:
-            logger.error("HTTP browse error: %s", exc)
+        With *reuse_within*, a snapshot on disk younger than that many
+        seconds (written by this or another worker) is mapped instead of
+        re-fetching.
+        """
+        if reuse_within and self.catalog_snapshot:
+            built_at = snapshot_built_at(self.catalog_snapshot)
+            if time.time() - built_at < reuse_within:
+                if built_at > self.catalog.built_at:
+                    self.catalog = self._load_snapshot() or self.catalog
+                return self.catalog
+
+        started = time.monotonic()
+        listings: Dict[str, List[ListingEntry]] = {}
+        failed = 0
+        for directory in self.search_dirs:
+            try:
+                listings[directory] = await self._fetch_listing(directory)
+            except Exception as exc:
+                failed += 1
+                logger.warning("[FTP] Catalog refresh failed for %s: %s", directory, exc)
+                listings[directory] = self.catalog.entries(directory)
 
-        return results
+        if failed == len(self.search_dirs):
+            # Nothing new — keep serving the old catalog (or the live path)
+            return self.catalog
 
-    def check_connectivity(self) -> bool:
-        """Quick connectivity check — returns True if the HTTP server is reachable."""
+        self.catalog = await asyncio.to_thread(
+            FTPCatalog.build, listings, self._parse_row
+        )
+        if self.catalog_snapshot:
+            try:
+                await asyncio.to_thread(write_snapshot, self.catalog, self.catalog_snapshot)
+                # Serve from the mapping so workers share the same pages
+                self.catalog = self._load_snapshot() or self.catalog
+            except Exception as exc:
+                logger.error("[FTP] Could not write catalog snapshot: %s", exc)
+        logger.info(
+            "[FTP] Catalog refreshed: %d folders in %.1fs",
+            len(self.catalog), time.monotonic() - started,
+        )
+        return self.catalog
+
+    def _load_snapshot(self) -> Optional[FTPCatalog]:
+        if not self.catalog_snapshot:
+            return None
+        catalog = load_snapshot(self.catalog_snapshot)
+        if catalog is None or catalog.directories != self.search_dirs:
+            return None
+        logger.info(
+            "[FTP] Mapped catalog snapshot: %d folders, %.0fs old",
+            len(catalog), catalog.age,
+        )
+        return catalog
+
+    async def run_catalog_refresh(self, interval: int) -> None:
+        """Background task: rebuild the catalog every *interval* seconds."""
+        while True:
+            try:
+                await self.refresh_catalog(reuse_within=interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("[FTP] Catalog refresh error: %s", exc)
+            await asyncio.sleep(interval)
+
+    async def check_connectivity(self) -> bool:
+        """Quick connectivity check — returns True if any mirror is reachable."""
         try:
-            client = _get_client(timeout=5)
-            resp = client.head(self.base_url, timeout=5)
-            return resp.status_code < 500
+            await self.mirrors.probe(_get_client(timeout=5), timeout=5)
+            return any(m.healthy and m.failures == 0 for m in self.mirrors.mirrors)
         except Exception:
             return False
 
+    async def run_mirror_probe(self, interval: int) -> None:
+        """Background task: re-probe every mirror every *interval* seconds."""
+        while True:
+            try:
+                await self.mirrors.probe(_get_client(timeout=self.timeout), timeout=min(5, self.timeout))
+                logger.debug("[FTP] Mirror ranking: %s", self.mirrors.stats())
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("[FTP] Mirror probe error: %s", exc)
+            await asyncio.sleep(interval)
+
     # ------------------------------------------------------------------
     # HTTP directory listing parser
     # ------------------------------------------------------------------
 
-    def _list_directory(self, directory: str) -> List[Tuple[str, str, str]]:
+    async def _list_directory(self, directory: str) -> List[ListingEntry]:
         """
         Fetch and parse an Apache-style HTML directory listing.
 
-        Returns list of (name, date_string, size_string) tuples.
+        Returns a list of ListingEntry records.
         Uses a per-search cache to avoid re-fetching.
         """
         if directory in self._dir_cache:
             return self._dir_cache[directory]
 
-        url = f"{self.base_url}{directory}/"
-        # Normalize double slashes
-        url = url.replace("//", "/").replace("http:/", "http://")
-
-        client = _get_client(timeout=self.timeout)
-        resp = client.get(url)
-        resp.raise_for_status()
-
-        items = self._parse_apache_listing(resp.text, url)
+        items = await self._fetch_listing(directory)
         self._dir_cache[directory] = items
         return items
 
-    def _parse_apache_listing(
-        self, html: str, base_url: str
-    ) -> List[Tuple[str, str, str]]:
+    async def _fetch_listing(self, directory: str) -> List[ListingEntry]:
         """
-        Parse Apache mod_autoindex HTML.
-
-        Handles both <pre>-based and <table>-based index formats.
-        Returns list of (name, date, size) tuples.
-        """
-        items: List[Tuple[str, str, str]] = []
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Strategy 1: <pre> block with <a> tags (most common for Apache FTP)
-        pre = soup.find("pre")
-        if pre:
-            for a_tag in pre.find_all("a"):
-                # IMPORTANT: Use href to get the full name — Apache truncates
-                # long names in display text (shows "..>" at the end).
-                href = a_tag.get("href", "")
-                if not href or href.startswith("?") or href.startswith("#"):
-                    continue
-                # Decode the href to get the real folder/file name
-                name = unquote(href.split("?")[0])
-                # Strip leading path components — keep only the last segment
-                name = name.rstrip("/").rsplit("/", 1)[-1]
-                if not name:
-                    continue
-                # Re-add trailing slash if original href had it (= directory)
-                if href.endswith("/"):
-                    name += "/"
+        Fetch one directory listing, revalidating against the listing cache.
 
-                if name in ("../", "..", ".", "/"):
-                    continue
+        Sends If-None-Match / If-Modified-Since when we hold validators for
+        *directory* from the same mirror; a 304 reuses the cached entries
+        without re-parsing.
 
-                # The text after the <a> tag contains date + size
-                # Format: "DD-Mon-YYYY HH:MM    SIZE"
-                next_text = a_tag.next_sibling
-                date_str = ""
-                size_str = ""
-                if next_text and isinstance(next_text, str):
-                    parts = next_text.strip().split()
-                    if len(parts) >= 2:
-                        date_str = f"{parts[0]} {parts[1]}"
-                    if len(parts) >= 3:
-                        size_str = parts[2]
-
-                items.append((name, date_str, size_str))
-            return items
+        Tries the mirrors best first and fails over to the next one on a
+        network error or 5xx; each outcome feeds the mirror statistics.
+        """
+        cached = await self.listing_cache.get(directory)
+        client = _get_client(timeout=self.timeout)
 
-        # Strategy 2: <table>-based (some Apache configs)
-        table = soup.find("table")
-        if table:
-            for row in table.find_all("tr"):
-                cells = row.find_all("td")
-                if len(cells) < 3:
-                    continue
-                a_tag = cells[0].find("a")
-                if not a_tag:
-                    continue
-                name = unquote(a_tag.get_text(strip=True))
-                if not name or name in ("Name", "Parent Directory", "../"):
-                    continue
-                date_str = cells[1].get_text(strip=True)
-                size_str = cells[2].get_text(strip=True)
-                items.append((name, date_str, size_str))
-            return items
+        last_error: Optional[Exception] = None
+        for mirror in self.mirrors.ranked():
+            url = f"{mirror.base_url}{directory}/"
+            # Normalize double slashes
+            url = url.replace("//", "/").replace("http:/", "http://")
 
-        # Strategy 3: Just find all <a> tags as fallback
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag["href"]
-            name = unquote(a_tag.get_text(strip=True))
-            if not name or name in ("../", "..", "Parent Directory"):
+            headers = self.listing_cache.validators(cached, mirror.host)
+            started = time.monotonic()
+            try:
+                async with client.stream("GET", url, headers=headers) as resp:
+                    rtt = time.monotonic() - started
+                    if resp.status_code == 304 and headers:
+                        self.mirrors.record(mirror, True, rtt)
+                        logger.debug("[FTP] Listing not modified: %s", directory)
+                        return cached["items"]
+                    if resp.status_code < 500:
+                        # A 4xx is the tree's answer, not the mirror's fault
+                        self.mirrors.record(mirror, True, rtt)
+                    resp.raise_for_status()
+
+                    # Parse while the bytes arrive — no full-page DOM build
+                    parser = ApacheListingParser(f"{directory}/")
+                    items: List[ListingEntry] = []
+                    async for chunk in resp.aiter_text():
+                        items.extend(parser.feed(chunk))
+                    items.extend(parser.close())
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code < 500:
+                    raise
+                self.mirrors.record(mirror, False)
+                last_error = exc
                 continue
-            if href.startswith("?") or href.startswith("#"):
+            except httpx.TransportError as exc:
+                self.mirrors.record(mirror, False)
+                logger.warning("[FTP] Mirror %s failed for %s: %s", mirror.host, directory, exc)
+                last_error = exc
                 continue
-            items.append((name, "", ""))
 
-        return items
+            await self.listing_cache.put(
+                directory,
+                items,
+                etag=resp.headers.get("etag"),
+                last_modified=resp.headers.get("last-modified"),
+                mirror=mirror.host,
+            )
+            return items
+
+        raise last_error or RuntimeError(f"No FTP mirror could list {directory}")
 
     # ------------------------------------------------------------------
     # Internal helpers  (unchanged from original)
     # ------------------------------------------------------------------
 
-    def _matches(self, query: str, folder_name: str) -> bool:
+    def _parse_row(
+        self, folder_name: str, directory: str, mtime: int = 0, size: int = 0
+    ) -> Optional[CatalogRow]:
         """
-        Improved matching: strips year from query, supports partial word
-        matching, and uses a 70 % threshold instead of requiring every word.
-
-        Examples that now work:
-        - "A Knight 2026"  →  "A Knight of the Seven Kingdoms"
-        - "Inception 2010" →  "Inception.2010.1080p.BluRay"
-        - "baby john"      →  "Baby John (2024) Hindi"
-        """
-        query_lower = query.lower()
-        folder_lower = folder_name.lower()
-
-        # Clean special characters for comparison
-        folder_clean = re.sub(r"[._\-\[\]\(\)]", " ", folder_lower)
-        folder_clean = re.sub(r"\[ddn\]|\(ddn\)", "", folder_clean)
-        query_clean = re.sub(r"[._\-\[\]\(\)]", " ", query_lower)
-
-        # Remove year from query (the main fix — FTP folders often lack year)
-        query_no_year = re.sub(r"\b(20\d{2}|19\d{2})\b", "", query_clean).strip()
-        query_no_year = re.sub(r"\s+", " ", query_no_year)
-
-        # MATCH 1: Direct substring
-        if query_lower in folder_lower:
-            return True
-
-        # MATCH 2: Query without year matches folder
-        if query_no_year and query_no_year in folder_clean:
-            logger.info("[FTP] ✅ MATCH (no-year): '%s' → '%s'", query, folder_name)
-            return True
-
-        # MATCH 3: Word-based — at least 70 % of query words must appear
-        query_words = [w for w in query_no_year.split() if len(w) > 2]
-        if not query_words:
-            return query_lower in folder_lower
-
-        folder_words = [w for w in folder_clean.split() if len(w) > 1]
-        hits = sum(
-            1 for qw in query_words
-            if any(qw == fw or qw in fw or (len(fw) > 2 and fw in qw) for fw in folder_words)
-        )
-        pct = hits / len(query_words)
-        if pct >= 0.7:
-            logger.info(
-                "[FTP] ✅ MATCH (%.0f%%): '%s' → '%s'", pct * 100, query, folder_name
-            )
-            return True
-
-        return False
-
-    def _parse_folder(self, folder_name: str, directory: str) -> Optional[Dict]:
-        """
-        Parse a folder name into clean metadata.
+        Parse a folder name into a compact CatalogRow.
 
         Removes [DDN] tags, extracts title/year/quality/language, and
         generates a stable ID from the path.
@@ -441,18 +554,18 @@ class FTPMovieHandler:
 
             content_type = "series" if "/TV_Series" in directory else "movie"
 
-            return {
-                "id": self._generate_id(clean, directory),
-                "title": title,
-                "year": year,
-                "quality": quality,
-                "language": language,
-                "type": content_type,
-                # Internal data — used by get_playable_links(), never shown in app UI
-                "_internal_folder": folder_name,
-                "_internal_directory": directory,
-                "_source": "ftp",
-            }
+            return CatalogRow(
+                id=self._generate_id(clean, directory),
+                name=folder_name,
+                directory=directory,
+                title=title,
+                year=year,
+                quality=quality,
+                language=language,
+                content_type=content_type,
+                mtime=mtime,
+                size=size,
+            )
 
         except Exception as exc:
             logger.debug("Parse error for '%s': %s", folder_name, exc)
@@ -508,39 +621,30 @@ class FTPMovieHandler:
         name = name.replace(".", " ").replace("_", " ")
         return name.strip()
 
-    @staticmethod
-    def _parse_size_str(size_str: str) -> int:
-        """Parse Apache-style size strings like '1.2G', '500M', '250K'."""
-        if not size_str or size_str == "-":
-            return 0
-        try:
-            size_str = size_str.strip().upper()
-            multipliers = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
-            if size_str[-1] in multipliers:
-                return int(float(size_str[:-1]) * multipliers[size_str[-1]])
-            return int(size_str)
-        except (ValueError, IndexError):
-            return 0
-
-    def get_random_movies(self, limit: int = 20) -> list:
+    async def get_random_movies(self, limit: int = 20) -> list:
         """
         Get random movies from FTP server
         Returns list of movies with basic info (title, year, quality, ftp_path)
+
+        Served from the catalog's weighted sampling pool (newer and
+        higher-quality folders first) without any network I/O; falls back
+        to live directory listings until the first catalog build.
         """
         import random
         
-        logger.info(f"[FTP] Getting {limit} random movies...")
+        if self.catalog.loaded:
+            return [
+                self._random_movie(row.name, row.directory)
+                for row in self.catalog.sample(limit)
+            ]
+
+        logger.info(f"[FTP] Getting {limit} random movies (catalog not loaded)...")
         
         all_movies = []
-        categories = [
-            '/English',
-            '/Indian/Hindi Movies',
-            '/TV_Series',
-        ]
         
         try:
-            for category in categories:
-                movies = self._get_movies_from_directory(category, limit=100)
+            for category in self.search_dirs:
+                movies = await self._get_movies_from_directory(category, limit=100)
                 all_movies.extend(movies)
                 
                 if len(all_movies) >= limit * 2:
@@ -558,44 +662,25 @@ class FTPMovieHandler:
             return []
 
 
-    def _get_movies_from_directory(self, directory: str, limit: int = 100) -> list:
+    async def _get_movies_from_directory(self, directory: str, limit: int = 100) -> list:
         """
         Get movies from a specific FTP directory
         """
-        import re
-        
         movies = []
         
         try:
-            # Fetch directory listing via HTTP
-            url = f"{self.base_url}{directory}/"
-            client = _get_client(timeout=self.timeout)
-            response = client.get(url)
-            
-            if response.status_code != 200:
-                logger.warning(f"[FTP] Failed to fetch {directory}: {response.status_code}")
-                return []
+            # Conditionally revalidated listing; bypasses the per-search
+            # _dir_cache, which only the search/browse paths clear
+            items = await self._fetch_listing(directory)
             
-            # Parse HTML to extract folder links
-            folder_pattern = r'<a href="([^"]+)/">([^<]+)</a>'
-            matches = re.findall(folder_pattern, response.text)
+            folders = [entry.name.rstrip("/") for entry in items if entry.is_dir]
             
-            for href, folder_name in matches[:limit]:
+            for folder_name in folders[:limit]:
                 # Skip parent directory
                 if folder_name in ['..', '.']:
                     continue
                 
-                # Parse movie info
-                movie = {
-                    'title': self._clean_movie_name(folder_name),
-                    'year': self._extract_year(folder_name),
-                    'quality': self._extract_quality(folder_name),
-                    'ftp_path': f"{directory}/{folder_name}",
-                    'ftp_url': f"{self.base_url}{directory}/{folder_name}/",
-                    'source': 'ftp',
-                }
-                
-                movies.append(movie)
+                movies.append(self._random_movie(folder_name, directory))
             
             logger.debug(f"[FTP] Found {len(movies)} movies in {directory}")
             return movies
@@ -605,6 +690,18 @@ class FTPMovieHandler:
             return []
 
 
+    def _random_movie(self, folder_name: str, directory: str) -> dict:
+        """Basic movie info for /trending and /featured."""
+        return {
+            'title': self._clean_movie_name(folder_name),
+            'year': self._extract_year(folder_name),
+            'quality': self._extract_quality(folder_name),
+            'ftp_path': f"{directory}/{folder_name}",
+            'ftp_url': f"{self.base_url}{directory}/{quote(folder_name)}/",
+            'source': 'ftp',
+        }
+
+
     def _clean_movie_name(self, filename: str) -> str:
         """Clean movie name for TMDB search"""
         import re
@@ -650,6 +747,23 @@ class FTPMovieHandler:
 # Standalone helpers
 # ------------------------------------------------------------------
 
+def _parse_cursor(cursor: str) -> Tuple[int, str]:
+    """``"<mtime>-<row id>"`` (as returned in ``next_cursor``) → (mtime, id)."""
+    mtime, sep, row_id = cursor.partition("-")
+    if not sep or not row_id or not mtime.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return int(mtime), row_id
+
+
+def _copy_links(result: Dict) -> Dict:
+    """Shallow-copy each link dict so callers can annotate them freely."""
+    return {
+        **result,
+        "links": [dict(link) for link in result["links"]],
+        "subtitles": [dict(sub) for sub in result["subtitles"]],
+    }
+
+
 def _format_size(size_bytes: int) -> str:
     """Convert bytes to a human-readable string."""
     for unit in ("B", "KB", "MB", "GB"):
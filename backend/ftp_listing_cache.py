@@ -0,0 +1,212 @@
+"""
+FTP Listing Cache — persistent store of parsed Apache index pages.
+
+Each directory listing is saved together with the ``ETag`` /
+``Last-Modified`` validators the server sent, so the next fetch can be a
+conditional GET: on ``304 Not Modified`` the parsed entries are reused and
+neither the body nor the parse cost is paid again. Validators are only
+valid against the mirror that issued them (ETags are per server), so each
+entry records that mirror's host.
+
+Entries live in memory (LRU-bounded) and on disk as one JSON file per
+directory, so they survive restarts. Persists to /tmp/ftp_listings/ by
+default. The disk copy is bounded too: files older than ``max_age`` are
+ignored and pruned, and beyond ``max_files`` the least recently written
+ones are removed (every folder opened by ``get_playable_links`` is listed,
+so the directory would otherwise grow without limit).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ftp_listing_parser import ListingEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "/tmp/ftp_listings"
+
+# Bump when the on-disk entry format changes; older files are ignored
+CACHE_VERSION = 2
+
+# Prune the disk copy every this many saves
+_PRUNE_EVERY = 64
+
+
+class ListingCache:
+    """Directory → parsed listing + HTTP validators, on disk and in memory."""
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        max_entries: int = 512,
+        max_files: int = 2048,
+        max_age: float = 7 * 86400,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_files = max_files
+        self.max_age = max_age
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._saves = 0
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.prune()
+        except Exception as e:
+            logger.warning(f"Could not create listing cache dir {cache_dir}: {e}")
+
+    # ── persistence ──────────────────────────────────────────────────────
+
+    def _path(self, directory: str) -> Path:
+        digest = hashlib.md5(directory.encode()).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    def _load(self, directory: str) -> Optional[Dict]:
+        path = self._path(directory)
+        if not path.exists():
+            return None
+        try:
+            entry = json.loads(path.read_text())
+            if entry.get("version") != CACHE_VERSION:
+                return None
+            if time.time() - entry.get("fetched_at", 0) > self.max_age:
+                return None
+            entry["items"] = [ListingEntry(*item) for item in entry.get("items", [])]
+            return entry
+        except Exception as e:
+            logger.warning(f"Could not load listing cache for {directory}: {e}")
+            return None
+
+    def _save(self, directory: str, entry: Dict) -> None:
+        tmp_name = None
+        try:
+            path = self._path(directory)
+            items = [[e.name, e.mtime, e.size] for e in entry["items"]]
+            # Unique temp file: concurrent saves of one directory can't interleave
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.cache_dir, suffix=".tmp", delete=False,
+            ) as tmp:
+                tmp_name = tmp.name
+                json.dump({
+                    **entry,
+                    "version": CACHE_VERSION,
+                    "directory": directory,
+                    "items": items,
+                }, tmp)
+            os.replace(tmp_name, path)
+            tmp_name = None
+        except Exception as e:
+            logger.error(f"Could not save listing cache for {directory}: {e}")
+        finally:
+            if tmp_name:
+                try:
+                    os.remove(tmp_name)
+                except OSError:
+                    pass
+
+        self._saves += 1
+        if self._saves % _PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Drop disk entries older than ``max_age``, then the oldest beyond
+        ``max_files`` (plus temp files left by a crash). Returns files removed.
+        """
+        now = time.time()
+        removed = 0
+        files = []
+        for path in self.cache_dir.iterdir():
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if path.suffix == ".tmp":
+                stale = now - mtime > 3600
+            elif path.suffix == ".json":
+                stale = now - mtime > self.max_age
+                if not stale:
+                    files.append((mtime, path))
+                    continue
+            else:
+                continue
+            if stale and _unlink(path):
+                removed += 1
+
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.max_files)]:
+            if _unlink(path):
+                removed += 1
+        if removed:
+            logger.info(f"Pruned {removed} listing cache files")
+        return removed
+
+    # ── public API ───────────────────────────────────────────────────────
+
+    async def get(self, directory: str) -> Optional[Dict]:
+        """
+        Cached entry for *directory* or None.
+
+        Entry keys: ``items`` (list of ListingEntry), ``etag``,
+        ``last_modified``, ``mirror``, ``fetched_at``.
+        """
+        entry = self._entries.get(directory)
+        if entry is None:
+            entry = await asyncio.to_thread(self._load, directory)
+            if entry is None:
+                return None
+            self._remember(directory, entry)
+        else:
+            self._entries.move_to_end(directory)
+        return entry
+
+    async def put(
+        self,
+        directory: str,
+        items: List[ListingEntry],
+        etag: Optional[str],
+        last_modified: Optional[str],
+        mirror: Optional[str] = None,
+    ) -> None:
+        """Store a freshly downloaded listing and the validators *mirror* sent."""
+        entry = {
+            "items": items,
+            "etag": etag,
+            "last_modified": last_modified,
+            "mirror": mirror,
+            "fetched_at": time.time(),
+        }
+        self._remember(directory, entry)
+        await asyncio.to_thread(self._save, directory, entry)
+
+    def validators(self, entry: Optional[Dict], mirror: Optional[str] = None) -> Dict[str, str]:
+        """Request headers that turn a GET to *mirror* into a conditional GET."""
+        headers: Dict[str, str] = {}
+        if not entry or entry.get("mirror") != mirror:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _remember(self, directory: str, entry: Dict) -> None:
+        self._entries[directory] = entry
+        self._entries.move_to_end(directory)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _unlink(path: Path) -> bool:
+    try:
+        path.unlink()
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,269 @@
+"""
+Apache autoindex parser — single-pass, regex-based and streamable.
+
+Replaces the BeautifulSoup parse of FTP directory listings. The parser is
+fed the response text in chunks while the bytes arrive and emits
+:class:`ListingEntry` records as soon as each entry is complete, so a
+multi-megabyte listing is parsed by the time the download finishes and no
+DOM tree is ever built. Dates and sizes are converted once, here, to an
+epoch mtime and a byte count.
+
+Handles the three layouts the old parser did:
+
+- ``<pre>`` (default ``mod_autoindex``): one ``<a>`` per line, followed by
+  ``DD-Mon-YYYY HH:MM  SIZE``
+- ``<table>`` (``IndexOptions HTMLTable``): one ``<tr>`` per entry with the
+  date and size in the cells after the link cell
+- anything else: every ``<a href>`` on the page, without date/size
+
+Names always come from the ``href`` (decoded), never from the link text —
+Apache truncates long names in the text (``"..>"``). The "Parent Directory"
+row is skipped in every layout: by its link text, by a ``../`` href, and —
+when the listed *path* is given — by any href resolving to an ancestor of
+it (Apache links the parent as ``/Indian/``, not ``../``).
+
+See ``benchmarks/bench_listing_parser.py`` for a comparison with the old
+BeautifulSoup implementation.
+"""
+
+import calendar
+import html
+import re
+from typing import List, Optional, Tuple
+from urllib.parse import unquote, urljoin, urlsplit
+
+# Layout markers — whichever appears first decides the mode
+_LAYOUT_RE = re.compile(r"<(pre|table)\b", re.I)
+_PRE_END_RE = re.compile(r"</pre\s*>", re.I)
+_TABLE_END_RE = re.compile(r"</table\s*>", re.I)
+_ROW_END_RE = re.compile(r"</tr\s*>", re.I)
+
+# <a ... href="X" ...>text</a>trailing-text-up-to-next-tag
+_ANCHOR_RE = re.compile(
+    r"""<a\s[^>]*?href\s*=\s*(?:"([^"]*)"|'([^']*)')[^>]*>(.*?)</a\s*>([^<]*)""",
+    re.I | re.S,
+)
+_CELL_RE = re.compile(r"<td\b[^>]*>(.*?)</td\s*>", re.I | re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+_SKIP_NAMES = {"../", "..", ".", "/", "Parent Directory"}
+
+_MONTHS = {
+    m: i for i, m in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun",
+         "jul", "aug", "sep", "oct", "nov", "dec"), start=1,
+    )
+}
+_SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+class ListingEntry:
+    """One directory listing row: name (``/``-suffixed for dirs), mtime, size."""
+
+    __slots__ = ("name", "mtime", "size")
+
+    def __init__(self, name: str, mtime: int = 0, size: int = 0):
+        self.name = name
+        self.mtime = mtime  # epoch seconds (server-local time read as UTC), 0 = unknown
+        self.size = size    # bytes, 0 = unknown / directory
+
+    @property
+    def is_dir(self) -> bool:
+        return self.name.endswith("/")
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, ListingEntry)
+            and (self.name, self.mtime, self.size) == (other.name, other.mtime, other.size)
+        )
+
+    def __repr__(self) -> str:
+        return f"ListingEntry({self.name!r}, {self.mtime}, {self.size})"
+
+
+def parse_mtime(date_str: str) -> int:
+    """``"12-Mar-2021 10:00"`` or ``"2021-03-12 10:00"`` → epoch seconds (0 if unparsable)."""
+    if not date_str:
+        return 0
+    try:
+        date_part, _, time_part = date_str.strip().partition(" ")
+        first, second, third = date_part.split("-")
+        if second.isdigit():
+            year, month, day = int(first), int(second), int(third)
+        else:
+            day, month, year = int(first), _MONTHS[second[:3].lower()], int(third)
+        hour, minute = 0, 0
+        if time_part:
+            hour, minute = (int(x) for x in time_part.strip().split(":")[:2])
+        return calendar.timegm((year, month, day, hour, minute, 0))
+    except (ValueError, KeyError):
+        return 0
+
+
+def parse_size(size_str: str) -> int:
+    """Parse Apache-style size strings like '1.2G', '500M', '250K'."""
+    if not size_str or size_str == "-":
+        return 0
+    try:
+        size_str = size_str.strip().upper()
+        if size_str[-1] in _SIZE_UNITS:
+            return int(float(size_str[:-1]) * _SIZE_UNITS[size_str[-1]])
+        return int(size_str)
+    except (ValueError, IndexError):
+        return 0
+
+
+def _name_from_href(href: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Decoded last path segment of *href* (``/`` kept for directories), or
+    None for query/fragment links and links up to *base*'s ancestors.
+    """
+    href = html.unescape(href)
+    if not href or href.startswith("?") or href.startswith("#"):
+        return None
+    if href.startswith("../") or href == "..":
+        return None
+    if base and _is_ancestor(urljoin(base, href), base):
+        return None
+    name = unquote(href.split("?")[0])
+    name = name.rstrip("/").rsplit("/", 1)[-1]
+    if not name:
+        return None
+    if href.endswith("/"):
+        name += "/"
+    if name in _SKIP_NAMES:
+        return None
+    return name
+
+
+def _is_ancestor(url: str, base: str) -> bool:
+    """True if *url*'s path is *base*'s own path or one above it."""
+    path = unquote(urlsplit(url).path).rstrip("/") + "/"
+    base_path = unquote(urlsplit(base).path).rstrip("/") + "/"
+    return base_path.startswith(path)
+
+
+def _is_parent_link(m: "re.Match") -> bool:
+    return _cell_text(m.group(3)).lower() == "parent directory"
+
+
+def _date_size(trailing: str) -> Tuple[int, int]:
+    """``"  12-Mar-2021 10:00    1.2G  "`` → (mtime, size)."""
+    parts = trailing.split()
+    mtime = parse_mtime(f"{parts[0]} {parts[1]}") if len(parts) >= 2 else 0
+    size = parse_size(parts[2]) if len(parts) >= 3 else 0
+    return mtime, size
+
+
+def _cell_text(cell: str) -> str:
+    return html.unescape(_TAG_RE.sub("", cell)).strip()
+
+
+class ApacheListingParser:
+    """
+    Incremental parser: call :meth:`feed` with each text chunk, then
+    :meth:`close`. Both return the entries completed by that call.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        # Listed directory (``/Indian/Movies/``), used to spot parent links
+        self._base = f"/{path.strip('/')}/".replace("//", "/") if path else None
+        self._buf = ""
+        self._mode = "detect"  # detect | pre | table | done
+
+    def feed(self, chunk: str) -> List[ListingEntry]:
+        if self._mode == "done" or not chunk:
+            return []
+        self._buf += chunk
+        return self._drain(final=False)
+
+    def close(self) -> List[ListingEntry]:
+        if self._mode == "done":
+            return []
+        entries = self._drain(final=True)
+        if self._mode == "detect":
+            # No <pre> or <table> anywhere: take every anchor on the page
+            entries = list(self._anchors(self._buf, with_dates=False))
+        self._buf = ""
+        self._mode = "done"
+        return entries
+
+    # ------------------------------------------------------------------
+
+    def _drain(self, final: bool) -> List[ListingEntry]:
+        if self._mode == "detect":
+            m = _LAYOUT_RE.search(self._buf)
+            if not m:
+                return []  # keep buffering (bare-anchor layout needs it all)
+            self._mode = m.group(1).lower()
+            self._buf = self._buf[m.end():]
+
+        if self._mode == "pre":
+            return self._drain_pre(final)
+        if self._mode == "table":
+            return self._drain_table(final)
+        return []
+
+    def _drain_pre(self, final: bool) -> List[ListingEntry]:
+        end = _PRE_END_RE.search(self._buf)
+        if end:
+            block, self._buf, self._mode = self._buf[:end.start()], "", "done"
+        elif final:
+            block, self._buf = self._buf, ""
+        else:
+            # Only parse complete lines; the tail may hold a split anchor
+            cut = self._buf.rfind("\n")
+            if cut < 0:
+                return []
+            block, self._buf = self._buf[:cut + 1], self._buf[cut + 1:]
+        return list(self._anchors(block, with_dates=True))
+
+    def _drain_table(self, final: bool) -> List[ListingEntry]:
+        end = _TABLE_END_RE.search(self._buf)
+        if end:
+            block, self._buf, self._mode = self._buf[:end.start()], "", "done"
+        elif final:
+            block, self._buf = self._buf, ""
+        else:
+            last = None
+            for last in _ROW_END_RE.finditer(self._buf):
+                pass
+            if last is None:
+                return []
+            block, self._buf = self._buf[:last.end()], self._buf[last.end():]
+
+        entries: List[ListingEntry] = []
+        for row in _ROW_END_RE.split(block):
+            cells = _CELL_RE.findall(row)
+            for i, cell in enumerate(cells):
+                m = _ANCHOR_RE.search(cell)
+                if not m:
+                    continue
+                name = self._name(m)
+                if name:
+                    date_str = _cell_text(cells[i + 1]) if i + 1 < len(cells) else ""
+                    size_str = _cell_text(cells[i + 2]) if i + 2 < len(cells) else ""
+                    entries.append(ListingEntry(name, parse_mtime(date_str), parse_size(size_str)))
+                break
+        return entries
+
+    def _name(self, m: "re.Match") -> Optional[str]:
+        if _is_parent_link(m):
+            return None
+        return _name_from_href(m.group(1) if m.group(1) is not None else m.group(2), self._base)
+
+    def _anchors(self, block: str, with_dates: bool):
+        for m in _ANCHOR_RE.finditer(block):
+            name = self._name(m)
+            if not name:
+                continue
+            if with_dates:
+                yield ListingEntry(name, *_date_size(m.group(4)))
+            else:
+                yield ListingEntry(name)
+
+
+def parse_listing(text: str, path: Optional[str] = None) -> List[ListingEntry]:
+    """Parse a complete listing page of directory *path* in one call."""
+    parser = ApacheListingParser(path)
+    return parser.feed(text) + parser.close()
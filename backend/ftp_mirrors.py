@@ -0,0 +1,142 @@
+"""
+FTP Mirrors — latency-aware selection between hosts serving the same tree.
+
+Each mirror keeps an EWMA of its round-trip time and of its error rate, fed
+both by a background prober (``HEAD /`` every ``FTP_MIRROR_PROBE_INTERVAL``
+seconds, 60 by default) and by the real listing fetches. Listing fetches go to the best-scoring healthy mirror and
+fail over down the ranking; generated video/subtitle URLs are rewritten to
+the current best mirror before they are returned to clients.
+
+A mirror that fails repeatedly is benched for an exponentially growing
+period (capped), so a dead host costs one timeout, not one per request.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# EWMA smoothing factor (weight of the newest sample)
+EWMA_ALPHA = 0.3
+# RTT assumed for a mirror that has never answered (seconds)
+UNKNOWN_RTT = 1.0
+# Error rate multiplies the RTT: score = rtt * (1 + ERROR_PENALTY * error_rate)
+ERROR_PENALTY = 4.0
+# Consecutive failures before a mirror is benched, and the bench schedule
+FAILURES_BEFORE_BENCH = 2
+BENCH_BASE = 15
+BENCH_MAX = 300
+
+
+class Mirror:
+    """Health statistics for one mirror host."""
+
+    __slots__ = ("host", "base_url", "rtt", "error_rate", "failures", "benched_until", "last_probe")
+
+    def __init__(self, host: str):
+        self.host = host
+        self.base_url = f"http://{host}"
+        self.rtt: Optional[float] = None    # EWMA seconds, None = never measured
+        self.error_rate = 0.0               # EWMA of 0 (ok) / 1 (error)
+        self.failures = 0                   # consecutive
+        self.benched_until = 0.0
+        self.last_probe = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.time() >= self.benched_until
+
+    @property
+    def score(self) -> float:
+        """Lower is better."""
+        rtt = self.rtt if self.rtt is not None else UNKNOWN_RTT
+        return rtt * (1 + ERROR_PENALTY * self.error_rate)
+
+    def to_dict(self) -> Dict:
+        return {
+            "host": self.host,
+            "rtt_ms": round(self.rtt * 1000, 1) if self.rtt is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "healthy": self.healthy,
+            "score": round(self.score, 4),
+        }
+
+
+class MirrorPool:
+    """Ranks mirrors by RTT and error rate; the first host is the primary."""
+
+    def __init__(self, hosts: List[str]):
+        seen: Dict[str, None] = {}
+        for host in hosts:
+            host = host.strip().rstrip("/")
+            if host:
+                seen.setdefault(host)
+        if not seen:
+            raise ValueError("MirrorPool needs at least one host")
+        self.mirrors = [Mirror(host) for host in seen]
+        self.primary = self.mirrors[0]
+
+    def __len__(self) -> int:
+        return len(self.mirrors)
+
+    def ranked(self) -> List[Mirror]:
+        """Healthy mirrors best first, then benched ones (soonest back first)."""
+        healthy = [m for m in self.mirrors if m.healthy]
+        benched = [m for m in self.mirrors if not m.healthy]
+        # sorted() is stable: equal scores keep configuration order
+        return (
+            sorted(healthy, key=lambda m: m.score)
+            + sorted(benched, key=lambda m: m.benched_until)
+        )
+
+    def best(self) -> Mirror:
+        return self.ranked()[0]
+
+    def record(self, mirror: Mirror, ok: bool, rtt: Optional[float] = None) -> None:
+        """Feed one request outcome (and its RTT, if it succeeded) into the stats."""
+        mirror.error_rate += EWMA_ALPHA * ((0.0 if ok else 1.0) - mirror.error_rate)
+        if ok:
+            mirror.failures = 0
+            mirror.benched_until = 0.0
+            if rtt is not None:
+                mirror.rtt = rtt if mirror.rtt is None else mirror.rtt + EWMA_ALPHA * (rtt - mirror.rtt)
+            return
+
+        mirror.failures += 1
+        if mirror.failures >= FAILURES_BEFORE_BENCH:
+            bench = min(BENCH_MAX, BENCH_BASE * 2 ** (mirror.failures - FAILURES_BEFORE_BENCH))
+            mirror.benched_until = time.time() + bench
+            logger.warning(
+                "[FTP] Mirror %s benched for %ds after %d failures",
+                mirror.host, bench, mirror.failures,
+            )
+
+    def rewrite(self, url: str, mirror: Optional[Mirror] = None) -> str:
+        """Point *url* (on any mirror) at *mirror* (default: the best one)."""
+        target = mirror or self.best()
+        for m in self.mirrors:
+            if m is not target and url.startswith(m.base_url + "/"):
+                return target.base_url + url[len(m.base_url):]
+        return url
+
+    async def probe(self, client: httpx.AsyncClient, timeout: float = 5) -> None:
+        """HEAD every mirror once, concurrently, and record the results."""
+        await asyncio.gather(*(self._probe_one(client, m, timeout) for m in self.mirrors))
+
+    async def _probe_one(self, client: httpx.AsyncClient, mirror: Mirror, timeout: float) -> None:
+        started = time.monotonic()
+        try:
+            resp = await client.head(mirror.base_url + "/", timeout=timeout)
+            ok = resp.status_code < 500
+        except Exception as exc:
+            logger.debug("[FTP] Probe %s failed: %s", mirror.host, exc)
+            ok = False
+        mirror.last_probe = time.time()
+        self.record(mirror, ok, time.monotonic() - started if ok else None)
+
+    def stats(self) -> List[Dict]:
+        return [m.to_dict() for m in self.ranked()]
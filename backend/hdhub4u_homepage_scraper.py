@@ -1,19 +1,17 @@
 import asyncio
 import re
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 import logging
 import httpx
 
 from homepage_state import homepage_state
+from image_cache import tmdb_image_url
+from rate_limiter import PRIORITY_BACKGROUND
+from tmdb_service import tmdb_service
 
 logger = logging.getLogger(__name__)
 
-# TMDB Configuration
-TMDB_API_KEY = "7efd8424c17ff5b3e8dc9cebf4a33f73"
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
-
 # Patterns to filter out non-movie items (e.g. pages, categories)
 SKIP_PATTERNS = re.compile(
     r'(genre|category|contact|about|dmca|disclaimer|privacy|terms|faq|page/\d)',
@@ -32,11 +30,26 @@ class HDHub4uScraper:
 
     Primary strategy: lightweight httpx fetch (no browser needed).
     Fallback: Playwright via shared browser instance (if httpx fails).
+
+    TMDB matching runs at most ``tmdb_concurrency`` lookups at a time, in
+    page order. Movies not matched by ``tmdb_deadline`` seconds are left
+    out of the response and the sync state is not moved past them, so the
+    next (incremental) sync returns them; their lookups finish in the
+    background so that sync finds them cached.
     """
 
-    def __init__(self, scraper_instance):
+    def __init__(
+        self,
+        scraper_instance,
+        tmdb_concurrency: int = 8,
+        tmdb_deadline: Optional[float] = None,
+    ):
         self.homepage_url = "https://new3.hdhub4u.fo"
         self._scraper = scraper_instance  # shared MovieScraper (for fallback)
+        self.tmdb_concurrency = max(1, tmdb_concurrency)
+        self.tmdb_deadline = tmdb_deadline
+        # Lookups that outlived their sync's deadline
+        self._background: Set[asyncio.Task] = set()
 
     async def scrape_homepage(
         self, max_movies: int = 50, incremental: bool = False
@@ -67,13 +80,15 @@ class HDHub4uScraper:
             logger.info("httpx returned 0 movies, trying Playwright fallback")
             movies = await self._scrape_with_playwright(max_movies)
 
-        # Save state: first movie = newest
-        if movies:
-            first = movies[0]
+        # Save state: newest movie, but never past one that missed the
+        # TMDB deadline — it has to come back in the next incremental sync
+        checkpoint = self._checkpoint(movies)
+        movies = [m for m in movies if not m.get('pending')]
+        if checkpoint:
             homepage_state.update(
                 source='hdhub4u',
-                url=first.get('hdhub4u_url', ''),
-                title=first.get('title', ''),
+                url=checkpoint.get('hdhub4u_url', ''),
+                title=checkpoint.get('title', ''),
                 total=len(movies),
             )
 
@@ -85,6 +100,20 @@ class HDHub4uScraper:
             'movies': movies,
         }
 
+    @staticmethod
+    def _checkpoint(movies: List[Dict]) -> Optional[Dict]:
+        """
+        Newest movie the sync state may advance to: the first one, or if
+        some entries are still ``pending`` (missed the TMDB deadline), the
+        first matched movie below the last pending one. None = keep state.
+        """
+        last_pending = max(
+            (i for i, m in enumerate(movies) if m.get('pending')), default=-1,
+        )
+        return next(
+            (m for m in movies[last_pending + 1:] if not m.get('pending')), None,
+        )
+
     async def _scrape_with_httpx(
         self, max_movies: int, stop_at_url: Optional[str] = None
     ) -> List[Dict]:
@@ -231,36 +260,71 @@ class HDHub4uScraper:
                     break
 
         # --- Enrich with TMDB data ---
-        enriched = []
-        for entry in movies:
-            clean_title = entry.get('clean_title')
-            year = entry.get('year')
-            url = entry.get('url')
-            raw_title = entry.get('raw_title', clean_title)
+        return await self._enrich(movies)
 
-            if not clean_title:
-                continue
+    async def _enrich(self, movies: List[Dict]) -> List[Dict]:
+        """
+        Match *movies* on TMDB concurrently; matched ones, in page order.
+        Entries still being matched at the deadline are kept as
+        ``{'hdhub4u_url', 'hdhub4u_title', 'pending': True}`` placeholders
+        (dropped by :meth:`scrape_homepage` after it saved the state).
+        """
+        entries = [m for m in movies if m.get('clean_title')]
+        if not entries:
+            return []
 
-            tmdb_data = await self._get_tmdb_data(clean_title, year)
+        semaphore = asyncio.Semaphore(self.tmdb_concurrency)
 
-            if tmdb_data:
+        async def lookup(entry: Dict) -> Optional[Dict]:
+            async with semaphore:
+                return await self._get_tmdb_data(
+                    entry['clean_title'], entry.get('year'),
+                    release_name=entry.get('raw_title', entry['clean_title']),
+                )
+
+        tasks = [asyncio.ensure_future(lookup(e)) for e in entries]
+        done, pending = await asyncio.wait(tasks, timeout=self.tmdb_deadline)
+        if pending:
+            logger.info(
+                f"[HDHub4u] TMDB deadline of {self.tmdb_deadline}s passed: "
+                f"{len(pending)}/{len(tasks)} movies left out"
+            )
+            for task in pending:
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+
+        enriched = []
+        for entry, task in zip(entries, tasks):
+            if task not in done:
                 enriched.append({
-                    'hdhub4u_url': url,
-                    'hdhub4u_title': raw_title,
-                    'tmdb_id': tmdb_data['id'],
-                    'title': tmdb_data['title'],
-                    'poster_url': tmdb_data['poster_url'],
-                    'backdrop_url': tmdb_data['backdrop_url'],
-                    'rating': tmdb_data['rating'],
-                    'overview': tmdb_data['overview'],
-                    'release_date': tmdb_data['release_date'],
-                    'year': year,
+                    'hdhub4u_url': entry.get('url'),
+                    'hdhub4u_title': entry.get('raw_title', entry['clean_title']),
+                    'pending': True,
                 })
+                continue
+            if task.exception() is not None:
+                continue
+            tmdb_data = task.result()
+            if not tmdb_data:
+                continue
 
-                logger.info(
-                    f"Matched: {tmdb_data['title']} "
-                    f"(TMDB ID: {tmdb_data['id']})"
-                )
+            enriched.append({
+                'hdhub4u_url': entry.get('url'),
+                'hdhub4u_title': entry.get('raw_title', entry['clean_title']),
+                'tmdb_id': tmdb_data['id'],
+                'title': tmdb_data['title'],
+                'poster_url': tmdb_data['poster_url'],
+                'backdrop_url': tmdb_data['backdrop_url'],
+                'rating': tmdb_data['rating'],
+                'overview': tmdb_data['overview'],
+                'release_date': tmdb_data['release_date'],
+                'year': entry.get('year'),
+            })
+
+            logger.info(
+                f"Matched: {tmdb_data['title']} "
+                f"(TMDB ID: {tmdb_data['id']})"
+            )
 
         return enriched
 
@@ -343,55 +407,27 @@ class HDHub4uScraper:
         return title, year
 
     async def _get_tmdb_data(
-        self, title: str, year: Optional[str] = None
+        self, title: str, year: Optional[str] = None,
+        release_name: Optional[str] = None,
     ) -> Optional[Dict]:
-        """Get TMDB data for a movie using httpx."""
+        """Get TMDB data for a movie via the shared TMDB client (release map first)."""
         try:
-            search_url = f"{TMDB_BASE_URL}/search/movie"
-            params = {
-                'api_key': TMDB_API_KEY,
-                'query': title,
-                'include_adult': 'false',
-            }
-
-            if year:
-                params['year'] = year
-
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(search_url, params=params)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    results = data.get('results', [])
-
-                    if not results and year:
-                        params.pop('year')
-                        response = await client.get(search_url, params=params)
-                        data = response.json()
-                        results = data.get('results', [])
-
-                    if results:
-                        movie = results[0]
-                        return {
-                            'id': movie['id'],
-                            'title': movie['title'],
-                            'poster_url': (
-                                f"{TMDB_IMAGE_BASE}{movie['poster_path']}"
-                                if movie.get('poster_path')
-                                else None
-                            ),
-                            'backdrop_url': (
-                                f"https://image.tmdb.org/t/p/original"
-                                f"{movie['backdrop_path']}"
-                                if movie.get('backdrop_path')
-                                else None
-                            ),
-                            'rating': round(
-                                movie.get('vote_average', 0), 1
-                            ),
-                            'overview': movie.get('overview', ''),
-                            'release_date': movie.get('release_date', ''),
-                        }
+            # Homepage sync runs in the background: yield to user requests
+            movie = await tmdb_service.match_release(
+                release_name or title, title, year, priority=PRIORITY_BACKGROUND,
+            )
+            if movie:
+                return {
+                    'id': movie['id'],
+                    'title': movie['title'],
+                    'poster_url': tmdb_image_url(movie.get('poster_path'), 'w500'),
+                    'backdrop_url': tmdb_image_url(movie.get('backdrop_path'), 'original'),
+                    'rating': round(
+                        movie.get('vote_average', 0), 1
+                    ),
+                    'overview': movie.get('overview', ''),
+                    'release_date': movie.get('release_date', ''),
+                }
 
             return None
 
@@ -0,0 +1,189 @@
+"""
+Image Cache — caching proxy for TMDB posters and backdrops.
+
+``GET /image/{size}/{file}`` (see ``main.py``) serves TMDB art through a
+disk cache: each ``(size, file)`` variant is fetched from image.tmdb.org
+once, written under ``cache_dir`` and evicted least-recently-used when the
+directory grows past ``max_bytes``. The client picks the variant through
+the size segment (``w185`` for list thumbnails, ``w780`` for a details
+header...), so phones don't download ``original`` backdrops.
+
+TMDB image paths are content-addressed — a changed image gets a new path —
+so responses are marked immutable and carry an ETag derived from the key.
+
+:func:`tmdb_image_url` builds the image URLs emitted by the API: proxy URLs
+when ``IMAGE_PROXY_BASE`` is configured, direct TMDB URLs otherwise.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import httpx
+
+from config.sources import MovieSources
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+TMDB_IMAGE_ORIGIN = "https://image.tmdb.org/t/p"
+
+# Sizes TMDB serves for posters and backdrops
+SIZES = {"w92", "w154", "w185", "w300", "w342", "w500", "w780", "w1280", "original"}
+
+_FILE_RE = re.compile(r"^[A-Za-z0-9_-]+\.(jpg|jpeg|png|webp|svg)$")
+# One entity tag in an If-None-Match list: optional weak prefix, quoted value
+_ENTITY_TAG_RE = re.compile(r'\s*(?:W/)?("[^"]*")\s*(?:,|$)')
+
+_CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "svg": "image/svg+xml",
+}
+
+
+def tmdb_image_url(path: Optional[str], size: str = "w500") -> Optional[str]:
+    """URL for TMDB image *path* (``/abc.jpg``) at *size*, or None without a path."""
+    if not path:
+        return None
+    base = MovieSources.IMAGE_PROXY_BASE.rstrip("/") or TMDB_IMAGE_ORIGIN
+    return f"{base}/{size}/{path.lstrip('/')}"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    True if the ``If-None-Match`` header value lists *etag*. Uses the weak
+    comparison RFC 9110 prescribes for this header (``W/"x"`` matches
+    ``"x"``); ``*`` matches any tag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(m.group(1) == etag for m in _ENTITY_TAG_RE.finditer(if_none_match))
+
+
+class ImageCache:
+    """Disk LRU of TMDB image variants with a byte cap."""
+
+    def __init__(self, cache_dir: str, max_bytes: int, timeout: float = 15.0):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        # file name -> size in bytes, least recently used first
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._flights = SingleFlight()
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from file mtimes (touched on every hit)."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entries = [
+                e for e in os.scandir(self.cache_dir)
+                if e.is_file() and not e.name.endswith(".tmp")
+            ]
+        except OSError as e:
+            logger.error(f"[Images] Cache dir unavailable: {e}")
+            return
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            size = entry.stat().st_size
+            self._files[entry.name] = size
+            self.total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def valid(size: str, file: str) -> bool:
+        return size in SIZES and bool(_FILE_RE.match(file))
+
+    @staticmethod
+    def etag(size: str, file: str) -> str:
+        return '"' + hashlib.sha1(f"{size}/{file}".encode()).hexdigest()[:16] + '"'
+
+    @staticmethod
+    def content_type(file: str) -> str:
+        return _CONTENT_TYPES[file.rsplit(".", 1)[-1].lower()]
+
+    async def get(self, size: str, file: str) -> Optional[str]:
+        """
+        Local path of the *size* variant of *file*, fetching it on a miss.
+        None if TMDB has no such image; raises ``httpx.HTTPError`` on
+        upstream failures.
+        """
+        name = f"{size}_{file}"
+        local = os.path.join(self.cache_dir, name)
+        if name in self._files and os.path.exists(local):
+            self._files.move_to_end(name)
+            try:
+                os.utime(local)
+            except OSError:
+                pass
+            return local
+        return await self._flights.do(name, lambda: self._fetch(size, file, name, local))
+
+    async def _fetch(self, size: str, file: str, name: str, local: str) -> Optional[str]:
+        resp = await self._get_client().get(f"{TMDB_IMAGE_ORIGIN}/{size}/{file}")
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        data = resp.content
+
+        tmp = f"{local}.tmp"
+        try:
+            await asyncio.to_thread(_write_file, tmp, local, data)
+        except OSError as e:
+            logger.error(f"[Images] Could not cache {name}: {e}")
+            return None
+        if name in self._files:
+            self.total_bytes -= self._files[name]
+        self._files[name] = len(data)
+        self.total_bytes += len(data)
+        self._evict(keep=name)
+        return local
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        while self.total_bytes > self.max_bytes and self._files:
+            name, size = next(iter(self._files.items()))
+            if name == keep:
+                break
+            del self._files[name]
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the upstream client (called from the app lifespan)."""
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            "files": len(self._files),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def _write_file(tmp: str, path: str, data: bytes) -> None:
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
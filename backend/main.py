@@ -5,24 +5,27 @@ import logging
 import mimetypes
 from pathlib import Path as FilePath
 from fastapi import FastAPI, HTTPException, Query, Path, Request
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional, List
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from scraper import scraper_instance, tmdb_helper, DOMAINS
 from hdhub4u_homepage_scraper import HDHub4uScraper
 from hubdrive_resolver import DownloadLinkResolver
 from homepage_state import homepage_state
 from embed_link_extractor import EmbedLinkExtractor
 from multi_source_manager import MultiSourceManager
-from ftp_handler import FTPMovieHandler
+from ftp_handler import FTPMovieHandler, close_client as close_ftp_client
 from config.sources import MovieSources
 from bs4 import BeautifulSoup
 from admin_db import admin_db
 from admin_api import router as admin_router, ensure_default_admin
+from image_cache import ImageCache, etag_matches
 from tmdb_enricher import TMDBEnricher
+from tmdb_service import tmdb_service
 
 # Configure logging
 logging.basicConfig(
@@ -35,7 +38,11 @@ logger = logging.getLogger(__name__)
 # --- Lifespan ---
 
 # HDHub4u homepage scraper (shares browser with scraper_instance)
-hdhub4u_scraper = HDHub4uScraper(scraper_instance)
+hdhub4u_scraper = HDHub4uScraper(
+    scraper_instance,
+    tmdb_concurrency=MovieSources.HDHUB4U_TMDB_CONCURRENCY,
+    tmdb_deadline=MovieSources.HDHUB4U_TMDB_DEADLINE or None,
+)
 
 # Download link resolver (shares browser with scraper_instance)
 download_resolver = DownloadLinkResolver(max_concurrent=2)
@@ -50,15 +57,26 @@ multi_source = MultiSourceManager()
 ftp_handler = FTPMovieHandler(
     host=MovieSources.FTP_HOST,
     timeout=MovieSources.FTP_TIMEOUT,
+    listing_cache_dir=MovieSources.FTP_LISTING_CACHE_DIR,
+    max_fanout=MovieSources.FTP_MAX_FANOUT,
+    links_cache_ttl=MovieSources.FTP_LINKS_CACHE_TTL,
+    catalog_snapshot=MovieSources.FTP_CATALOG_SNAPSHOT,
+    mirrors=MovieSources.FTP_MIRRORS,
 ) if MovieSources.FTP_ENABLED else None
 
 # TMDB Enricher
-TMDB_API_KEY = "7efd8424c17ff5b3e8dc9cebf4a33f73"
-tmdb_enricher = TMDBEnricher(TMDB_API_KEY)
+tmdb_enricher = TMDBEnricher()
+_ENRICH_BUDGET = MovieSources.TMDB_ENRICH_BUDGET or None
+
+# Disk-cached TMDB art for /image/{size}/{file}
+image_cache = ImageCache(MovieSources.IMAGE_CACHE_DIR, MovieSources.IMAGE_CACHE_MAX_BYTES)
 
 
 _browser_ready = False
 _startup_task = None
+_ftp_catalog_task = None
+_ftp_mirror_task = None
+_tmdb_index_task = None
 
 
 async def _deferred_browser_init():
@@ -71,7 +89,8 @@ async def _deferred_browser_init():
         multi_source.init_scrapers(
             scraper_instance.browser,
             hdhub4u_scraper=scraper_instance,
-            download_resolver=download_resolver
+            download_resolver=download_resolver,
+            ftp_handler=ftp_handler,
         )
         _browser_ready = True
         logger.info("Background: browser + scrapers fully initialized")
@@ -82,7 +101,7 @@ async def _deferred_browser_init():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan: start server fast, defer browser init to background."""
-    global _startup_task
+    global _startup_task, _ftp_catalog_task, _ftp_mirror_task, _tmdb_index_task
     logger.info("Starting up application...")
     try:
         # Lightweight init first (admin DB) — fast, no blocking
@@ -90,16 +109,43 @@ async def lifespan(app: FastAPI):
         await ensure_default_admin()
         logger.info("Admin panel database initialized")
 
+        # Link cache tables, so cached /links work before the browser is up
+        await scraper_instance.cache.init_db()
+
         # Defer heavy Playwright browser init to background
         _startup_task = asyncio.create_task(_deferred_browser_init())
 
+        # Keep the FTP catalog warm so searches never hit the live listings
+        if ftp_handler:
+            _ftp_catalog_task = asyncio.create_task(
+                ftp_handler.run_catalog_refresh(MovieSources.FTP_CATALOG_REFRESH)
+            )
+            if len(ftp_handler.mirrors) > 1:
+                _ftp_mirror_task = asyncio.create_task(
+                    ftp_handler.run_mirror_probe(MovieSources.FTP_MIRROR_PROBE_INTERVAL)
+                )
+
+        # Offline title → TMDB id index (ingesting the export takes a few seconds)
+        if MovieSources.TMDB_EXPORT_PATH:
+            _tmdb_index_task = asyncio.create_task(
+                tmdb_service.load_title_index(MovieSources.TMDB_EXPORT_PATH)
+            )
+
         logger.info("Application startup complete (browser initializing in background)")
         yield
     finally:
         logger.info("Shutting down application...")
         if _startup_task and not _startup_task.done():
             _startup_task.cancel()
+        if _ftp_catalog_task and not _ftp_catalog_task.done():
+            _ftp_catalog_task.cancel()
+        if _ftp_mirror_task and not _ftp_mirror_task.done():
+            _ftp_mirror_task.cancel()
+        if _tmdb_index_task and not _tmdb_index_task.done():
+            _tmdb_index_task.cancel()
         await tmdb_helper.close()
+        await image_cache.close()
+        await close_ftp_client()
         await scraper_instance.shutdown()
         logger.info("Application shutdown complete")
 
@@ -280,8 +326,10 @@ async def get_trending(limit: int = Query(20, description="Max results to return
     if not ftp_handler:
         return {"results": []}
     
-    ftp_movies = ftp_handler.get_random_movies(limit=limit)
-    enriched = await tmdb_enricher.enrich_movies(ftp_movies)
+    ftp_movies = await ftp_handler.get_random_movies(limit=limit)
+    enriched = await tmdb_enricher.enrich_movies(ftp_movies, budget=_ENRICH_BUDGET)
+    # Details screens are usually opened from here: warm them in the background
+    tmdb_helper.prefetch_details([m['id'] for m in enriched])
     
     return {"results": enriched}
 
@@ -291,8 +339,8 @@ async def get_featured():
     if not ftp_handler:
         return {}
         
-    ftp_movies = ftp_handler.get_random_movies(limit=5)
-    enriched = await tmdb_enricher.enrich_movies(ftp_movies)
+    ftp_movies = await ftp_handler.get_random_movies(limit=5)
+    enriched = await tmdb_enricher.enrich_movies(ftp_movies, budget=_ENRICH_BUDGET)
     
     for movie in enriched:
         if movie.get('backdrop_path'):
@@ -301,15 +349,22 @@ async def get_featured():
     return enriched[0] if enriched else {}
 
 @app.get("/latest")
-async def get_latest(limit: int = Query(20, description="Max results")):
+async def get_latest(
+    limit: int = Query(20, description="Max results"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
     """Get latest movies (powered by FTP + TMDB)."""
     if not ftp_handler:
-        return {"results": []}
-        
-    ftp_movies = ftp_handler.browse_latest("/English", limit=limit)
-    enriched = await tmdb_enricher.enrich_movies(ftp_movies)
+        return {"results": [], "next_cursor": None}
+
+    try:
+        page = await ftp_handler.browse_latest_page("/English", limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    enriched = await tmdb_enricher.enrich_movies(page["movies"], budget=_ENRICH_BUDGET)
+    tmdb_helper.prefetch_details([m['id'] for m in enriched])
     
-    return {"results": enriched}
+    return {"results": enriched, "next_cursor": page["next_cursor"]}
 
 
 @app.get("/search")
@@ -322,8 +377,8 @@ async def search_movies(
     if not ftp_handler:
         return {"query": query, "results": []}
         
-    ftp_movies = ftp_handler.search(query, limit=20)
-    enriched = await tmdb_enricher.enrich_movies(ftp_movies)
+    ftp_movies = await ftp_handler.search(query, limit=20)
+    enriched = await tmdb_enricher.enrich_movies(ftp_movies, budget=_ENRICH_BUDGET)
     
     return {"query": query, "results": enriched}
 
@@ -348,6 +403,35 @@ async def get_movie_details(
         raise HTTPException(status_code=500, detail=f"Failed to fetch movie details: {e}")
 
 
+@app.get("/image/{size}/{file}")
+async def get_image(
+    request: Request,
+    size: str = Path(..., description="TMDB size variant (w92 … w1280, original)"),
+    file: str = Path(..., description="TMDB image file name, e.g. abc123.jpg"),
+):
+    """Serve a TMDB poster/backdrop variant from the disk cache."""
+    if not image_cache.valid(size, file):
+        raise HTTPException(status_code=404, detail="Unknown image")
+
+    etag = image_cache.etag(size, file)
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": etag,
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        local = await image_cache.get(size, file)
+    except Exception as e:
+        logger.warning(f"Image fetch error for {size}/{file}: {e}")
+        raise HTTPException(status_code=502, detail="Image upstream unavailable")
+    if not local:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    return FileResponse(local, media_type=image_cache.content_type(file), headers=headers)
+
+
 @app.get("/links")
 async def generate_download_links(
     tmdb_id: int = Query(..., description="TMDB movie ID"),
@@ -362,24 +446,18 @@ async def generate_download_links(
     Generate download AND streaming links for a movie.
     Searches HDHub4u + SkyMoviesHD in parallel and combines results.
     Returns both 'links' (download) and 'embed_links' (streaming).
+
+    Results are cached per TMDB ID and request variant (multi-source or a
+    direct source URL); manual priority links are always read fresh. FTP
+    results are not cached here: ``get_playable_links`` already caches them
+    until the folder changes, and rewrites them to the current best mirror.
     """
     try:
         if tmdb_id <= 0:
             logger.warning(f"Invalid TMDB ID received: {tmdb_id}")
             raise HTTPException(status_code=400, detail="Invalid TMDB ID")
 
-        if not _browser_ready:
-            logger.error("Playwright browser not initialized — cannot generate links")
-            raise HTTPException(
-                status_code=500,
-                detail="Link generation service unavailable: browser not initialized",
-            )
-
-        embed_links = []
-        links = []
-        used_source = 'multi'
-
-        # Check for manual priority links first
+        # Manual priority links first (admin-managed, never cached)
         manual = await admin_db.fetch_all(
             "SELECT * FROM manual_links WHERE movie_title LIKE ? AND is_active = 1 ORDER BY priority DESC",
             (f"%{title}%",),
@@ -394,6 +472,35 @@ async def generate_download_links(
             for m in manual
         ]
 
+        if source == 'skymovieshd' and skymovieshd_url:
+            variant = 'skymovieshd'
+        elif source == 'cinefreak' and cinefreak_url:
+            variant = 'cinefreak'
+        elif hdhub4u_url:
+            variant = 'hdhub4u'
+        else:
+            variant = 'multi'
+
+        cached = await scraper_instance.cache.get_result(tmdb_id, variant)
+        if cached:
+            logger.info(f"Link cache hit - TMDB ID: {tmdb_id} ({variant})")
+            return _links_response(
+                tmdb_id, manual_links, _rewrite_ftp_urls(cached["links"]),
+                _rewrite_ftp_urls(cached["embed_links"]),
+                cached["source"], cached_at=cached["created_at"],
+            )
+
+        if not _browser_ready:
+            logger.error("Playwright browser not initialized — cannot generate links")
+            raise HTTPException(
+                status_code=500,
+                detail="Link generation service unavailable: browser not initialized",
+            )
+
+        embed_links = []
+        links = []
+        used_source = 'multi'
+
         # --- Case 1: SkyMoviesHD direct URL provided ---
         if source == 'skymovieshd' and skymovieshd_url:
             logger.info(f"Link request (SkyMoviesHD direct) - Title: '{title}', URL: {skymovieshd_url}")
@@ -454,17 +561,15 @@ async def generate_download_links(
             )
             links = result.get('links', [])
             embed_links = result.get('embed_links', [])
-            used_source = 'multi'
+            used_source = result.get('source') or 'multi'
 
-        return {
-            "url": f"tmdb_{tmdb_id}",
-            "total_links": len(manual_links) + len(links),
-            "links": manual_links + links,
-            "embed_links": embed_links,
-            "total_embed": len(embed_links),
-            "source": used_source,
-            "cached": False,
-        }
+        # Empty results aren't cached: the next open retries the sources
+        if (links or embed_links) and used_source != 'ftp':
+            await scraper_instance.cache.set_result(
+                tmdb_id, variant, used_source, links, embed_links,
+            )
+
+        return _links_response(tmdb_id, manual_links, links, embed_links, used_source)
     except HTTPException:
         raise
     except Exception as e:
@@ -472,6 +577,40 @@ async def generate_download_links(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _rewrite_ftp_urls(links: List[dict]) -> List[dict]:
+    """Point FTP links of a cached result at the current best mirror."""
+    if not ftp_handler:
+        return links
+    for link in links:
+        if link.get("url"):
+            link["url"] = ftp_handler.mirrors.rewrite(link["url"])
+    return links
+
+
+def _links_response(
+    tmdb_id: int,
+    manual_links: List[dict],
+    links: List[dict],
+    embed_links: List[dict],
+    used_source: str,
+    cached_at: Optional[float] = None,
+) -> dict:
+    """``/links`` response body; *cached_at* is set when served from cache."""
+    return {
+        "url": f"tmdb_{tmdb_id}",
+        "total_links": len(manual_links) + len(links),
+        "links": manual_links + links,
+        "embed_links": embed_links,
+        "total_embed": len(embed_links),
+        "source": used_source,
+        "cached": cached_at is not None,
+        "cached_at": (
+            datetime.fromtimestamp(cached_at, timezone.utc).isoformat()
+            if cached_at is not None else None
+        ),
+    }
+
+
 @app.get("/sources")
 async def get_sources():
     """Get list of all available scraping sources (enabled via config)."""
@@ -488,7 +627,7 @@ async def clear_cache(
 ):
     """Clear cached links for a specific movie (forces fresh generation)."""
     try:
-        await scraper_instance.cache.delete(f"tmdb_{tmdb_id}")
+        await scraper_instance.cache.delete(f"tmdb_{tmdb_id}", tmdb_id=tmdb_id)
         logger.info(f"Cache cleared for TMDB ID: {tmdb_id}")
         return {"message": f"Cache cleared for movie {tmdb_id}"}
     except Exception as e:
@@ -546,22 +685,24 @@ async def reset_sync_state(
 async def browse_ftp(
     directory: str = Query("/English", description="FTP directory to browse"),
     limit: int = Query(30, ge=1, le=100, description="Max results"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
 ):
     """Browse movies available on the FTP server."""
     if not ftp_handler:
         raise HTTPException(status_code=503, detail="FTP source is disabled")
 
     try:
-        loop = asyncio.get_running_loop()
-        results = await loop.run_in_executor(
-            None, ftp_handler.browse_latest, directory, limit
-        )
+        page = await ftp_handler.browse_latest_page(directory, limit, cursor)
+        results = page["movies"]
         return {
             "source": "FTP",
             "directory": directory,
             "total": len(results),
             "movies": results,
+            "next_cursor": page["next_cursor"],
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"FTP browse error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -577,10 +718,7 @@ async def ftp_search(
         raise HTTPException(status_code=503, detail="FTP source is disabled")
 
     try:
-        loop = asyncio.get_running_loop()
-        results = await loop.run_in_executor(
-            None, ftp_handler.search, query, limit
-        )
+        results = await ftp_handler.search(query, limit)
         return {
             "source": "FTP",
             "query": query,
@@ -6,7 +6,6 @@ Deduplicates by TMDB ID (keeps highest-priority source).
 import asyncio
 import logging
 import re
-from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from urllib.parse import quote
 
@@ -17,10 +16,6 @@ from scrapers.cinefreak_scraper import CinefreakScraper
 
 logger = logging.getLogger(__name__)
 
-# Shared thread pool for blocking FTP calls
-_ftp_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ftp")
-
-
 class MultiSourceManager:
     """Manages search and link extraction across multiple movie sources."""
 
@@ -32,16 +27,26 @@ class MultiSourceManager:
         # Will be set by init_scrapers via main.py lifespan
         self._hdhub4u_scraper = None  # Reference to the MovieScraper instance
 
-    def init_scrapers(self, browser, hdhub4u_scraper=None, download_resolver=None):
-        """Initialize all source scrapers with a shared browser."""
+    def init_scrapers(self, browser, hdhub4u_scraper=None, download_resolver=None,
+                      ftp_handler: Optional[FTPMovieHandler] = None):
+        """Initialize all source scrapers with a shared browser.
+
+        Pass the app-wide *ftp_handler* so the P1 FTP step searches the same
+        background-refreshed catalog as ``/search``.
+        """
         # Store reference to HDHub4u scraper for combined operations
         self._hdhub4u_scraper = hdhub4u_scraper
 
-        # FTP handler — no browser needed (uses Python's ftplib)
+        # FTP handler — no browser needed (HTTP directory listings)
         if MovieSources.FTP_ENABLED:
-            self.ftp_handler = FTPMovieHandler(
+            self.ftp_handler = ftp_handler or FTPMovieHandler(
                 host=MovieSources.FTP_HOST,
                 timeout=MovieSources.FTP_TIMEOUT,
+                listing_cache_dir=MovieSources.FTP_LISTING_CACHE_DIR,
+                max_fanout=MovieSources.FTP_MAX_FANOUT,
+                links_cache_ttl=MovieSources.FTP_LINKS_CACHE_TTL,
+                catalog_snapshot=MovieSources.FTP_CATALOG_SNAPSHOT,
+                mirrors=MovieSources.FTP_MIRRORS,
             )
             logger.info("FTP handler initialized (host=%s)", MovieSources.FTP_HOST)
 
@@ -160,9 +165,12 @@ class MultiSourceManager:
           P2: HDHub4u
           P3: SkyMoviesHD
           P4: Cinefreak
+
+        ``source`` in the result names the source that won (``ftp``,
+        ``hdhub4u``, ``skymovieshd`` or ``cinefreak``; None if none did).
         """
         if not self._initialized:
-            return {'links': [], 'embed_links': []}
+            return {'links': [], 'embed_links': [], 'source': None}
 
         # ── P1: FTP (highest priority, fastest) ──
         if self.ftp_handler:
@@ -182,6 +190,7 @@ class MultiSourceManager:
                     return {
                         'links': ftp_links,
                         'embed_links': ftp_result.get('embed_links', []),
+                        'source': 'ftp',
                     }
                 else:
                     logger.info("[extract_links] FTP empty → trying scrapers")
@@ -208,6 +217,7 @@ class MultiSourceManager:
                         return {
                             'links': validated,
                             'embed_links': result.get('embed_links', []),
+                            'source': 'hdhub4u',
                         }
                     else:
                         logger.warning(
@@ -236,6 +246,7 @@ class MultiSourceManager:
                         return {
                             'links': validated,
                             'embed_links': result.get('embed_links', []),
+                            'source': 'skymovieshd',
                         }
                     else:
                         logger.warning(
@@ -264,6 +275,7 @@ class MultiSourceManager:
                         return {
                             'links': validated,
                             'embed_links': result.get('embed_links', []),
+                            'source': 'cinefreak',
                         }
                     else:
                         logger.warning(
@@ -274,7 +286,7 @@ class MultiSourceManager:
                 logger.error("[extract_links] Cinefreak failed: %s", e)
 
         logger.warning("[extract_links] ❌ NO RESULTS for: '%s'", title)
-        return {'links': [], 'embed_links': []}
+        return {'links': [], 'embed_links': [], 'source': None}
 
     async def _sky_search_and_extract(self, title: str, year: str = None) -> Dict:
         """Search SkyMoviesHD for a title, then extract links from first result."""
@@ -335,16 +347,15 @@ class MultiSourceManager:
         """
         Search FTP for a title, then get playable links from matching folders.
 
-        FTP operations are blocking (ftplib), so we run them in a thread pool
-        executor to avoid blocking the async event loop.
+        The FTP handler is fully async (pooled httpx.AsyncClient), so both
+        steps run on the event loop without a thread pool.
         """
         try:
-            loop = asyncio.get_running_loop()
             query = f"{title} {year}" if year else title
 
-            # Step 1: Search for matching folders (blocking → thread)
+            # Step 1: Search for matching folders
             matches = await asyncio.wait_for(
-                loop.run_in_executor(_ftp_executor, self.ftp_handler.search, query, 5),
+                self.ftp_handler.search(query, 5),
                 timeout=15,
             )
 
@@ -352,12 +363,10 @@ class MultiSourceManager:
                 logger.info("[FTP] No results for: %s", query)
                 return {'links': [], 'embed_links': []}
 
-            # Step 2: Get playable links from the best match
+            # Step 2: Get playable links from the best match (results are ranked)
             best = matches[0]
             result = await asyncio.wait_for(
-                loop.run_in_executor(
-                    _ftp_executor,
-                    self.ftp_handler.get_playable_links,
+                self.ftp_handler.get_playable_links(
                     best["_internal_folder"],
                     best["_internal_directory"],
                 ),
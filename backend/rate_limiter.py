@@ -0,0 +1,136 @@
+"""
+Rate Limiter — process-wide async token bucket with priorities and backoff.
+
+Sits in front of all TMDB traffic (see ``TMDBService._get``). Callers
+``await bucket.acquire(priority)`` before each request:
+
+- tokens refill continuously at ``rate`` per second up to ``burst``
+- when callers have to wait, interactive (user-facing) requests are served
+  before background ones, FIFO within a priority
+- a 429 from upstream calls :meth:`TokenBucket.backoff`: the bucket pauses
+  for ``Retry-After`` (or an exponential delay) and halves its rate, then
+  creeps back up to the ceiling on successes (AIMD), so throughput settles
+  just under the limit instead of oscillating into error cliffs
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Backoff when the server sends no Retry-After: 1, 2, 4 ... 30 s
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX = 30.0
+# Share of the ceiling the rate regains per successful request
+_RECOVERY_STEP = 0.02
+
+
+class TokenBucket:
+    """Async token bucket; see the module docstring."""
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 1.0):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._failures = 0
+        # (priority, arrival, future)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Wait for one token."""
+        now = time.monotonic()
+        if not self._waiters and now >= self._paused_until:
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrivals), future))
+        self._schedule(0)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: give the token back
+                self._tokens += 1
+                self._schedule(0)
+            raise
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._timer = None
+        now = time.monotonic()
+        if now < self._paused_until:
+            self._schedule(self._paused_until - now)
+            return
+
+        self._refill(now)
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():  # waiter was cancelled
+                continue
+            future.set_result(None)
+            self._tokens -= 1
+
+        # Drop cancelled waiters so they don't keep the timer alive
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self._waiters:
+            self._schedule((1 - self._tokens) / self.rate)
+
+    def backoff(self, retry_after: Optional[float] = None) -> float:
+        """
+        Upstream said slow down: pause all traffic and halve the rate.
+        Returns the pause in seconds.
+        """
+        self._failures += 1
+        if retry_after is None:
+            delay = min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** (self._failures - 1))
+        else:
+            delay = max(0.0, retry_after)
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + delay)
+        self._refill(now)
+        self._tokens = 0.0
+        self.rate = max(self.min_rate, self.rate / 2)
+        logger.warning(
+            "Rate limited: pausing %.1fs, rate now %.1f/s (ceiling %.1f/s)",
+            delay, self.rate, self.max_rate,
+        )
+        return delay
+
+    def success(self) -> None:
+        """A request went through: reset backoff and recover rate additively."""
+        self._failures = 0
+        if self.rate < self.max_rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate * _RECOVERY_STEP)
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "max_rate": self.max_rate,
+            "waiting": sum(1 for _, _, f in self._waiters if not f.done()),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+        }
@@ -0,0 +1,190 @@
+"""
+Release Map — durable release name → TMDB movie mapping.
+
+Every source names the same movie differently (FTP folder
+``Title.2024.1080p.WEB-DL``, HDHub4u post ``Title (2024) Hindi WEB-DL
+1080p``, SkyMoviesHD / Cinefreak titles), and each scrape used to derive
+the TMDB id again. The first confident match of a release name is stored
+here — TMDB id, year, a confidence score and the TMDB search summary — so
+later lookups of that name are answered without any TMDB call.
+
+Names are normalized by dropping unambiguous release tags (resolution,
+source, codec, audio-channel layouts such as ``5.1``) and separators.
+Everything else is kept — sequel numbers and ordinary words included — so
+``Toy Story 2`` never shares a key with ``Toy Story``. Rows live in SQLite
+(same file as the TMDB search cache) with an in-process LRU in front.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import aiosqlite
+from thefuzz import fuzz
+
+logger = logging.getLogger(__name__)
+
+# Matches below this confidence are used but not remembered
+MIN_CONFIDENCE = 0.75
+
+# Rows written with an older normalization are dropped on startup: their
+# keys could collide with different movies under the current one
+_TABLE = "release_map_v2"
+_OLD_TABLES = ("release_map",)
+
+_SEPARATORS_RE = re.compile(r"[\s._\-:|/\\()\[\]{}+,&!']+")
+_YEAR_RE = re.compile(r"^(19|20)\d{2}$")
+# Multi-part tags, removed as whole tokens before splitting on separators:
+# audio channels (5.1, DDP5.1, AAC2.0), WEB-DL / WEB-Rip, H.264 / H.265
+_TAG_PATTERNS_RE = re.compile(
+    r"(?<![a-z0-9])(?:(?:ddp?|e?ac3|aac|dts)?[257]\.[01]|web[-.]?(?:dl|rip)|h\.26[45])(?![a-z0-9])"
+)
+# Single-token release tags that never occur as title words
+_TAGS = {
+    "480p", "576p", "720p", "1080p", "2160p", "4k", "uhd", "fhd",
+    "hdr", "hdr10", "10bit", "8bit", "x264", "x265", "h264", "h265", "hevc", "avc",
+    "webrip", "webdl", "bluray", "brrip", "bdrip", "hdrip", "dvdrip",
+    "hdts", "hdtc", "hdcam", "camrip", "prehd", "remux", "amzn", "dsnp", "hmax",
+    "aac", "ac3", "eac3", "esub", "esubs", "msub", "msubs",
+}
+
+
+def normalize_release(name: str) -> str:
+    """``"Dune.Part.Two.2024.1080p.WEB-DL.x264"`` → ``"dune part two 2024"``."""
+    name = _TAG_PATTERNS_RE.sub(" ", name.lower())
+    words = [w for w in _SEPARATORS_RE.split(name) if w and w not in _TAGS]
+    return " ".join(words)
+
+
+def match_confidence(title: str, year: Optional[str], movie: Dict) -> float:
+    """0..1 — how sure we are that *movie* is the release *title* / *year*."""
+    title = normalize_release(title)
+    candidates = [movie.get("title") or "", movie.get("original_title") or ""]
+    similarity = max(
+        fuzz.token_sort_ratio(title, normalize_release(c)) for c in candidates
+    ) / 100
+    movie_year = (movie.get("release_date") or "")[:4]
+    if year and movie_year:
+        if str(year) == movie_year:
+            similarity += 0.1
+        elif abs(int(year) - int(movie_year)) > 1:
+            similarity -= 0.3
+    return max(0.0, min(1.0, similarity))
+
+
+class ReleaseMap:
+    """SQLite-backed release name → TMDB summary table with an LRU in front."""
+
+    def __init__(self, db_path: str, max_entries: int = 4096):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._ready = False
+
+    async def _init_db(self) -> None:
+        if self._ready:
+            return
+        async with self._lock:
+            if self._ready:
+                return
+            try:
+                async with aiosqlite.connect(self.db_path) as db:
+                    for table in _OLD_TABLES:
+                        await db.execute(f"DROP TABLE IF EXISTS {table}")
+                    await db.execute(f"""
+                        CREATE TABLE IF NOT EXISTS {_TABLE} (
+                            name TEXT PRIMARY KEY,
+                            tmdb_id INTEGER NOT NULL,
+                            year TEXT,
+                            confidence REAL NOT NULL,
+                            summary TEXT NOT NULL,
+                            updated_at REAL NOT NULL
+                        )
+                    """)
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Release map init error: {e}")
+            self._ready = True
+
+    @staticmethod
+    def key(release_name: str, year: Optional[str] = None) -> str:
+        """Normalized name, with *year* appended if the name doesn't carry one."""
+        name = normalize_release(release_name)
+        if year and not any(_YEAR_RE.match(w) for w in name.split()):
+            name = f"{name} {year}"
+        return name
+
+    async def get(self, release_name: str, year: Optional[str] = None) -> Optional[Dict]:
+        """TMDB summary mapped to *release_name*, or None."""
+        key = self.key(release_name, year)
+        if not key:
+            return None
+        summary = self._lru.get(key)
+        if summary is not None:
+            self._lru.move_to_end(key)
+            return summary
+
+        await self._init_db()
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                async with db.execute(
+                    f"SELECT summary FROM {_TABLE} WHERE name = ?", (key,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+        except Exception as e:
+            logger.warning(f"Release map read error: {e}")
+            return None
+        if not row:
+            return None
+        summary = json.loads(row[0])
+        self._remember(key, summary)
+        return summary
+
+    async def put(
+        self,
+        release_name: str,
+        year: Optional[str],
+        movie: Dict,
+        confidence: float,
+    ) -> bool:
+        """Remember *movie* for *release_name* if *confidence* is high enough."""
+        key = self.key(release_name, year)
+        if not key or confidence < MIN_CONFIDENCE or not movie.get("id"):
+            return False
+        self._remember(key, movie)
+
+        await self._init_db()
+        try:
+            async with self._lock:
+                async with aiosqlite.connect(self.db_path) as db:
+                    # Keep the more confident mapping if the name was seen before
+                    await db.execute(
+                        f"""
+                        INSERT INTO {_TABLE} (name, tmdb_id, year, confidence, summary, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(name) DO UPDATE SET
+                            tmdb_id = excluded.tmdb_id, year = excluded.year,
+                            confidence = excluded.confidence, summary = excluded.summary,
+                            updated_at = excluded.updated_at
+                        WHERE excluded.confidence >= {_TABLE}.confidence
+                        """,
+                        (
+                            key, movie["id"], (movie.get("release_date") or "")[:4] or None,
+                            confidence, json.dumps(movie), time.time(),
+                        ),
+                    )
+                    await db.commit()
+        except Exception as e:
+            logger.error(f"Release map write error: {e}")
+        return True
+
+    def _remember(self, key: str, summary: Dict) -> None:
+        self._lru[key] = summary
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
@@ -2,8 +2,10 @@ import asyncio
 import os
 import re
 import json
+import time
 import aiosqlite
 import httpx
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from playwright.async_api import async_playwright, Browser
@@ -13,16 +15,16 @@ from urllib.parse import urljoin, quote
 from thefuzz import fuzz
 import logging
 
+from config.sources import MovieSources
+from details_cache import DetailsCache
+from image_cache import tmdb_image_url
+from rate_limiter import PRIORITY_INTERACTIVE
+from tmdb_service import TMDBService, tmdb_service
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# --- Configuration ---
-TMDB_API_KEY = os.getenv("TMDB_API_KEY", "7efd8424c17ff5b3e8dc9cebf4a33f73")
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
-TMDB_BACKDROP_BASE = "https://image.tmdb.org/t/p/original"
-
 # --- Scraping Domains ---
 DOMAINS = {
     "HDHub4u": "https://new3.hdhub4u.fo",
@@ -35,44 +37,164 @@ USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 
 # --- Cache Manager ---
 class CacheManager:
-    def __init__(self, db_path: str = "scraper_cache.db"):
+    """
+    SQLite cache for scraped links.
+
+    ``links_cache`` holds the HDHub4u cascade of ``MovieScraper``;
+    ``link_results`` holds the complete ``/links`` response per TMDB id and
+    request variant (``multi`` or a direct-URL source): the source that
+    won, download + embed links and when they were scraped.
+
+    The database runs in WAL mode on long-lived connections: a small pool
+    of reader connections used without any lock (WAL readers never block
+    each other or the writer), and one writer connection that all writes
+    go through, one at a time. Each connection keeps its compiled
+    statements in sqlite3's statement cache, so the fixed queries below
+    are prepared once per connection instead of once per call.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "scraper_cache.db",
+        results_ttl: int = 7 * 86400,
+        readers: int = 4,
+    ):
         self.db_path = db_path
-        self._lock = asyncio.Lock()
+        self.results_ttl = results_ttl
+        self.max_readers = max(1, readers)
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        self._idle_readers: asyncio.Queue = asyncio.Queue()
+        self._readers: List[aiosqlite.Connection] = []
+        self._reader_slots = 0
+        # Callers blocked on _idle_readers, and close() calls so far: a
+        # close() wakes the blocked callers with None sentinels
+        self._reader_waiters = 0
+        self._generation = 0
+        self._opening = asyncio.Lock()
 
     async def init_db(self) -> None:
-        """Initialize the SQLite database schema."""
-        async with self._lock:
+        """Open the writer connection (WAL) and initialize the schema."""
+        async with self._opening:
+            if self._writer is not None:
+                return
             try:
-                async with aiosqlite.connect(self.db_path) as db:
-                    await db.execute("""
-                        CREATE TABLE IF NOT EXISTS links_cache (
-                            movie_id TEXT PRIMARY KEY,
-                            data TEXT NOT NULL,
-                            timestamp DATETIME NOT NULL
-                        )
-                    """)
-                    await db.commit()
-                    logger.info("Database initialized successfully")
+                db = await aiosqlite.connect(self.db_path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute("PRAGMA synchronous=NORMAL")
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS links_cache (
+                        movie_id TEXT PRIMARY KEY,
+                        data TEXT NOT NULL,
+                        timestamp DATETIME NOT NULL
+                    )
+                """)
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS link_results (
+                        tmdb_id INTEGER NOT NULL,
+                        variant TEXT NOT NULL,
+                        source TEXT NOT NULL,
+                        links TEXT NOT NULL,
+                        embed_links TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (tmdb_id, variant)
+                    )
+                """)
+                await db.commit()
+                self._writer = db
+                logger.info("Database initialized successfully")
             except Exception as e:
                 logger.error(f"Database initialization error: {e}")
 
+    async def close(self) -> None:
+        """
+        Close all pooled connections. Readers checked out right now finish
+        their query and are closed when returned (see ``_reader``); callers
+        waiting for a reader fail with "cache database closed".
+        """
+        async with self._opening:
+            self._readers = []
+            self._reader_slots = 0
+            self._generation += 1
+            while not self._idle_readers.empty():
+                db = self._idle_readers.get_nowait()
+                if db is not None:
+                    await db.close()
+            for _ in range(self._reader_waiters):
+                self._idle_readers.put_nowait(None)
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+
+    @asynccontextmanager
+    async def _reader(self):
+        """Borrow a pooled read connection (opened on demand up to ``max_readers``)."""
+        if self._writer is None:
+            await self.init_db()
+        db = await self._checkout()
+        try:
+            yield db
+        finally:
+            if db in self._readers:
+                self._idle_readers.put_nowait(db)
+            else:  # checked out across close(): the pool forgot it
+                await db.close()
+
+    async def _checkout(self) -> aiosqlite.Connection:
+        generation = self._generation
+        while True:
+            if self._idle_readers.empty() and self._reader_slots < self.max_readers:
+                self._reader_slots += 1  # reserve before awaiting the connect
+                try:
+                    db = await aiosqlite.connect(self.db_path)
+                except Exception:
+                    self._reader_slots -= 1
+                    raise
+                self._readers.append(db)
+                return db
+
+            self._reader_waiters += 1
+            try:
+                db = await self._idle_readers.get()
+            finally:
+                self._reader_waiters -= 1
+            if db is not None:
+                return db
+            if self._generation != generation:
+                raise RuntimeError("cache database closed")
+            # Sentinel left over from an earlier close(): look again
+
+    @asynccontextmanager
+    async def _write(self):
+        """The single writer connection; commits when the block succeeds."""
+        if self._writer is None:
+            await self.init_db()
+        if self._writer is None:
+            raise RuntimeError("cache database unavailable")
+        async with self._write_lock:
+            try:
+                yield self._writer
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
     async def get_links(self, movie_id: str) -> Optional[List[Dict]]:
         """Retrieve cached download links if they exist and are fresh (< 7 days)."""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    async with db.execute(
-                        "SELECT data, timestamp FROM links_cache WHERE movie_id = ?",
-                        (movie_id,)
-                    ) as cursor:
-                        row = await cursor.fetchone()
-                        if row:
-                            data, timestamp = row
-                            ts = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-                            if datetime.now() - ts < timedelta(days=7):
-                                logger.info(f"Cache hit for: {movie_id}")
-                                return json.loads(data)
-                            logger.info(f"Cache expired for: {movie_id}")
+            async with self._reader() as db:
+                async with db.execute(
+                    "SELECT data, timestamp FROM links_cache WHERE movie_id = ?",
+                    (movie_id,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+            if row:
+                data, timestamp = row
+                ts = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+                if datetime.now() - ts < timedelta(days=7):
+                    logger.info(f"Cache hit for: {movie_id}")
+                    return json.loads(data)
+                logger.info(f"Cache expired for: {movie_id}")
         except Exception as e:
             logger.warning(f"Cache retrieval error: {e}")
         return None
@@ -80,44 +202,81 @@ class CacheManager:
     async def set_links(self, movie_id: str, data: List[Dict]) -> None:
         """Store download links in the cache."""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    await db.execute(
-                        "INSERT OR REPLACE INTO links_cache (movie_id, data, timestamp) VALUES (?, ?, ?)",
-                        (movie_id, json.dumps(data), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                    )
-                    await db.commit()
-                    logger.info(f"Cache updated for: {movie_id}")
+            async with self._write() as db:
+                await db.execute(
+                    "INSERT OR REPLACE INTO links_cache (movie_id, data, timestamp) VALUES (?, ?, ?)",
+                    (movie_id, json.dumps(data), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                )
+            logger.info(f"Cache updated for: {movie_id}")
         except Exception as e:
             logger.error(f"Cache storage error: {e}")
 
-    async def delete(self, movie_id: str) -> None:
-        """Delete a specific movie's cached links."""
+    async def get_result(self, tmdb_id: int, variant: str) -> Optional[Dict]:
+        """Cached ``/links`` result for *tmdb_id* / *variant* if fresh, else None."""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    await db.execute("DELETE FROM links_cache WHERE movie_id = ?", (movie_id,))
-                    await db.commit()
-                    logger.info(f"Cache deleted for: {movie_id}")
+            async with self._reader() as db:
+                async with db.execute(
+                    "SELECT source, links, embed_links, created_at FROM link_results "
+                    "WHERE tmdb_id = ? AND variant = ?",
+                    (tmdb_id, variant)
+                ) as cursor:
+                    row = await cursor.fetchone()
+        except Exception as e:
+            logger.warning(f"Link results retrieval error: {e}")
+            return None
+        if not row or time.time() - row[3] >= self.results_ttl:
+            return None
+        return {
+            "source": row[0],
+            "links": json.loads(row[1]),
+            "embed_links": json.loads(row[2]),
+            "created_at": row[3],
+        }
+
+    async def set_result(
+        self, tmdb_id: int, variant: str, source: str,
+        links: List[Dict], embed_links: List[Dict],
+    ) -> None:
+        """Store a ``/links`` result for *tmdb_id* / *variant*."""
+        try:
+            async with self._write() as db:
+                await db.execute(
+                    "INSERT OR REPLACE INTO link_results "
+                    "(tmdb_id, variant, source, links, embed_links, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (tmdb_id, variant, source, json.dumps(links),
+                     json.dumps(embed_links), time.time())
+                )
+        except Exception as e:
+            logger.error(f"Link results storage error: {e}")
+
+    async def delete(self, movie_id: str, tmdb_id: Optional[int] = None) -> None:
+        """Delete a specific movie's cached links (and ``/links`` results for *tmdb_id*)."""
+        try:
+            async with self._write() as db:
+                await db.execute("DELETE FROM links_cache WHERE movie_id = ?", (movie_id,))
+                if tmdb_id is not None:
+                    await db.execute("DELETE FROM link_results WHERE tmdb_id = ?", (tmdb_id,))
+            logger.info(f"Cache deleted for: {movie_id}")
         except Exception as e:
             logger.error(f"Cache deletion error: {e}")
 
 
 # --- TMDB Helper ---
 class TMDBHelper:
-    """Async TMDB API client using httpx."""
-
-    def __init__(self):
-        self._client: Optional[httpx.AsyncClient] = None
-
-    async def _get_client(self) -> httpx.AsyncClient:
-        if self._client is None or self._client.is_closed:
-            self._client = httpx.AsyncClient(timeout=10.0)
-        return self._client
+    """Async TMDB API helper on top of the shared ``tmdb_service`` client."""
+
+    def __init__(self, service: TMDBService = tmdb_service):
+        self._service = service
+        self.details_cache = DetailsCache(
+            self._fetch_movie_details,
+            max_entries=MovieSources.TMDB_DETAILS_CACHE_SIZE,
+            ttl=MovieSources.TMDB_DETAILS_TTL,
+            stale_ttl=MovieSources.TMDB_DETAILS_STALE_TTL,
+        )
 
     async def close(self) -> None:
-        if self._client and not self._client.is_closed:
-            await self._client.aclose()
+        await self._service.close()
 
     @staticmethod
     def _format_movie(movie: Dict) -> Dict:
@@ -126,8 +285,8 @@ class TMDBHelper:
             "tmdb_id": movie.get('id'),
             "title": movie.get('title'),
             "original_title": movie.get('original_title'),
-            "poster": f"{TMDB_IMAGE_BASE}{movie['poster_path']}" if movie.get('poster_path') else None,
-            "backdrop": f"{TMDB_BACKDROP_BASE}{movie['backdrop_path']}" if movie.get('backdrop_path') else None,
+            "poster": tmdb_image_url(movie.get('poster_path'), 'w500'),
+            "backdrop": tmdb_image_url(movie.get('backdrop_path'), 'original'),
             "rating": round(movie.get('vote_average', 0), 1),
             "release_date": movie.get('release_date'),
             "overview": movie.get('overview', 'No overview available'),
@@ -139,11 +298,8 @@ class TMDBHelper:
     async def get_trending_movies(self) -> List[Dict]:
         """Fetch trending movies from TMDB (non-blocking)."""
         try:
-            client = await self._get_client()
-            resp = await client.get(f"{TMDB_BASE_URL}/trending/movie/week?api_key={TMDB_API_KEY}")
-            resp.raise_for_status()
-            data = resp.json()
-            return [self._format_movie(m) for m in data.get('results', [])[:20]]
+            movies = await self._service.trending_movies("week")
+            return [self._format_movie(m) for m in movies[:20]]
         except Exception as e:
             logger.error(f"TMDB trending error: {e}")
             return []
@@ -151,22 +307,26 @@ class TMDBHelper:
     async def search_movie(self, query: str) -> List[Dict]:
         """Search movies on TMDB (non-blocking)."""
         try:
-            client = await self._get_client()
-            resp = await client.get(f"{TMDB_BASE_URL}/search/movie?api_key={TMDB_API_KEY}&query={quote(query)}")
-            resp.raise_for_status()
-            data = resp.json()
-            return [self._format_movie(m) for m in data.get('results', [])[:15]]
+            movies = await self._service.search_movies(query)
+            return [self._format_movie(m) for m in movies[:15]]
         except Exception as e:
             logger.error(f"TMDB search error: {e}")
             return []
 
     async def get_movie_details(self, tmdb_id: int) -> Optional[Dict]:
+        """Detailed movie info, served from the stale-while-revalidate cache."""
+        return await self.details_cache.get(tmdb_id)
+
+    def prefetch_details(self, tmdb_ids: List[int]) -> int:
+        """Warm the details cache for movies about to be opened (background)."""
+        return self.details_cache.prefetch(tmdb_ids)
+
+    async def _fetch_movie_details(
+        self, tmdb_id: int, priority: int = PRIORITY_INTERACTIVE,
+    ) -> Optional[Dict]:
         """Fetch detailed movie info from TMDB (non-blocking)."""
         try:
-            client = await self._get_client()
-            resp = await client.get(f"{TMDB_BASE_URL}/movie/{tmdb_id}?api_key={TMDB_API_KEY}")
-            resp.raise_for_status()
-            movie = resp.json()
+            movie = await self._service.movie_details(tmdb_id, priority=priority)
             details = self._format_movie(movie)
             details.update({
                 "runtime": movie.get('runtime'),
@@ -304,7 +464,7 @@ class AdvancedLinkExtractor:
 # --- Movie Scraper ---
 class MovieScraper:
     def __init__(self, max_concurrent: int = 2):
-        self.cache = CacheManager()
+        self.cache = CacheManager(results_ttl=MovieSources.LINKS_CACHE_TTL)
         self.browser: Optional[Browser] = None
         self.playwright = None
         self.semaphore = asyncio.Semaphore(max_concurrent)
@@ -335,6 +495,7 @@ class MovieScraper:
                 await self.browser.close()
             if self.playwright:
                 await self.playwright.stop()
+            await self.cache.close()
             self._initialized = False
             logger.info("MovieScraper shutdown complete")
         except Exception as e:
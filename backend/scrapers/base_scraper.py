@@ -6,16 +6,13 @@ Provides common helpers: title cleaning, quality extraction, TMDB matching.
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional
 from playwright.async_api import Page, Browser
-import httpx
 import re
 import logging
 
-logger = logging.getLogger(__name__)
+from image_cache import tmdb_image_url
+from tmdb_service import tmdb_service
 
-# TMDB config (shared across scrapers)
-TMDB_API_KEY = "7efd8424c17ff5b3e8dc9cebf4a33f73"
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-TMDB_IMAGE_BASE = "https://image.tmdb.org/t/p/w500"
+logger = logging.getLogger(__name__)
 
 
 class BaseMovieScraper(ABC):
@@ -112,54 +109,21 @@ class BaseMovieScraper(ABC):
         return match.group(1).upper() if match else 'HD'
 
     async def _match_with_tmdb(self, title: str,
-                                year: Optional[str] = None) -> Optional[Dict]:
-        """Match a title against the TMDB database."""
+                                year: Optional[str] = None,
+                                release_name: Optional[str] = None) -> Optional[Dict]:
+        """Match a title against the TMDB database (release map first)."""
         try:
-            params = {
-                'api_key': TMDB_API_KEY,
-                'query': title,
-                'include_adult': 'false',
-            }
-            if year:
-                params['year'] = year
-
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(
-                    f"{TMDB_BASE_URL}/search/movie", params=params
-                )
-
-                if resp.status_code != 200:
-                    return None
-
-                data = resp.json()
-                results = data.get('results', [])
-
-                # Retry without year if no results
-                if not results and year:
-                    params.pop('year')
-                    resp = await client.get(
-                        f"{TMDB_BASE_URL}/search/movie", params=params
-                    )
-                    data = resp.json()
-                    results = data.get('results', [])
-
-                if results:
-                    movie = results[0]
-                    return {
-                        'tmdb_id': movie['id'],
-                        'title': movie['title'],
-                        'poster_url': (
-                            f"{TMDB_IMAGE_BASE}{movie['poster_path']}"
-                            if movie.get('poster_path') else None
-                        ),
-                        'backdrop_url': (
-                            f"https://image.tmdb.org/t/p/original{movie['backdrop_path']}"
-                            if movie.get('backdrop_path') else None
-                        ),
-                        'rating': round(movie.get('vote_average', 0), 1),
-                        'overview': movie.get('overview', ''),
-                        'release_date': movie.get('release_date', ''),
-                    }
+            movie = await tmdb_service.match_release(release_name or title, title, year)
+            if movie:
+                return {
+                    'tmdb_id': movie['id'],
+                    'title': movie['title'],
+                    'poster_url': tmdb_image_url(movie.get('poster_path'), 'w500'),
+                    'backdrop_url': tmdb_image_url(movie.get('backdrop_path'), 'original'),
+                    'rating': round(movie.get('vote_average', 0), 1),
+                    'overview': movie.get('overview', ''),
+                    'release_date': movie.get('release_date', ''),
+                }
 
             return None
 
@@ -157,7 +157,9 @@ class CinefreakScraper(BaseMovieScraper):
                 )
 
                 # Match with TMDB
-                tmdb_data = await self._match_with_tmdb(clean_title, year)
+                tmdb_data = await self._match_with_tmdb(
+                    clean_title, year, release_name=raw_title
+                )
 
                 if tmdb_data:
                     movies.append({
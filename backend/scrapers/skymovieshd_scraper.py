@@ -313,7 +313,9 @@ class SkyMoviesHDScraper(BaseMovieScraper):
                     )
 
                     # Match with TMDB
-                    tmdb_data = await self._match_with_tmdb(clean_title, year)
+                    tmdb_data = await self._match_with_tmdb(
+                        clean_title, year, release_name=raw_title
+                    )
 
                     if tmdb_data:
                         movies.append({
@@ -0,0 +1,51 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls for the same key share one in-flight task: the first
+caller starts it, later callers await the same result (or exception)
+instead of issuing a duplicate request. Once the task finishes the key is
+released, so the next call starts fresh.
+
+The shared work runs as its own task and every caller awaits it through
+``asyncio.shield``: a caller that times out or is cancelled (e.g. by
+``asyncio.wait_for``) doesn't cancel the lookup for the others.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent ``do(key, fn)`` calls with an equal *key*."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.started += 1
+            task.add_done_callback(lambda t, key=key: self._release(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved even if every caller gave up waiting
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        """Number of keys currently in flight."""
+        return len(self._calls)
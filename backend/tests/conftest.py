@@ -0,0 +1,44 @@
+"""Backend modules are flat (``import ftp_catalog``): put backend/ on the path."""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ftp_listing_parser import ListingEntry  # noqa: E402  (needs the path above)
+
+_TITLE_WORDS = (
+    "the", "dark", "knight", "knights", "of", "seven", "kingdoms", "baby", "john",
+    "dune", "part", "two", "inception", "return", "king", "kingdom", "war", "up",
+    "spider", "man", "home", "no", "way", "star", "stars", "night", "tom", "jerry",
+)
+_QUALITIES = ("1080p.BluRay", "720p.WEB-DL", "2160p.4K.HDR", "480p", "HDRip", "")
+
+
+@pytest.fixture(scope="session")
+def ftp_listings():
+    """Deterministic listings of the three FTP search directories."""
+    rng = random.Random(7)
+    listings = {}
+    for directory in ("/English", "/Indian/Hindi Movies", "/TV_Series"):
+        names = set()
+        while len(names) < 150:
+            title = ".".join(w.title() for w in rng.sample(_TITLE_WORDS, rng.randint(1, 4)))
+            year = rng.choice(("", f".{rng.randint(1990, 2025)}"))
+            quality = rng.choice(_QUALITIES)
+            tag = rng.choice(("", " [DDN]", " (Hindi)"))
+            names.add(f"{title}{year}{'.' + quality if quality else ''}{tag}/")
+        listings[directory] = [
+            ListingEntry(name, 1700000000 + rng.randrange(0, 10**7, 3600), 0)
+            for name in sorted(names)
+        ]
+    return listings
+
+
+@pytest.fixture
+def ftp_handler(tmp_path):
+    from ftp_handler import FTPMovieHandler
+    return FTPMovieHandler(listing_cache_dir=str(tmp_path / "listings"))
@@ -0,0 +1,163 @@
+"""CacheManager: /links results and the WAL connection pool."""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("playwright")
+pytest.importorskip("playwright_stealth")
+
+from scraper import CacheManager  # noqa: E402
+
+LINKS = [{"quality": "1080p", "url": "https://example.com/a"}]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_results_expire_after_the_ttl(tmp_path, monkeypatch):
+    async def scenario():
+        cache = CacheManager(str(tmp_path / "cache.db"), results_ttl=60)
+        await cache.set_result(1, "multi", "hdhub4u", LINKS, [])
+        fresh = await cache.get_result(1, "multi")
+        now = time.time()
+        monkeypatch.setattr("scraper.time.time", lambda: now + 61)
+        expired = await cache.get_result(1, "multi")
+        await cache.close()
+        return fresh, expired
+
+    fresh, expired = run(scenario())
+    assert fresh["source"] == "hdhub4u" and fresh["links"] == LINKS
+    assert expired is None
+
+
+def test_variants_are_isolated_and_delete_clears_all_of_them(tmp_path):
+    async def scenario():
+        cache = CacheManager(str(tmp_path / "cache.db"))
+        await cache.set_result(1, "multi", "hdhub4u", LINKS, [])
+        await cache.set_result(1, "katmoviehd", "katmoviehd", [], LINKS)
+        await cache.set_result(2, "multi", "hdhub4u", LINKS, [])
+        await cache.set_links("movie-1", LINKS)
+        before = (
+            (await cache.get_result(1, "multi"))["source"],
+            (await cache.get_result(1, "katmoviehd"))["embed_links"],
+            await cache.get_result(1, "other"),
+        )
+        await cache.delete("movie-1", tmdb_id=1)
+        after = (
+            await cache.get_result(1, "multi"),
+            await cache.get_result(1, "katmoviehd"),
+            await cache.get_result(2, "multi") is not None,
+            await cache.get_links("movie-1"),
+        )
+        await cache.close()
+        return before, after
+
+    before, after = run(scenario())
+    assert before == ("hdhub4u", LINKS, None)
+    assert after == (None, None, True, None)
+
+
+def test_reads_run_concurrently_while_writes_stay_serialized(tmp_path):
+    async def scenario():
+        cache = CacheManager(str(tmp_path / "cache.db"), readers=3)
+        await cache.set_result(1, "multi", "hdhub4u", LINKS, [])
+
+        # Three readers held at once: none of them waits for another
+        entered = 0
+        all_in = asyncio.Event()
+
+        async def hold_reader():
+            nonlocal entered
+            async with cache._reader():
+                entered += 1
+                if entered == 3:
+                    all_in.set()
+                await asyncio.wait_for(all_in.wait(), timeout=2)
+
+        await asyncio.gather(*(hold_reader() for _ in range(3)))
+        readers = len(cache._readers)
+
+        # Writers go one at a time, even while a reader is checked out
+        active = peak = 0
+
+        async def write(i):
+            nonlocal active, peak
+            async with cache._write() as db:
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                await db.execute(
+                    "INSERT OR REPLACE INTO links_cache (movie_id, data, timestamp) "
+                    "VALUES (?, '[]', '2024-01-01 00:00:00')", (f"m{i}",),
+                )
+                active -= 1
+
+        async with cache._reader():
+            await asyncio.gather(*(write(i) for i in range(5)))
+        await cache.close()
+        return readers, peak
+
+    assert run(scenario()) == (3, 1)
+
+
+def test_reader_checked_out_across_close_is_closed_on_return(tmp_path):
+    async def scenario():
+        cache = CacheManager(str(tmp_path / "cache.db"))
+        await cache.set_result(1, "multi", "hdhub4u", LINKS, [])
+        async with cache._reader() as db:
+            await cache.close()
+            # Still usable until returned
+            async with db.execute("SELECT COUNT(*) FROM link_results") as cursor:
+                assert await cursor.fetchone() == (1,)
+        closed = db._connection is None
+        # The pool still works after a reopen
+        result = await cache.get_result(1, "multi")
+        await cache.close()
+        return closed, cache._idle_readers.qsize(), result
+
+    closed, idle, result = run(scenario())
+    assert closed
+    assert idle == 0
+    assert result["source"] == "hdhub4u"
+
+
+def test_close_wakes_callers_waiting_for_a_reader(tmp_path):
+    async def scenario():
+        cache = CacheManager(str(tmp_path / "cache.db"), readers=1)
+        await cache.set_result(1, "multi", "hdhub4u", LINKS, [])
+        async with cache._reader():
+            waiter = asyncio.ensure_future(cache.get_result(1, "multi"))
+            await asyncio.sleep(0.01)
+            await cache.close()
+            woken = await asyncio.wait_for(waiter, timeout=1)
+        # Reopens on demand; no stale sentinel blocks the next reader
+        result = await asyncio.wait_for(cache.get_result(1, "multi"), timeout=1)
+        await cache.close()
+        return woken, result
+
+    woken, result = run(scenario())
+    assert woken is None  # "cache database closed", logged and treated as a miss
+    assert result["source"] == "hdhub4u"
+
+
+def test_stale_sentinel_does_not_block_a_reopened_pool(tmp_path):
+    async def scenario():
+        cache = CacheManager(str(tmp_path / "cache.db"), readers=1)
+        await cache.set_result(1, "multi", "hdhub4u", LINKS, [])
+        async with cache._reader():
+            waiter = asyncio.ensure_future(cache.get_result(1, "multi"))
+            await asyncio.sleep(0.01)
+            waiter.cancel()  # gives up before close() hands it a sentinel
+            await cache.close()
+        await asyncio.gather(waiter, return_exceptions=True)
+        stale = cache._idle_readers.qsize()
+        result = await asyncio.wait_for(cache.get_result(1, "multi"), timeout=1)
+        await cache.close()
+        return stale, result
+
+    stale, result = run(scenario())
+    assert stale == 1
+    assert result["source"] == "hdhub4u"
@@ -0,0 +1,116 @@
+"""FTPCatalog search, latest-first paging and weighted sampling."""
+
+import random
+import re
+
+import pytest
+
+from ftp_catalog import FTPCatalog
+
+
+def old_matches(query: str, folder_name: str) -> bool:
+    """The linear matcher FTPCatalog.search replaced, kept as the reference."""
+    query_lower = query.lower()
+    folder_lower = folder_name.lower()
+
+    folder_clean = re.sub(r"[._\-\[\]\(\)]", " ", folder_lower)
+    folder_clean = re.sub(r"\[ddn\]|\(ddn\)", "", folder_clean)
+    query_clean = re.sub(r"[._\-\[\]\(\)]", " ", query_lower)
+
+    query_no_year = re.sub(r"\b(20\d{2}|19\d{2})\b", "", query_clean).strip()
+    query_no_year = re.sub(r"\s+", " ", query_no_year)
+
+    if query_lower in folder_lower:
+        return True
+    if query_no_year and query_no_year in folder_clean:
+        return True
+
+    query_words = [w for w in query_no_year.split() if len(w) > 2]
+    if not query_words:
+        return query_lower in folder_lower
+
+    folder_words = [w for w in folder_clean.split() if len(w) > 1]
+    hits = sum(
+        1 for qw in query_words
+        if any(qw == fw or qw in fw or (len(fw) > 2 and fw in qw) for fw in folder_words)
+    )
+    return hits / len(query_words) >= 0.7
+
+
+QUERIES = [
+    "knight", "Knights", "the dark knight", "The Dark Knight 2008", "baby john",
+    "A Knight 2026", "dune part two", "spider-man no way home", "star wars return",
+    "kingdoms of war", "tom & jerry", "up", "Up 2009", "2021", "hdr", "dark.knight",
+    "nightmare", "zzzz", "",
+]
+
+
+@pytest.fixture(scope="module")
+def parse_row():
+    from ftp_handler import FTPMovieHandler
+    return FTPMovieHandler.__new__(FTPMovieHandler)._parse_row
+
+
+@pytest.fixture(scope="module")
+def catalog(ftp_listings, parse_row):
+    return FTPCatalog.build(ftp_listings, parse_row)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_the_old_matcher(catalog, query):
+    expected = {row.id for row in catalog._rows if old_matches(query, row.name)}
+    found = catalog.search(query, len(catalog))
+    assert {m["id"] for m in found} == expected
+    if query in ("knight", "baby john", "up"):
+        assert expected
+    assert len(found) == len(expected)
+
+
+def test_search_ranks_exact_titles_and_years_first(catalog):
+    best = catalog.search("dune", 3)
+    assert best and best[0]["title"].lower() == "dune"
+    assert len(catalog.search("knight", 4)) <= 4
+    assert catalog.search("knight", 0) == []
+
+
+def test_latest_pages_have_no_gaps_or_duplicates(catalog, ftp_listings):
+    for directory in catalog.directories:
+        seen, cursor = [], None
+        while True:
+            page = catalog.latest(directory, 17, cursor)
+            if not page:
+                break
+            seen.extend(page)
+            cursor = (page[-1].mtime, page[-1].id)
+        ordered = sorted(
+            (row for row in catalog._rows if row.directory == directory),
+            key=lambda r: (-r.mtime, r.id),
+        )
+        assert [r.id for r in seen] == [r.id for r in ordered]
+        assert len({r.id for r in seen}) == len(ftp_listings[directory])
+    assert catalog.latest("/Unknown", 10) is None
+
+
+def test_latest_from_listing_pages_like_latest(catalog, ftp_listings, parse_row):
+    directory = "/English"
+    cursor = None
+    while True:
+        expected = catalog.latest(directory, 20, cursor)
+        page = FTPCatalog.latest_from_listing(
+            ftp_listings[directory], directory, parse_row, 20, cursor,
+        )
+        assert [r.id for r in page] == [r.id for r in expected]
+        if not page:
+            break
+        cursor = (page[-1].mtime, page[-1].id)
+
+
+@pytest.mark.parametrize("limit", [0, 1, 10, 200, 10_000])
+def test_sample_respects_its_bounds(catalog, limit):
+    rows = catalog.sample(limit, random.Random(limit))
+    assert len(rows) == min(max(limit, 0), len(catalog))
+    assert len({r.id for r in rows}) == len(rows)
+
+
+def test_sample_of_an_empty_catalog(ftp_listings):
+    assert FTPCatalog(list(ftp_listings)).sample(5) == []
@@ -0,0 +1,90 @@
+"""Memory-mapped catalog snapshots: round trip and rejection of bad files."""
+
+import asyncio
+import random
+import struct
+
+import pytest
+
+from ftp_catalog import FTPCatalog
+from ftp_catalog_snapshot import VERSION, MappedCatalog, load_snapshot, write_snapshot
+
+QUERIES = ["knight", "the dark knight 2008", "baby john", "dune part", "up", "2021", "kingdom", "zzz"]
+
+
+@pytest.fixture
+def catalogs(tmp_path, ftp_listings, ftp_handler):
+    built = FTPCatalog.build(ftp_listings, ftp_handler._parse_row)
+    path = str(tmp_path / "catalog.bin")
+    write_snapshot(built, path)
+    mapped = load_snapshot(path)
+    assert isinstance(mapped, MappedCatalog)
+    return built, mapped, path
+
+
+def test_round_trip_answers_like_the_built_catalog(catalogs):
+    built, mapped, _ = catalogs
+    assert len(mapped) == len(built)
+    assert mapped.directories == built.directories
+    assert mapped.built_at == built.built_at
+
+    for query in QUERIES:
+        assert mapped.search(query, 20) == built.search(query, 20), query
+
+    for directory in built.directories:
+        cursor = None
+        while True:
+            expected = built.latest(directory, 25, cursor)
+            assert [r.to_dict() for r in mapped.latest(directory, 25, cursor)] == [
+                r.to_dict() for r in expected
+            ]
+            if not expected:
+                break
+            cursor = (expected[-1].mtime, expected[-1].id)
+
+    for seed in range(5):
+        assert [r.id for r in mapped.sample(12, random.Random(seed))] == [
+            r.id for r in built.sample(12, random.Random(seed))
+        ]
+
+    row = built.sample(1, random.Random(0))[0]
+    assert mapped.get(row.id).to_dict() == row.to_dict()
+    assert mapped.get("missing") is None
+
+
+def test_truncated_or_foreign_files_are_rejected(catalogs, tmp_path):
+    _, _, path = catalogs
+    data = open(path, "rb").read()
+
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(data[: len(data) // 2])
+    assert load_snapshot(str(truncated)) is None
+
+    header_only = tmp_path / "header.bin"
+    header_only.write_bytes(data[:12])
+    assert load_snapshot(str(header_only)) is None
+
+    old = tmp_path / "old.bin"
+    old.write_bytes(data[:8] + struct.pack("<I", VERSION - 1) + data[12:])
+    assert load_snapshot(str(old)) is None
+
+    assert load_snapshot(str(tmp_path / "missing.bin")) is None
+
+
+def test_handler_rebuilds_when_the_snapshot_is_unusable(tmp_path, ftp_listings, monkeypatch):
+    from ftp_handler import FTPMovieHandler
+
+    path = tmp_path / "catalog.bin"
+    path.write_bytes(b"FTPCAT\x00\x01" + b"\x00" * 16)
+    handler = FTPMovieHandler(listing_cache_dir=str(tmp_path / "listings"), catalog_snapshot=str(path))
+    assert not handler.catalog.loaded
+
+    async def fetch_listing(directory):
+        return ftp_listings[directory]
+
+    monkeypatch.setattr(handler, "_fetch_listing", fetch_listing)
+    catalog = asyncio.run(handler.refresh_catalog(reuse_within=3600))
+
+    assert isinstance(catalog, MappedCatalog)
+    assert len(catalog) == sum(len(items) for items in ftp_listings.values())
+    assert catalog.search("knight", 5)
@@ -0,0 +1,70 @@
+"""Conditional listing fetches across mirrors."""
+
+import asyncio
+
+import httpx
+
+import ftp_handler
+from ftp_handler import FTPMovieHandler
+
+PAGE = '<pre><a href="../">../</a>\n<a href="Dune%20(2021)/">Dune (2021)/</a>  12-Mar-2021 10:00    -\n</pre>'
+
+
+def test_validators_are_only_sent_to_the_mirror_that_issued_them(tmp_path, monkeypatch):
+    seen = []
+
+    def respond(request):
+        validator = request.headers.get("if-none-match")
+        seen.append((request.url.host, validator))
+        if validator == f'"{request.url.host}"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=PAGE, headers={"etag": f'"{request.url.host}"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+    monkeypatch.setattr(ftp_handler, "_get_client", lambda timeout=10: client)
+    handler = FTPMovieHandler(
+        host="a.example", mirrors=["b.example"], listing_cache_dir=str(tmp_path),
+    )
+
+    def prefer(host):
+        for mirror in handler.mirrors.mirrors:
+            mirror.rtt = 0.01 if mirror.host == host else 1.0
+
+    async def run():
+        results = []
+        for host in ("a.example", "b.example", "b.example", "a.example"):
+            prefer(host)
+            results.append([e.name for e in await handler._fetch_listing("/English")])
+        await client.aclose()
+        return results
+
+    assert asyncio.run(run()) == [["Dune (2021)/"]] * 4
+    assert seen == [
+        ("a.example", None),
+        ("b.example", None),          # a's ETag is not sent to b
+        ("b.example", '"b.example"'),  # 304 from b
+        ("a.example", None),          # cache now holds b's validators
+    ]
+
+
+def test_directory_listing_for_random_movies_is_not_pinned(tmp_path, monkeypatch):
+    calls = []
+
+    def respond(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, text=PAGE)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+    monkeypatch.setattr(ftp_handler, "_get_client", lambda timeout=10: client)
+    handler = FTPMovieHandler(host="a.example", listing_cache_dir=str(tmp_path))
+
+    async def run():
+        first = await handler._get_movies_from_directory("/English")
+        second = await handler._get_movies_from_directory("/English")
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert [m["title"] for m in first] == [m["title"] for m in second]
+    assert len(calls) == 2
+    assert handler._dir_cache == {}
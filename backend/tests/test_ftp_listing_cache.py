@@ -0,0 +1,54 @@
+"""On-disk listing cache: atomic saves and the disk bound."""
+
+import asyncio
+import os
+import time
+
+from ftp_listing_cache import ListingCache
+from ftp_listing_parser import ListingEntry
+
+ITEMS = [ListingEntry("Movie (2024)/", 1700000000.0, None)]
+
+
+def test_entries_survive_a_new_instance(tmp_path):
+    async def run():
+        await ListingCache(str(tmp_path)).put("/Movies/", ITEMS, '"abc"', None)
+        return await ListingCache(str(tmp_path)).get("/Movies/")
+
+    entry = asyncio.run(run())
+    assert entry["items"] == ITEMS
+    assert entry["etag"] == '"abc"'
+
+
+def test_concurrent_saves_leave_no_temp_files(tmp_path):
+    cache = ListingCache(str(tmp_path))
+
+    async def run():
+        await asyncio.gather(*(cache.put("/Movies/", ITEMS, f'"{i}"', None) for i in range(20)))
+
+    asyncio.run(run())
+    assert [p.suffix for p in tmp_path.iterdir()] == [".json"]
+
+
+def test_prune_drops_expired_then_oldest(tmp_path):
+    cache = ListingCache(str(tmp_path), max_files=3, max_age=3600)
+    now = time.time()
+    for i in range(5):
+        cache._save(f"/dir{i}/", {"items": ITEMS, "fetched_at": now})
+        os.utime(cache._path(f"/dir{i}/"), (now - 10 * (5 - i), now - 10 * (5 - i)))
+    expired = cache._path("/dir4/")
+    os.utime(expired, (now - 7200, now - 7200))
+    (tmp_path / "left-by-crash.tmp").write_text("{}")
+    os.utime(tmp_path / "left-by-crash.tmp", (now - 7200, now - 7200))
+
+    assert cache.prune() == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        cache._path(d).name for d in ("/dir1/", "/dir2/", "/dir3/")
+    )
+    assert cache._load("/dir4/") is None
+
+
+def test_expired_entries_are_not_loaded(tmp_path):
+    cache = ListingCache(str(tmp_path), max_age=60)
+    cache._save("/old/", {"items": ITEMS, "fetched_at": time.time() - 120})
+    assert cache._load("/old/") is None
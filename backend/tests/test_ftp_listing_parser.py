@@ -0,0 +1,72 @@
+"""Apache autoindex parsing across the table, pre and bare-list layouts."""
+
+import pytest
+
+from ftp_listing_parser import ApacheListingParser, ListingEntry, parse_listing, parse_mtime
+
+MAR_12 = parse_mtime("12-Mar-2021 10:00")
+JAN_05 = parse_mtime("2024-01-05 18:30")
+
+TABLE = """<html><body><h1>Index of /Indian/Movies</h1>
+<table>
+<tr><th><a href="?C=N;O=D">Name</a></th><th>Last modified</th><th>Size</th></tr>
+<tr><td valign="top"><img src="/icons/back.gif" alt="[PARENTDIR]"></td><td><a href="/Indian/">Parent Directory</a></td><td>&nbsp;</td><td align="right">  - </td></tr>
+<tr><td><img src="/icons/folder.gif"></td><td><a href="Tom%20%26%20Jerry%20(2021)/">Tom &amp; Jerry (2021)/</a></td><td align="right">12-Mar-2021 10:00  </td><td align="right">  - </td></tr>
+<tr><td><img src="/icons/movie.gif"></td><td><a href="Dune%20%5B2021%5D.mkv">Dune [2021].mkv</a></td><td align="right">2024-01-05 18:30  </td><td align="right">1.5G</td></tr>
+<tr><td><img src="/icons/text.gif"></td><td><a href="notes.txt">notes.txt</a></td><td align="right">12-Mar-2021 10:00  </td><td align="right">512</td></tr>
+</table></body></html>"""
+
+PRE = """<html><body><h1>Index of /Indian/Movies</h1><pre><img src="/icons/blank.gif"> <a href="?C=N;O=D">Name</a>                    <a href="?C=M;O=A">Last modified</a>      <a href="?C=S;O=A">Size</a>
+<hr><img src="/icons/back.gif"> <a href="/Indian/">Parent Directory</a>                             -
+<img src="/icons/folder.gif"> <a href="Tom%20%26%20Jerry%20(2021)/">Tom &amp; Jerry (2021)/</a>   12-Mar-2021 10:00    -
+<img src="/icons/movie.gif"> <a href="Dune%20%5B2021%5D.mkv">Dune [2021].mkv</a>        2024-01-05 18:30  1.5G
+<img src="/icons/text.gif"> <a href="notes.txt">notes.txt</a>              12-Mar-2021 10:00  512
+<hr></pre></body></html>"""
+
+LIST = """<html><body><h1>Index of /Indian/Movies</h1><ul>
+<li><a href="/Indian/"> Parent Directory</a></li>
+<li><a href="Tom%20%26%20Jerry%20(2021)/"> Tom &amp; Jerry (2021)/</a></li>
+<li><a href="Dune%20%5B2021%5D.mkv"> Dune [2021].mkv</a></li>
+<li><a href="notes.txt"> notes.txt</a></li>
+</ul></body></html>"""
+
+EXPECTED_DATED = [
+    ListingEntry("Tom & Jerry (2021)/", MAR_12, 0),
+    ListingEntry("Dune [2021].mkv", JAN_05, int(1.5 * 1024**3)),
+    ListingEntry("notes.txt", MAR_12, 512),
+]
+
+
+@pytest.mark.parametrize("page", [TABLE, PRE], ids=["table", "pre"])
+def test_dated_layouts(page):
+    assert parse_listing(page, "/Indian/Movies") == EXPECTED_DATED
+
+
+def test_list_layout_has_names_only():
+    assert parse_listing(LIST, "/Indian/Movies") == [
+        ListingEntry("Tom & Jerry (2021)/"),
+        ListingEntry("Dune [2021].mkv"),
+        ListingEntry("notes.txt"),
+    ]
+
+
+@pytest.mark.parametrize("page", [TABLE, PRE, LIST], ids=["table", "pre", "list"])
+def test_parent_row_is_skipped_without_path(page):
+    assert "Indian/" not in [e.name for e in parse_listing(page)]
+
+
+def test_ancestor_hrefs_are_skipped_whatever_the_text():
+    page = '<pre><a href="/Indian/">Up</a>\n<a href="/">Root</a>\n<a href="../">..</a>\n<a href="x.mkv">x.mkv</a>\n</pre>'
+    assert [e.name for e in parse_listing(page, "/Indian/Movies/")] == ["x.mkv"]
+    # Without the listed path only the ../ link can be told apart
+    assert [e.name for e in parse_listing(page)] == ["Indian/", "x.mkv"]
+
+
+@pytest.mark.parametrize("page", [TABLE, PRE], ids=["table", "pre"])
+def test_streaming_matches_one_shot(page):
+    parser = ApacheListingParser("/Indian/Movies/")
+    entries = []
+    for i in range(0, len(page), 7):
+        entries.extend(parser.feed(page[i:i + 7]))
+    entries.extend(parser.close())
+    assert entries == EXPECTED_DATED
@@ -0,0 +1,60 @@
+"""HDHub4u homepage sync: deadline-missed movies must not be skipped forever."""
+
+import asyncio
+
+import hdhub4u_homepage_scraper as hp
+from hdhub4u_homepage_scraper import HDHub4uScraper
+
+
+def _entries(n):
+    return [
+        {'clean_title': f"m{i}", 'year': '2024', 'url': f"u{i}", 'raw_title': f"m{i} (2024)"}
+        for i in range(n)
+    ]
+
+
+def _scraper(slow, deadline=0.2):
+    scraper = HDHub4uScraper(None, tmdb_concurrency=4, tmdb_deadline=deadline)
+
+    async def fake_tmdb(title, year=None, release_name=None):
+        i = int(title[1:])
+        await asyncio.sleep(1.0 if i in slow else 0.01)
+        return {
+            'id': i, 'title': title, 'poster_url': None, 'backdrop_url': None,
+            'rating': 0, 'overview': '', 'release_date': '',
+        }
+
+    scraper._get_tmdb_data = fake_tmdb
+    return scraper
+
+
+def test_enrich_keeps_page_order_and_marks_missed_entries():
+    movies = asyncio.run(_scraper(slow={1})._enrich(_entries(4)))
+    assert [m['hdhub4u_url'] for m in movies] == ['u0', 'u1', 'u2', 'u3']
+    assert [bool(m.get('pending')) for m in movies] == [False, True, False, False]
+
+
+def test_checkpoint_never_moves_past_a_pending_movie():
+    done = lambda i: {'hdhub4u_url': f"u{i}", 'title': f"m{i}"}
+    pending = lambda i: {'hdhub4u_url': f"u{i}", 'pending': True}
+
+    assert HDHub4uScraper._checkpoint([done(0), done(1)])['hdhub4u_url'] == 'u0'
+    assert HDHub4uScraper._checkpoint([done(0), pending(1), done(2)])['hdhub4u_url'] == 'u2'
+    assert HDHub4uScraper._checkpoint([done(0), pending(1)]) is None
+    assert HDHub4uScraper._checkpoint([]) is None
+
+
+def test_scrape_homepage_drops_pending_but_keeps_state_behind_them(monkeypatch):
+    scraper = _scraper(slow={0})
+    saved = {}
+
+    async def fake_httpx(max_movies, stop_at_url=None):
+        return await scraper._enrich(_entries(3))
+
+    monkeypatch.setattr(scraper, '_scrape_with_httpx', fake_httpx)
+    monkeypatch.setattr(hp.homepage_state, 'update', lambda **kw: saved.update(kw))
+
+    result = asyncio.run(scraper.scrape_homepage(max_movies=3))
+    assert [m['tmdb_id'] for m in result['movies']] == [1, 2]
+    # u0 missed the deadline: the next incremental sync must stop below it
+    assert saved['url'] == 'u1'
@@ -0,0 +1,31 @@
+"""Image cache helpers: conditional request matching."""
+
+import pytest
+
+from image_cache import ImageCache, etag_matches
+
+ETAG = ImageCache.etag("w500", "abc123.jpg")
+
+
+@pytest.mark.parametrize("header", [
+    ETAG,
+    f"W/{ETAG}",
+    f'"other", {ETAG}',
+    f'"other",W/{ETAG} , "third"',
+    "*",
+    " * ",
+])
+def test_listed_tags_match(header):
+    assert etag_matches(header, ETAG)
+
+
+@pytest.mark.parametrize("header", [
+    "",
+    '"other"',
+    f'"x{ETAG[1:-1]}x"',          # contains the tag as a substring
+    f'"{ETAG[1:-1]}, other"',     # inside another quoted value
+    ETAG[1:-1],                   # unquoted
+    '"a", "*"',
+])
+def test_other_tags_do_not_match(header):
+    assert not etag_matches(header, ETAG)
@@ -0,0 +1,81 @@
+"""TokenBucket priorities, AIMD backoff / recovery and cancellation."""
+
+import asyncio
+import time
+
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, TokenBucket
+
+
+def test_interactive_waiters_are_served_before_background():
+    async def run():
+        bucket = TokenBucket(rate=50, burst=1)
+        await bucket.acquire()  # drain the burst so everyone queues
+        served = []
+
+        async def take(name, priority):
+            await bucket.acquire(priority)
+            served.append(name)
+
+        await asyncio.gather(
+            take("bg1", PRIORITY_BACKGROUND),
+            take("bg2", PRIORITY_BACKGROUND),
+            take("ui1", PRIORITY_INTERACTIVE),
+            take("ui2", PRIORITY_INTERACTIVE),
+        )
+        return served
+
+    assert asyncio.run(run()) == ["ui1", "ui2", "bg1", "bg2"]
+
+
+def test_backoff_halves_the_rate_and_success_recovers_it():
+    bucket = TokenBucket(rate=40, burst=5, min_rate=4)
+    assert bucket.backoff(retry_after=0) == 0
+    assert bucket.rate == 20
+    bucket.backoff(retry_after=0)
+    bucket.backoff(retry_after=0)
+    bucket.backoff(retry_after=0)
+    assert bucket.rate == 4  # floored at min_rate
+
+    bucket.success()
+    assert bucket.rate == 4 + 40 * 0.02
+    for _ in range(100):
+        bucket.success()
+    assert bucket.rate == 40
+
+
+def test_backoff_without_retry_after_grows_exponentially():
+    bucket = TokenBucket(rate=10, burst=1)
+    assert [bucket.backoff() for _ in range(3)] == [1.0, 2.0, 4.0]
+    bucket.success()
+    assert bucket.backoff() == 1.0
+
+
+def test_backoff_pauses_acquire():
+    async def run():
+        bucket = TokenBucket(rate=1000, burst=10)
+        bucket.backoff(retry_after=0.1)
+        started = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_cancelled_waiter_returns_a_granted_token():
+    async def run():
+        bucket = TokenBucket(rate=0.5, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0)  # queued
+
+        # Grant it the token, then cancel before it gets to run
+        bucket._tokens = 1.0
+        bucket._dispatch()
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert waiter.cancelled()
+
+        # The refunded token serves the next caller without a 2 s wait
+        await asyncio.wait_for(bucket.acquire(), timeout=0.5)
+
+    asyncio.run(run())
@@ -0,0 +1,47 @@
+"""Release-name normalization and the durable release → TMDB map."""
+
+import asyncio
+
+from release_map import MIN_CONFIDENCE, ReleaseMap, match_confidence, normalize_release
+
+
+def test_release_tags_and_audio_channels_are_stripped():
+    assert normalize_release("Dune.Part.Two.2024.1080p.WEB-DL.DDP5.1.x264") == "dune part two 2024"
+    assert normalize_release("Oppenheimer (2023) 720p BluRay AAC 7.1 ESub") == "oppenheimer 2023"
+
+
+def test_sequel_numbers_and_title_words_are_kept():
+    assert normalize_release("Toy Story 2") != normalize_release("Toy Story")
+    assert ReleaseMap.key("Toy Story 2") != ReleaseMap.key("Toy Story")
+    assert normalize_release("The English Patient 1996") == "the english patient 1996"
+    assert normalize_release("Full Metal Jacket") == "full metal jacket"
+
+
+def test_key_appends_year_only_when_missing():
+    assert ReleaseMap.key("Heat", "1995") == "heat 1995"
+    assert ReleaseMap.key("Heat.1995.1080p", "1995") == "heat 1995"
+
+
+def test_confidence_penalizes_year_mismatch():
+    movie = {"title": "Dune: Part Two", "release_date": "2024-02-27"}
+    assert match_confidence("Dune Part Two", "2024", movie) >= MIN_CONFIDENCE
+    assert match_confidence("Dune Part Two", "2019", movie) < MIN_CONFIDENCE
+
+
+def test_put_and_get_survive_a_new_instance(tmp_path):
+    db = str(tmp_path / "map.db")
+    movie = {"id": 862, "title": "Toy Story", "release_date": "1995-11-22"}
+
+    async def run():
+        first = ReleaseMap(db)
+        assert await first.put("Toy.Story.1995.1080p.BluRay", None, movie, 0.9)
+        assert not await first.put("Toy.Story.2.1999", None, movie, MIN_CONFIDENCE / 2)
+        second = ReleaseMap(db)
+        return (
+            await second.get("Toy Story (1995) 720p WEB-DL"),
+            await second.get("Toy Story 2 (1999)"),
+        )
+
+    hit, miss = asyncio.run(run())
+    assert hit["id"] == 862
+    assert miss is None
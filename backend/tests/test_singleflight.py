@@ -0,0 +1,70 @@
+"""SingleFlight coalescing: one call per key, shared results and errors."""
+
+import asyncio
+
+from singleflight import SingleFlight
+
+
+def test_one_call_per_key():
+    calls = []
+
+    async def run():
+        flights = SingleFlight()
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        results = await asyncio.gather(
+            *(flights.do("a", lambda: fetch("a")) for _ in range(5)),
+            flights.do("b", lambda: fetch("b")),
+        )
+        assert len(flights) == 0
+        # Released once done: the next call starts fresh
+        await flights.do("a", lambda: fetch("a"))
+        return results, flights
+
+    results, flights = asyncio.run(run())
+    assert results == ["A"] * 5 + ["B"]
+    assert calls == ["a", "b", "a"]
+    assert (flights.started, flights.coalesced) == (3, 4)
+
+
+def test_error_reaches_every_waiter():
+    async def run():
+        flights = SingleFlight()
+        calls = 0
+
+        async def fail():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        results = await asyncio.gather(
+            *(flights.do("k", fail) for _ in range(3)), return_exceptions=True,
+        )
+        return results, calls
+
+    results, calls = asyncio.run(run())
+    assert calls == 1
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len({id(r) for r in results}) == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def run():
+        flights = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return 42
+
+        impatient = asyncio.ensure_future(flights.do("k", slow))
+        patient = asyncio.ensure_future(flights.do("k", slow))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(run()) == 42
@@ -0,0 +1,74 @@
+"""TMDB search cache: LRU bound, TTLs and the SQLite tier."""
+
+import asyncio
+
+import tmdb_cache
+from tmdb_cache import TMDBSearchCache, normalize_key
+
+DUNE = [{"id": 438631, "title": "Dune"}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_key():
+    assert normalize_key("The.Dark-Knight ", 2008) == "the dark knight|2008"
+    assert normalize_key("Dune", None, language="en-US", include_adult=False) == "dune||language=en-US"
+
+
+def test_lru_is_bounded_and_falls_back_to_sqlite(tmp_path):
+    async def run():
+        cache = TMDBSearchCache(str(tmp_path / "tmdb.db"), max_entries=2)
+        for key in ("a", "b", "c"):
+            await cache.set(key, DUNE)
+        in_memory = list(cache._lru)
+        from_disk = await cache.get("a")
+        return in_memory, from_disk, list(cache._lru)
+
+    in_memory, from_disk, after = asyncio.run(run())
+    assert in_memory == ["b", "c"]
+    assert from_disk == DUNE
+    assert after == ["c", "a"]
+
+
+def test_misses_expire_after_the_negative_ttl(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(tmdb_cache.time, "time", clock)
+
+    async def run():
+        cache = TMDBSearchCache(str(tmp_path / "tmdb.db"), ttl=3600, negative_ttl=60)
+        await cache.set("hit", DUNE)
+        await cache.set("miss", [])
+        first = (await cache.get("hit"), await cache.get("miss"))
+        clock.now += 61
+        second = (await cache.get("hit"), await cache.get("miss"))
+        # A fresh process sees the same expiry in the SQLite tier
+        fresh = TMDBSearchCache(str(tmp_path / "tmdb.db"), ttl=3600, negative_ttl=60)
+        third = (await fresh.get("hit"), await fresh.get("miss"))
+        clock.now += 3600
+        return first, second, third, await fresh.get("hit")
+
+    first, second, third, expired = asyncio.run(run())
+    assert first == (DUNE, [])
+    assert second == (DUNE, None)
+    assert third == (DUNE, None)
+    assert expired is None
+
+
+def test_callers_get_copies(tmp_path):
+    async def run():
+        cache = TMDBSearchCache(str(tmp_path / "tmdb.db"))
+        stored = [{"id": 1, "genre_ids": [18]}]
+        await cache.set("k", stored)
+        stored[0]["title"] = "changed after set"
+        first = await cache.get("k")
+        first[0]["genre_ids"].append(99)
+        first.append({"id": 2})
+        return await cache.get("k")
+
+    assert asyncio.run(run()) == [{"id": 1, "genre_ids": [18]}]
@@ -0,0 +1,71 @@
+"""TMDBEnricher budget handling: detached lookups drop to background priority."""
+
+import asyncio
+
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from tmdb_enricher import TMDBEnricher, background_slots, lookup_slots
+
+
+class FakeService:
+    def __init__(self, delay):
+        self.delay = delay
+        self.priorities = {}
+
+    async def match_release(self, release_name, title, year, priority=PRIORITY_INTERACTIVE, **kwargs):
+        self.priorities[title] = priority
+        await asyncio.sleep(self.delay)
+        return {"id": 1, "title": title, "release_date": "2024-01-01"}
+
+
+MOVIES = [{"title": f"Movie {i}", "year": "2024"} for i in range(3)]
+
+
+def test_lookups_detached_by_the_budget_run_in_the_background():
+    service = FakeService(delay=0.05)
+
+    async def run():
+        enricher = TMDBEnricher(service, asyncio.Semaphore(1), asyncio.Semaphore(1))
+        movies = await enricher.enrich_movies(MOVIES, budget=0.02)
+        await asyncio.gather(*enricher._background)
+        return movies
+
+    movies = asyncio.run(run())
+    assert [m["source"] for m in movies] == ["ftp_only"] * 3
+    assert service.priorities == {
+        "Movie 0": PRIORITY_INTERACTIVE,
+        "Movie 1": PRIORITY_BACKGROUND,
+        "Movie 2": PRIORITY_BACKGROUND,
+    }
+
+
+def test_within_budget_everything_is_interactive():
+    service = FakeService(delay=0)
+
+    async def run():
+        enricher = TMDBEnricher(service, asyncio.Semaphore(2), asyncio.Semaphore(1))
+        return await enricher.enrich_movies(MOVIES, budget=1)
+
+    assert [m["source"] for m in asyncio.run(run())] == ["hybrid"] * 3
+    assert set(service.priorities.values()) == {PRIORITY_INTERACTIVE}
+
+
+def test_detached_lookups_do_not_queue_ahead_of_the_next_request():
+    service = FakeService(delay=0.1)
+
+    async def run():
+        enricher = TMDBEnricher(service, asyncio.Semaphore(1), asyncio.Semaphore(1))
+        await enricher.enrich_movies(MOVIES, budget=0.02)
+        # Movie 0 still holds the only interactive slot for ~0.08s; the two
+        # detached lookups must not take it before this request does
+        movies = await enricher.enrich_movies([{"title": "Next", "year": "2024"}], budget=0.3)
+        await asyncio.gather(*enricher._background)
+        return movies
+
+    assert [m["source"] for m in asyncio.run(run())] == ["hybrid"]
+    assert service.priorities["Next"] == PRIORITY_INTERACTIVE
+
+
+def test_instances_share_the_module_pools():
+    first, second = TMDBEnricher(), TMDBEnricher()
+    assert first._slots is second._slots is lookup_slots
+    assert first._background_slots is second._background_slots is background_slots
@@ -0,0 +1,32 @@
+"""TitleIndex ingestion of the TMDB daily id export."""
+
+import gzip
+import json
+
+from tmdb_export import TitleIndex, normalize_title
+
+
+def test_load_ranks_by_popularity_and_skips_bad_lines(tmp_path):
+    path = tmp_path / "movie_ids.json.gz"
+    lines = [
+        {"adult": False, "id": 1, "original_title": "Heat", "popularity": 5.0, "video": False},
+        {"adult": False, "id": 2, "original_title": "Heat", "popularity": 9.0, "video": False},
+        {"adult": True, "id": 3, "original_title": "Heat", "popularity": 50.0, "video": False},
+        {"adult": False, "original_title": "No Id", "popularity": 1.0, "video": False},
+        {"adult": False, "id": 4, "original_title": "Spider-Man: No Way Home", "popularity": 3.0},
+    ]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+        f.write("not json\n")
+        f.write("[1, 2]\n")
+
+    index = TitleIndex.load(str(path))
+    assert index.candidates("heat") == (2, 1)
+    assert index.candidates("Spider Man No Way Home") == (4,)
+    assert index.candidates("No Id") == ()
+    assert len(index) == 2
+
+
+def test_normalize_title():
+    assert normalize_title("Spider-Man: No Way Home") == "spider man no way home"
@@ -0,0 +1,157 @@
+"""
+TMDB Search Cache — two-tier cache for ``/search/movie`` results.
+
+The same FTP folder titles and scraped titles are looked up on TMDB again
+and again (``/trending``, ``/latest``, ``/search``, homepage sync, scraper
+search). Results are cached under a normalized ``(title, year)`` key:
+
+- tier 1: in-process LRU (dict of recent keys)
+- tier 2: SQLite table that survives restarts, shared by workers
+
+Hits are kept for ``ttl`` seconds; "not found" (empty result lists) only
+for ``negative_ttl``, so titles TMDB adds later are picked up soon. Failed
+requests are never cached.
+
+Callers get their own copy of the results: the enricher and formatters
+annotate result dicts in place, which must not leak into the cache.
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "tmdb_cache.db"
+
+_SEPARATORS_RE = re.compile(r"[\s._\-:|/\\()\[\]]+")
+
+
+def normalize_key(title: str, year: Optional[Any] = None, **options: Any) -> str:
+    """
+    ``("The.Dark-Knight ", 2008)`` → ``"the dark knight|2008"``. Extra
+    request options (language, include_adult...) are appended when set.
+    """
+    text = unicodedata.normalize("NFKC", title or "").lower()
+    text = _SEPARATORS_RE.sub(" ", text).strip()
+    key = f"{text}|{year or ''}"
+    for name in sorted(options):
+        if options[name] not in (None, False, ""):
+            key += f"|{name}={options[name]}"
+    return key
+
+
+class TMDBSearchCache:
+    """LRU in front of a SQLite table, with separate TTLs for hits and misses."""
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        max_entries: int = 1024,
+        ttl: int = 7 * 86400,
+        negative_ttl: int = 6 * 3600,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # key -> (expires_at, results)
+        self._lru: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._ready = False
+        self.hits = 0
+        self.misses = 0
+
+    async def _init_db(self) -> None:
+        if self._ready:
+            return
+        async with self._lock:
+            if self._ready:
+                return
+            try:
+                async with aiosqlite.connect(self.db_path) as db:
+                    await db.execute("""
+                        CREATE TABLE IF NOT EXISTS tmdb_search (
+                            key TEXT PRIMARY KEY,
+                            data TEXT NOT NULL,
+                            expires_at REAL NOT NULL
+                        )
+                    """)
+                    await db.execute(
+                        "DELETE FROM tmdb_search WHERE expires_at < ?", (time.time(),)
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"TMDB cache init error: {e}")
+            self._ready = True
+
+    async def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached results for *key* (``[]`` is a cached miss), or None."""
+        now = time.time()
+        entry = self._lru.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[1])
+            del self._lru[key]
+
+        await self._init_db()
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                async with db.execute(
+                    "SELECT data, expires_at FROM tmdb_search WHERE key = ?", (key,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+        except Exception as e:
+            logger.warning(f"TMDB cache read error: {e}")
+            row = None
+
+        if row and row[1] > now:
+            results = json.loads(row[0])
+            self._remember(key, row[1], results)
+            self.hits += 1
+            return copy.deepcopy(results)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, results: List[Dict]) -> None:
+        """Store a successful response; empty results get the negative TTL."""
+        expires_at = time.time() + (self.ttl if results else self.negative_ttl)
+        self._remember(key, expires_at, copy.deepcopy(results))
+
+        await self._init_db()
+        try:
+            async with self._lock:
+                async with aiosqlite.connect(self.db_path) as db:
+                    await db.execute(
+                        "INSERT OR REPLACE INTO tmdb_search (key, data, expires_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(results), expires_at),
+                    )
+                    await db.commit()
+        except Exception as e:
+            logger.error(f"TMDB cache write error: {e}")
+
+    def _remember(self, key: str, expires_at: float, results: List[Dict]) -> None:
+        self._lru[key] = (expires_at, results)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries_in_memory": len(self._lru),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -1,55 +1,176 @@
 import asyncio
-import aiohttp
+import hashlib
 import logging
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from config.sources import MovieSources
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from tmdb_service import TMDBMovie, TMDBService, tmdb_service
 
 logger = logging.getLogger(__name__)
 
+# TMDB lookups in flight across all requests: concurrent requests queue for
+# the same slots instead of each fanning out a pool of their own
+lookup_slots = asyncio.Semaphore(MovieSources.TMDB_ENRICH_CONCURRENCY)
+# Lookups detached by a spent budget: kept off lookup_slots (a FIFO) so
+# they never queue ahead of the next request's interactive lookups
+background_slots = asyncio.Semaphore(MovieSources.TMDB_BACKGROUND_CONCURRENCY)
+
+
+def fallback_id(title: str) -> int:
+    """
+    Stable id for a title TMDB couldn't match: negative (never a real TMDB
+    id) and the same in every worker and across restarts, unlike hash().
+    """
+    digest = hashlib.md5(title.lower().strip().encode()).hexdigest()
+    return -int(digest[:12], 16)
+
+
+def _release_name(ftp_movie: Dict) -> str:
+    """Raw FTP folder name of *ftp_movie* — the key into the release map."""
+    folder = ftp_movie.get('_internal_folder')
+    if not folder and ftp_movie.get('ftp_path'):
+        folder = ftp_movie['ftp_path'].rstrip('/').rsplit('/', 1)[-1]
+    return folder or ftp_movie['title']
+
+
+def _ftp_fields(ftp_movie: Dict) -> Dict:
+    """
+    FTP-side fields of an enriched entry. Random-movie dicts carry
+    ``ftp_path`` / ``ftp_url``; search and browse results only carry the
+    internal folder, so the path is rebuilt from it.
+    """
+    ftp_path = ftp_movie.get('ftp_path')
+    if not ftp_path and ftp_movie.get('_internal_folder'):
+        ftp_path = f"{ftp_movie.get('_internal_directory', '')}/{ftp_movie['_internal_folder']}"
+    return {
+        'ftp_path': ftp_path,
+        'ftp_url': ftp_movie.get('ftp_url'),
+        'quality': ftp_movie.get('quality', 'HD'),
+    }
+
+
 class TMDBEnricher:
-    """Enrich FTP movies with TMDB metadata"""
+    """
+    Enrich FTP movies with TMDB metadata
+
+    Lookups share the process-wide ``lookup_slots`` pool. With a latency
+    ``budget``, whatever hasn't finished by then is returned FTP-only and
+    keeps enriching in the background, so the TMDB cache has it next time.
+    Lookups that hadn't started yet move to ``background_slots`` at
+    ``PRIORITY_BACKGROUND`` and so don't delay user-facing lookups.
+    """
     
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.base_url = "https://api.themoviedb.org/3"
+    def __init__(
+        self,
+        service: TMDBService = tmdb_service,
+        slots: asyncio.Semaphore = lookup_slots,
+        background: asyncio.Semaphore = background_slots,
+    ):
+        self._service = service
+        self._slots = slots
+        self._background_slots = background
         self.image_base = "https://image.tmdb.org/t/p"
+        # Lookups that outlived their request's budget
+        self._background: Set[asyncio.Task] = set()
     
-    async def enrich_movies(self, ftp_movies: List[Dict]) -> List[Dict]:
+    async def enrich_movies(
+        self,
+        ftp_movies: List[Dict],
+        budget: Optional[float] = None,
+    ) -> List[Dict]:
         """
         Enrich list of FTP movies with TMDB data
-        Returns merged data: FTP info + TMDB metadata
+        Returns merged data: FTP info + TMDB metadata, in input order
         """
         if not ftp_movies:
             return []
         
         logger.info(f"[TMDB] Enriching {len(ftp_movies)} movies...")
         
-        async with aiohttp.ClientSession() as session:
-            tasks = [
-                self._enrich_single_movie(session, movie)
-                for movie in ftp_movies
-            ]
-            
-            enriched = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Filter out errors
-            valid = [m for m in enriched if isinstance(m, dict)]
+        enriched: List[Optional[Dict]] = [None] * len(ftp_movies)
+        async for index, movie in self.enrich_stream(ftp_movies, budget):
+            enriched[index] = movie
+        
+        # Filter out errors
+        valid = [m for m in enriched if isinstance(m, dict)]
+        
+        logger.info(f"[TMDB] Successfully enriched {len(valid)}/{len(ftp_movies)} movies")
+        return valid
+    
+    async def enrich_stream(
+        self,
+        ftp_movies: List[Dict],
+        budget: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Yield ``(index, movie)`` as each lookup completes, in flight as
+        slots allow. After *budget* seconds the remaining movies are yielded
+        FTP-only and their lookups continue detached: running ones finish,
+        those still waiting for a slot are moved to the background pool.
+        """
+        started: Set[int] = set()
+        
+        async def worker(index: int, movie: Dict) -> Dict:
+            async with self._slots:
+                started.add(index)
+                return await self._enrich_single_movie(movie)
+        
+        tasks = {
+            asyncio.ensure_future(worker(i, m)): i for i, m in enumerate(ftp_movies)
+        }
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget if budget is not None else None
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    break  # budget spent
+                for task in done:
+                    if task.exception() is None:
+                        yield tasks[task], task.result()
             
-            logger.info(f"[TMDB] Successfully enriched {len(valid)}/{len(ftp_movies)} movies")
-            return valid
+            if pending:
+                logger.info(
+                    f"[TMDB] Budget of {budget}s spent: {len(pending)} movies returned FTP-only"
+                )
+                for task in sorted(pending, key=tasks.get):
+                    yield tasks[task], self._ftp_only(ftp_movies[tasks[task]])
+        finally:
+            # Unfinished lookups keep running and warm the cache
+            for task in pending:
+                index = tasks[task]
+                if index not in started:
+                    # Give up the queue position to the next request
+                    task.cancel()
+                    task = asyncio.ensure_future(self._background_lookup(ftp_movies[index]))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+    
+    async def _background_lookup(self, ftp_movie: Dict) -> Dict:
+        async with self._background_slots:
+            return await self._enrich_single_movie(ftp_movie, PRIORITY_BACKGROUND)
     
     async def _enrich_single_movie(
-        self, 
-        session: aiohttp.ClientSession, 
-        ftp_movie: Dict
+        self,
+        ftp_movie: Dict,
+        priority: int = PRIORITY_INTERACTIVE,
     ) -> Dict:
         """Enrich single FTP movie with TMDB data"""
         
         try:
             # Search TMDB for this movie
             tmdb_data = await self._search_tmdb(
-                session,
                 ftp_movie['title'],
-                ftp_movie.get('year')
+                ftp_movie.get('year'),
+                release_name=_release_name(ftp_movie),
+                priority=priority,
             )
             
             if tmdb_data:
@@ -69,80 +190,72 @@ class TMDBEnricher:
                     'genre_ids': tmdb_data.get('genre_ids', []),
                     
                     # FTP data (for links)
-                    'ftp_path': ftp_movie['ftp_path'],
-                    'ftp_url': ftp_movie['ftp_url'],
-                    'quality': ftp_movie['quality'],
+                    **_ftp_fields(ftp_movie),
                     'source': 'hybrid',  # Indicates FTP + TMDB
                     'has_links': True,   # Always true for FTP movies
                 }
             else:
                 # TMDB not found - use FTP data only
                 logger.warning(f"[TMDB] Not found: {ftp_movie['title']}")
-                return {
-                    'id': hash(ftp_movie['title']),  # Generate fake ID
-                    'title': ftp_movie['title'],
-                    'year': str(ftp_movie.get('year', '')),
-                    'poster_path': None,
-                    'backdrop_path': None,
-                    'overview': f"Available in {ftp_movie['quality']}",
-                    'vote_average': 0,
-                    'vote_count': 0,
-                    'popularity': 0,
-                    'genre_ids': [],
-                    'ftp_path': ftp_movie['ftp_path'],
-                    'ftp_url': ftp_movie['ftp_url'],
-                    'quality': ftp_movie['quality'],
-                    'source': 'ftp_only',
-                    'has_links': True,
-                }
+                return self._ftp_only(ftp_movie)
         
         except Exception as e:
             logger.error(f"[TMDB] Enrich error for '{ftp_movie.get('title')}': {e}")
             # Return FTP-only data on error
             return {
-                'id': hash(ftp_movie['title']),
+                'id': fallback_id(ftp_movie['title']),
                 'title': ftp_movie['title'],
                 'year': str(ftp_movie.get('year', '')),
                 'poster_path': None,
                 'overview': '',
-                'ftp_path': ftp_movie['ftp_path'],
-                'ftp_url': ftp_movie['ftp_url'],
-                'quality': ftp_movie['quality'],
+                **_ftp_fields(ftp_movie),
                 'source': 'ftp_only',
                 'has_links': True,
             }
     
+    @staticmethod
+    def _ftp_only(ftp_movie: Dict) -> Dict:
+        """Display entry for a movie without (or not yet with) TMDB data."""
+        return {
+            'id': fallback_id(ftp_movie['title']),  # Stable fake ID
+            'title': ftp_movie['title'],
+            'year': str(ftp_movie.get('year', '')),
+            'poster_path': None,
+            'backdrop_path': None,
+            'overview': f"Available in {ftp_movie.get('quality', 'HD')}",
+            'vote_average': 0,
+            'vote_count': 0,
+            'popularity': 0,
+            'genre_ids': [],
+            **_ftp_fields(ftp_movie),
+            'source': 'ftp_only',
+            'has_links': True,
+        }
+    
     async def _search_tmdb(
         self,
-        session: aiohttp.ClientSession,
         title: str,
-        year: Optional[int] = None
-    ) -> Optional[Dict]:
-        """Search TMDB for a movie"""
+        year: Optional[int] = None,
+        release_name: Optional[str] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Optional[TMDBMovie]:
+        """Search TMDB for a movie (via the release map when the folder name is known)"""
         
         try:
-            params = {
-                'api_key': self.api_key,
-                'query': title,
-                'language': 'en-US',
-            }
-            
-            if year and year != '' and int(year) > 1900:
-                params['year'] = year
-            
-            url = f"{self.base_url}/search/movie"
+            search_year = year if year and year != '' and int(year) > 1900 else None
             
-            async with session.get(url, params=params, timeout=5) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if data.get('results') and len(data['results']) > 0:
-                        # Return first match
-                        return data['results'][0]
-            
-            return None
+            # Return first match
+            return await self._service.match_release(
+                release_name or title,
+                title,
+                search_year,
+                retry_without_year=False,
+                language='en-US',
+                timeout=5,
+                priority=priority,
+            )
         
-        except asyncio.TimeoutError:
+        except (asyncio.TimeoutError, httpx.TimeoutException):
             logger.warning(f"[TMDB] Timeout for: {title}")
             return None
         except Exception as e:
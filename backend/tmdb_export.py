@@ -0,0 +1,96 @@
+"""
+TMDB Export — offline title → TMDB id index from the daily id export.
+
+TMDB publishes a gzipped JSON-lines file of every movie id each day
+(``movie_ids_MM_DD_YYYY.json.gz`` from files.tmdb.org), one object per
+line::
+
+    {"adult":false,"id":3924,"original_title":"Blondie","popularity":2.9,"video":false}
+
+:class:`TitleIndex` ingests such a file from local disk into a compact
+in-memory index: normalized title → up to ``max_candidates`` ids, most
+popular first. ``TMDBService.match_release`` resolves titles through it
+and only calls the API for the candidate's details, falling back to a
+``/search/movie`` when no candidate fits (the export carries only the
+original title and no year).
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from typing import Dict, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+
+def normalize_title(title: str) -> str:
+    """``"Spider-Man: No Way Home"`` → ``"spider man no way home"``."""
+    text = unicodedata.normalize("NFKC", title or "").lower()
+    return _NON_ALNUM_RE.sub(" ", text).strip()
+
+
+class TitleIndex:
+    """Normalized title → TMDB ids ranked by popularity."""
+
+    def __init__(self, titles: Dict[str, Union[int, Tuple[int, ...]]], built_at: float = 0.0):
+        # Most titles are unique: those map to a bare id, collisions to a tuple
+        self._titles = titles
+        self.built_at = built_at
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        max_candidates: int = 3,
+        min_popularity: float = 0.0,
+    ) -> "TitleIndex":
+        """
+        Ingest a (gzipped) TMDB movie id export. Adult and video entries,
+        and lines that aren't a JSON object with an ``id``, are skipped.
+        """
+        started = time.monotonic()
+        ranked: Dict[str, List[Tuple[float, int]]] = {}
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                tmdb_id = entry.get("id") if isinstance(entry, dict) else None
+                if not tmdb_id or entry.get("adult") or entry.get("video"):
+                    continue
+                popularity = entry.get("popularity") or 0.0
+                if popularity < min_popularity:
+                    continue
+                title = normalize_title(entry.get("original_title", ""))
+                if title:
+                    ranked.setdefault(title, []).append((popularity, tmdb_id))
+
+        titles: Dict[str, Union[int, Tuple[int, ...]]] = {}
+        for title, candidates in ranked.items():
+            if len(candidates) == 1:
+                titles[title] = candidates[0][1]
+            else:
+                candidates.sort(reverse=True)
+                titles[title] = tuple(i for _, i in candidates[:max_candidates])
+
+        logger.info(
+            f"[TMDB] Title index: {len(titles)} titles from {os.path.basename(path)} "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        return cls(titles, built_at=os.path.getmtime(path))
+
+    def candidates(self, title: str) -> Tuple[int, ...]:
+        """TMDB ids titled *title*, most popular first (empty if unknown)."""
+        ids = self._titles.get(normalize_title(title), ())
+        return (ids,) if isinstance(ids, int) else ids
+
+    def __len__(self) -> int:
+        return len(self._titles)
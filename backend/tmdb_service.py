@@ -0,0 +1,325 @@
+"""
+TMDB Service — the one shared client for api.themoviedb.org.
+
+Every TMDB lookup in the backend (``TMDBHelper``, ``TMDBEnricher``, the
+scrapers' title matching and the admin search) goes through the
+module-level :data:`tmdb_service`, so they all share one long-lived
+``httpx.AsyncClient``: keep-alive connections are reused across requests
+and, when the ``h2`` package is installed (``httpx[http2]``), concurrent
+lookups are multiplexed over a single HTTP/2 connection instead of each
+paying a fresh TCP + TLS handshake.
+
+Results are the raw TMDB JSON objects, typed as :class:`TMDBMovie` /
+:class:`TMDBMovieDetails` for the fields the app reads. Searches are served
+from a :class:`~tmdb_cache.TMDBSearchCache` when one is attached, and
+concurrent identical lookups (search, details, trending) are coalesced into
+one request with :class:`~singleflight.SingleFlight`. Scraped/FTP release
+names go through :meth:`TMDBService.match_release`, which answers from the
+persistent :class:`~release_map.ReleaseMap` before searching, then from the
+offline :class:`~tmdb_export.TitleIndex` (when a TMDB id export is loaded),
+which needs only a details request instead of a search.
+
+All requests pass a process-wide :class:`~rate_limiter.TokenBucket`;
+user-facing calls use the default interactive priority, background work
+(homepage sync, prefetch) passes ``priority=PRIORITY_BACKGROUND``. A 429
+pauses the bucket for ``Retry-After`` and the request is retried.
+"""
+
+import asyncio
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, TypedDict
+
+import httpx
+
+from config.sources import MovieSources
+from rate_limiter import PRIORITY_INTERACTIVE, TokenBucket
+from release_map import ReleaseMap, match_confidence
+from singleflight import SingleFlight
+from tmdb_cache import TMDBSearchCache, normalize_key
+from tmdb_export import TitleIndex
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 — enables httpx's HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class TMDBMovie(TypedDict, total=False):
+    """A movie as returned by TMDB search / trending endpoints."""
+    id: int
+    title: str
+    original_title: str
+    original_language: str
+    release_date: str
+    overview: str
+    poster_path: Optional[str]
+    backdrop_path: Optional[str]
+    vote_average: float
+    vote_count: int
+    popularity: float
+    genre_ids: List[int]
+
+
+class TMDBGenre(TypedDict):
+    id: int
+    name: str
+
+
+class TMDBMovieDetails(TMDBMovie, total=False):
+    """``/movie/{id}`` response (search fields plus details)."""
+    runtime: Optional[int]
+    genres: List[TMDBGenre]
+    tagline: Optional[str]
+    imdb_id: Optional[str]
+
+
+class TMDBService:
+    """Pooled async TMDB API client (HTTP/2 when available)."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = MovieSources.TMDB_BASE_URL,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        cache: Optional[TMDBSearchCache] = None,
+        limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        release_map: Optional[ReleaseMap] = None,
+    ):
+        self.api_key = api_key
+        self.cache = cache
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.release_map = release_map
+        self.title_index: Optional[TitleIndex] = None
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._flights = SingleFlight()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=10,
+                    keepalive_expiry=60,
+                ),
+            )
+            logger.info(
+                "[TMDB] Client ready (%s)", "HTTP/2" if HTTP2_AVAILABLE else "HTTP/1.1 keep-alive",
+            )
+        return self._client
+
+    async def load_title_index(self, path: str) -> None:
+        """Load a TMDB id export (in a thread) and resolve titles through it."""
+        try:
+            self.title_index = await asyncio.to_thread(TitleIndex.load, path)
+        except (OSError, ValueError) as e:
+            logger.error(f"[TMDB] Could not load id export {path}: {e}")
+
+    async def close(self) -> None:
+        """Close the shared client (called from the app lifespan)."""
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
+
+    async def _get(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Dict:
+        """
+        GET *path* and return the decoded JSON. Raises on HTTP/network
+        errors (including a 429 that outlasts ``max_retries``).
+        """
+        query = {"api_key": self.api_key, **(params or {})}
+        for attempt in range(self.max_retries + 1):
+            if self.limiter:
+                await self.limiter.acquire(priority)
+            resp = await self._get_client().get(
+                path, params=query, timeout=timeout if timeout is not None else self.timeout,
+            )
+            if resp.status_code != 429:
+                if self.limiter:
+                    self.limiter.success()
+                break
+            if attempt == self.max_retries:
+                break
+            retry_after = _retry_after(resp.headers.get("retry-after"))
+            if self.limiter:
+                self.limiter.backoff(retry_after)
+            else:
+                await asyncio.sleep(retry_after if retry_after is not None else 2 ** attempt)
+        resp.raise_for_status()
+        return resp.json()
+
+    # ------------------------------------------------------------------
+    # Typed API
+    # ------------------------------------------------------------------
+
+    async def search_movies(
+        self,
+        query: str,
+        year: Optional[str] = None,
+        *,
+        language: Optional[str] = None,
+        include_adult: bool = False,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> List[TMDBMovie]:
+        """``/search/movie`` results, TMDB's relevance order (cached)."""
+        key = normalize_key(query, year, language=language, include_adult=include_adult)
+        if self.cache:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        params: Dict[str, Any] = {
+            "query": query,
+            "include_adult": "true" if include_adult else "false",
+        }
+        if year:
+            params["year"] = year
+        if language:
+            params["language"] = language
+
+        async def fetch() -> List[TMDBMovie]:
+            data = await self._get("/search/movie", params, timeout, priority)
+            results = data.get("results", [])
+            if self.cache:
+                await self.cache.set(key, results)
+            return results
+
+        return await self._flights.do(("search", key), fetch)
+
+    async def search_movie(
+        self,
+        query: str,
+        year: Optional[str] = None,
+        *,
+        retry_without_year: bool = True,
+        language: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Optional[TMDBMovie]:
+        """Best (first) search match, retrying without *year* if that finds nothing."""
+        options = {"language": language, "timeout": timeout, "priority": priority}
+        results = await self.search_movies(query, year, **options)
+        if not results and year and retry_without_year:
+            results = await self.search_movies(query, **options)
+        return results[0] if results else None
+
+    async def match_release(
+        self,
+        release_name: str,
+        title: str,
+        year: Optional[str] = None,
+        *,
+        retry_without_year: bool = True,
+        language: Optional[str] = None,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_INTERACTIVE,
+    ) -> Optional[TMDBMovie]:
+        """
+        TMDB movie for a scraped *release_name* (parsed to *title* / *year*).
+        Answered from the release map when the name was matched before;
+        otherwise searched, and confident matches are remembered.
+        """
+        if self.release_map:
+            mapped = await self.release_map.get(release_name, year)
+            if mapped is not None:
+                return mapped
+
+        movie = await self._resolve_local(title, year, priority)
+        if movie is None:
+            movie = await self.search_movie(
+                title, year, retry_without_year=retry_without_year,
+                language=language, timeout=timeout, priority=priority,
+            )
+        if movie and self.release_map:
+            await self.release_map.put(
+                release_name, year, movie, match_confidence(title, year, movie),
+            )
+        return movie
+
+    async def _resolve_local(
+        self, title: str, year: Optional[str], priority: int, max_checks: int = 2,
+    ) -> Optional[TMDBMovie]:
+        """
+        Match *title* through the offline title index: the most popular
+        candidate whose release year is within a year of *year* (or the
+        most popular one without a year). None when the index can't tell.
+        """
+        if self.title_index is None:
+            return None
+        for tmdb_id in self.title_index.candidates(title)[:max_checks]:
+            try:
+                details = await self.movie_details(tmdb_id, priority=priority)
+            except httpx.HTTPError as e:
+                logger.debug(f"[TMDB] Details for local candidate {tmdb_id} failed: {e}")
+                return None
+            release_year = (details.get("release_date") or "")[:4]
+            if year and (not release_year or abs(int(release_year) - int(year)) > 1):
+                continue
+            movie = {k: details[k] for k in TMDBMovie.__annotations__ if k in details}
+            movie["genre_ids"] = [g["id"] for g in details.get("genres", [])]
+            return movie
+        return None
+
+    async def movie_details(
+        self, tmdb_id: int, priority: int = PRIORITY_INTERACTIVE,
+    ) -> TMDBMovieDetails:
+        """``/movie/{tmdb_id}``."""
+        return await self._flights.do(
+            ("details", tmdb_id),
+            lambda: self._get(f"/movie/{tmdb_id}", priority=priority),
+        )
+
+    async def trending_movies(
+        self, window: str = "week", priority: int = PRIORITY_INTERACTIVE,
+    ) -> List[TMDBMovie]:
+        """``/trending/movie/{window}`` (``day`` or ``week``)."""
+        data = await self._flights.do(
+            ("trending", window),
+            lambda: self._get(f"/trending/movie/{window}", priority=priority),
+        )
+        return data.get("results", [])
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """``Retry-After`` header (delta-seconds or HTTP date) → seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+# Shared instance used across the backend
+tmdb_service = TMDBService(
+    MovieSources.TMDB_API_KEY,
+    cache=TMDBSearchCache(
+        MovieSources.TMDB_CACHE_DB,
+        ttl=MovieSources.TMDB_CACHE_TTL,
+        negative_ttl=MovieSources.TMDB_NEGATIVE_CACHE_TTL,
+    ),
+    limiter=TokenBucket(MovieSources.TMDB_RATE_LIMIT, MovieSources.TMDB_RATE_BURST),
+    release_map=ReleaseMap(MovieSources.TMDB_CACHE_DB),
+)